@@ -1,5 +1,4 @@
-import os
-from flask import Flask, send_from_directory, abort
+from flask import Flask
 from .config import get_config
 from .extensions import db, migrate, cors
 from sqlalchemy import text
@@ -15,6 +14,10 @@ def create_app(config_name: str | None = None) -> Flask:
     load_dotenv()
     app.config.from_object(get_config(config_name))
 
+    # Faster JSON encoding for jsonify when orjson is available
+    from .json_provider import init_json_provider
+    init_json_provider(app)
+
     # Honor proxy headers from Nginx for correct url_for(_external=True) scheme/host
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_port=1, x_prefix=1)  # type: ignore[assignment]
 
@@ -23,10 +26,22 @@ def create_app(config_name: str | None = None) -> Flask:
     db.init_app(app)
     migrate.init_app(app, db)
 
+    # Upload reference counts follow Item inserts/deletes
+    from .modules.media.blobs import init_media_blobs
+    init_media_blobs()
+
+    # Per-request SQL statement counts for @query_budget
+    from .query_budget import init_query_counting
+    init_query_counting(app)
+
     # Register blueprints (v1 API)
     from .apis.v1 import register_api
     register_api(app)
 
+    # Maintenance CLI commands (flask search ...)
+    from .cli import register_cli
+    register_cli(app)
+
     @app.get("/health")
     def health() -> dict:
         return {"status": "ok"}
@@ -40,29 +55,8 @@ def create_app(config_name: str | None = None) -> Flask:
         except Exception as e:
             return {"db": "error", "message": str(e)}, 500
 
-    # Ensure upload folder exists and serve uploads
-    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
-
-    @app.get("/uploads/<path:filename>")
-    def uploads(filename: str):
-        """Serve uploaded files. Falls back to legacy path if needed.
-
-        Primary path: app.config['UPLOAD_FOLDER'] (e.g., /opt/app/uploads)
-        Legacy fallback: /opt/app/backend/uploads (used by older builds)
-        """
-        # Primary location
-        base = app.config["UPLOAD_FOLDER"]
-        primary_path = os.path.join(base, filename)
-        if os.path.isfile(primary_path):
-            return send_from_directory(base, filename)
-
-        # Legacy location (when previous default used os.getcwd() under backend)
-        legacy_base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "uploads"))
-        legacy_path = os.path.join(legacy_base, filename)
-        if os.path.isfile(legacy_path):
-            return send_from_directory(legacy_base, filename)
-
-        # Not found in any known location
-        abort(404)
+    # Serve local uploads (X-Accel-Redirect to nginx when UPLOADS_ACCEL_REDIRECT is set)
+    from .modules.media.serving import init_upload_serving
+    init_upload_serving(app)
 
     return app
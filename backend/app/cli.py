@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import click
+from flask import Flask
+from flask.cli import AppGroup
+
+# Maintenance commands, run as `flask <group> <command>` from the backend directory.
+
+search_cli = AppGroup("search", help="Search and matching maintenance.")
+
+
+@search_cli.command("reindex-terms")
+@click.option("--batch-size", default=500, show_default=True, help="Items per transaction.")
+def reindex_terms(batch_size: int) -> None:
+    """Rebuild item_terms used by the SQL matching engine."""
+    from .modules.search.sql_engine import reindex_all_terms
+
+    count = reindex_all_terms(batch_size=batch_size)
+    click.echo(f"Indexed terms for {count} items")
+
+
+items_cli = AppGroup("items", help="Item lifecycle maintenance.")
+
+
+@items_cli.command("ensure-expired-status")
+def ensure_expired_status() -> None:
+    """Add the 'expired' value to item_status_enum and items.expires_at if missing."""
+    from .modules.items.lifecycle import ensure_expired_status as _ensure
+
+    _ensure()
+    click.echo("item_status_enum includes 'expired'; items.expires_at present")
+
+
+@items_cli.command("expire")
+@click.option("--days", type=int, default=None, help="Age limit in days (default ITEM_EXPIRY_DAYS).")
+@click.option("--batch-size", type=int, default=None, help="Rows per transaction (default ITEM_EXPIRY_BATCH_SIZE).")
+@click.option("--dry-run", is_flag=True, help="Only count items that would expire.")
+def expire_items(days: int | None, batch_size: int | None, dry_run: bool) -> None:
+    """Expire stale open/matched items without active claims."""
+    from .modules.items.lifecycle import expire_stale_items
+
+    result = expire_stale_items(max_age_days=days, batch_size=batch_size, dry_run=dry_run)
+    verb = "Would expire" if dry_run else "Expired"
+    click.echo(f"{verb} {result['expired']} items; notified {result['notified']} reporters")
+
+
+@items_cli.command("migrate-approvals")
+@click.option("--batch-size", default=1000, show_default=True, help="Ids per UPDATE.")
+def migrate_approvals(batch_size: int) -> None:
+    """Add items.approved and move ids from the legacy items.approved.set setting into it."""
+    from .modules.items.approval import ensure_approval_column, migrate_legacy_approved_set
+
+    ensure_approval_column()
+    count = migrate_legacy_approved_set(batch_size=batch_size)
+    click.echo(f"Marked {count} items approved from the legacy setting")
+
+
+@items_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), default=None, help="Default: from the file extension.")
+@click.option("--type", "default_type", type=click.Choice(["lost", "found"]), default="found", show_default=True, help="Type for rows without one.")
+@click.option("--reporter-id", type=int, default=None, help="Reporter user id for every row.")
+@click.option("--approve", is_flag=True, help="Mark imported items approved.")
+@click.option("--no-match", is_flag=True, help="Skip matching after the import.")
+@click.option("--batch-size", default=500, show_default=True, help="Rows per INSERT.")
+@click.option("--dry-run", is_flag=True, help="Validate rows without inserting.")
+def import_items_cmd(path: str, fmt: str | None, default_type: str, reporter_id: int | None, approve: bool, no_match: bool, batch_size: int, dry_run: bool) -> None:
+    """Bulk-create items from a CSV or NDJSON file."""
+    from .modules.items.bulk_import import ImportFormatError, detect_format, import_items, iter_rows
+
+    try:
+        with open(path, "rb") as fh:
+            report = import_items(
+                iter_rows(fh, detect_format(path, None, fmt)),
+                default_type=default_type,
+                reporter_id=reporter_id,
+                approve=approve,
+                batch_size=batch_size,
+                match=not no_match,
+                dry_run=dry_run,
+            )
+    except ImportFormatError as e:
+        raise click.ClickException(str(e))
+    for err in report.errors:
+        click.echo(f"line {err['row']}: {err['error']}", err=True)
+    verb = "Would import" if dry_run else "Imported"
+    click.echo(f"{verb} {report.imported} items ({report.failed} failed); {report.qr_codes} QR codes, {report.matches} matches")
+
+
+media_cli = AppGroup("media", help="Uploaded media maintenance.")
+
+
+@media_cli.command("backfill-manifests")
+@click.option("--batch-size", default=200, show_default=True, help="Items per transaction.")
+@click.option("--regenerate", is_flag=True, help="Rebuild thumbnails and srcset renditions for found uploads.")
+def backfill_manifests(batch_size: int, regenerate: bool) -> None:
+    """Record media manifests for items created before they existed."""
+    from .modules.media.manifest import backfill_manifests as _backfill
+
+    counts = _backfill(batch_size=batch_size, regenerate=regenerate)
+    total = sum(counts.values())
+    detail = ", ".join(f"{k}: {v}" for k, v in sorted(counts.items())) or "nothing to do"
+    click.echo(f"Backfilled {total} items ({detail})")
+
+
+@media_cli.command("gc")
+@click.option("--dry-run", is_flag=True, help="Only report what would be deleted.")
+@click.option("--grace-hours", type=float, default=None, help="Keep files younger than this (default MEDIA_GC_GRACE_HOURS).")
+@click.option("--batch-size", type=int, default=None, help="Objects per reference check (default MEDIA_GC_BATCH_SIZE).")
+def media_gc(dry_run: bool, grace_hours: float | None, batch_size: int | None) -> None:
+    """Delete uploads, thumbnails and renditions that no item references."""
+    from .modules.media.gc import UnmanifestedItems, sweep_orphans
+
+    try:
+        stats = sweep_orphans(dry_run=dry_run, grace_hours=grace_hours, batch_size=batch_size)
+    except UnmanifestedItems as e:
+        raise click.ClickException(str(e))
+    verb = "Would delete" if dry_run else "Deleted"
+    count = stats["orphaned"] if dry_run else stats["deleted"]
+    click.echo(
+        f"Scanned {stats['scanned']} objects ({stats['scannedBytes']} bytes); {verb} {count} "
+        f"({stats['bytesReclaimed']} bytes), kept {stats['referenced']} referenced and {stats['recent']} recent; "
+        f"{stats['blobRowsDeleted']} blob rows removed, {stats['errors']} errors"
+    )
+
+
+@media_cli.command("shard-layout")
+@click.option("--batch-size", default=200, show_default=True, help="Distinct uploads listed per query.")
+@click.option("--dry-run", is_flag=True, help="Only count what would be moved.")
+def shard_layout(batch_size: int, dry_run: bool) -> None:
+    """Move flat-layout uploads into ab/cd/ fan-out directories and rewrite their manifests."""
+    from .modules.media.manifest import flat_sources_remaining, shard_existing
+
+    counts = shard_existing(batch_size=batch_size, dry_run=dry_run)
+    if counts.get("skipped"):
+        click.echo(f"Nothing to do: {counts['skipped']}")
+        return
+    verb = "Would move" if dry_run else "Moved"
+    click.echo(
+        f"{verb} {counts['files']} files for {counts['sources']} uploads ({counts['items']} items); "
+        f"{counts['missingFiles']} files missing, {flat_sources_remaining()} flat uploads left"
+    )
+
+
+@media_cli.command("recount-blobs")
+def recount_blobs_cmd() -> None:
+    """Recompute media_blobs.ref_count from the items that reference each blob."""
+    from .modules.media.blobs import recount_blobs
+
+    changed = recount_blobs()
+    click.echo(f"Corrected {changed} blob reference counts")
+
+
+schema_cli = AppGroup("schema", help="Schema maintenance for databases without migrations.")
+
+
+@schema_cli.command("ensure-indexes")
+@click.option("--dry-run", is_flag=True, help="Only list indexes that are missing.")
+def ensure_indexes(dry_run: bool) -> None:
+    """Create any index declared on the models that the database lacks."""
+    from sqlalchemy import inspect
+
+    from .extensions import db
+
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    created = 0
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name or ""):
+            if index.name in present:
+                continue
+            click.echo(f"{'missing' if dry_run else 'creating'}: {index.name} on {table.name}")
+            if not dry_run:
+                index.create(db.engine)
+            created += 1
+    click.echo(f"{created} index(es) {'missing' if dry_run else 'created'}")
+
+
+@schema_cli.command("ensure-tables")
+def ensure_tables() -> None:
+    """Create tables declared on the models that the database lacks (existing tables are left alone)."""
+    from sqlalchemy import inspect
+
+    from .extensions import db
+
+    existing = set(inspect(db.engine).get_table_names())
+    missing = [t for t in db.metadata.sorted_tables if t.name not in existing]
+    for table in missing:
+        click.echo(f"creating: {table.name}")
+    db.metadata.create_all(db.engine, tables=missing, checkfirst=True)
+    click.echo(f"{len(missing)} table(s) created")
+
+
+@schema_cli.command("ensure-columns")
+def ensure_columns() -> None:
+    """Add columns introduced after their tables were created (idempotent; run after ensure-tables)."""
+    from .modules.items.lifecycle import ensure_expires_at_column
+    from .modules.media.manifest import ensure_manifest_column
+    from .modules.notifications.summary import ensure_group_key_column
+
+    ensure_group_key_column()
+    ensure_expires_at_column()
+    ensure_manifest_column()
+    click.echo("notifications.group_key, items.expires_at, items.photo_renditions present")
+
+
+outbox_cli = AppGroup("outbox", help="Transactional outbox maintenance.")
+
+
+@outbox_cli.command("dispatch")
+@click.option("--limit", type=int, default=None, help="Events claimed per pass (default OUTBOX_BATCH_SIZE).")
+def dispatch_outbox(limit: int | None) -> None:
+    """Run due outbox events now (what the beat sweep does every minute)."""
+    from .outbox import dispatch_pending
+
+    counts = dispatch_pending(limit=limit)
+    click.echo(", ".join(f"{k}: {v}" for k, v in counts.items()))
+
+
+@outbox_cli.command("retry-failed")
+def retry_failed() -> None:
+    """Return failed outbox events to pending with a fresh attempt budget."""
+    from sqlalchemy import func, update
+
+    from .extensions import db
+    from .models.outbox_event import OutboxEvent
+
+    result = db.session.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.status == "failed")
+        .values(status="pending", attempts=0, available_at=func.now(), processed_at=None)
+    )
+    db.session.commit()
+    click.echo(f"Requeued {result.rowcount} events")
+
+
+def register_cli(app: Flask) -> None:
+    app.cli.add_command(search_cli)
+    app.cli.add_command(items_cli)
+    app.cli.add_command(media_cli)
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(outbox_cli)
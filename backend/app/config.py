@@ -25,6 +25,59 @@ class BaseConfig:
     S3_SECRET_ACCESS_KEY: str | None = os.getenv("S3_SECRET_ACCESS_KEY") or None
     # If provided, we will construct URLs as f"{S3_PUBLIC_URL_BASE}/{key}". Otherwise, use AWS default URL.
     S3_PUBLIC_URL_BASE: str | None = os.getenv("S3_PUBLIC_URL_BASE") or None
+    # Media storage backend: "local", "s3" or "memory" (default: s3 when S3_BUCKET_NAME is set)
+    MEDIA_STORAGE: str | None = os.getenv("MEDIA_STORAGE") or None
+    MEDIA_STORAGE_MAX_WORKERS: int = int(os.getenv("MEDIA_STORAGE_MAX_WORKERS", "4"))
+    S3_MAX_POOL_CONNECTIONS: int = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "16"))
+    # Item lifecycle: open/matched reports older than this many days are expired by the scheduled job
+    ITEM_EXPIRY_DAYS: int = int(os.getenv("ITEM_EXPIRY_DAYS", "90"))
+    ITEM_EXPIRY_BATCH_SIZE: int = int(os.getenv("ITEM_EXPIRY_BATCH_SIZE", "500"))
+    # Seconds an app_settings snapshot is trusted before checking the shared version row
+    SETTINGS_CACHE_TTL: float = float(os.getenv("SETTINGS_CACHE_TTL", "5"))
+    # Uploaded images declaring more pixels than this are rejected before decoding
+    MEDIA_MAX_IMAGE_PIXELS: int = int(os.getenv("MEDIA_MAX_IMAGE_PIXELS", str(64_000_000)))
+    # JSON encoder for responses: "orjson" or "default" (stdlib); unset picks orjson when installed
+    JSON_PROVIDER: str | None = os.getenv("JSON_PROVIDER") or None
+    # Seconds shared caches (nginx) may serve anonymous conditional-GET responses without revalidating
+    CONDITIONAL_GET_MAX_AGE: int = int(os.getenv("CONDITIONAL_GET_MAX_AGE", "15"))
+    # Raise instead of logging when a view exceeds its @query_budget (CI / test runs)
+    QUERY_BUDGET_STRICT: bool = os.getenv("QUERY_BUDGET_STRICT", "").lower() in ("1", "true", "yes")
+    # X-Query-Count response header; unset means on in DEBUG only
+    QUERY_COUNT_HEADER: bool | None = (
+        os.getenv("QUERY_COUNT_HEADER", "").lower() in ("1", "true", "yes") if os.getenv("QUERY_COUNT_HEADER") else None
+    )
+    # Internal nginx location for X-Accel-Redirect of /uploads (e.g. "/_uploads/"); unset serves files from Flask
+    UPLOADS_ACCEL_REDIRECT: str | None = os.getenv("UPLOADS_ACCEL_REDIRECT") or None
+    UPLOADS_ACCEL_LEGACY_PREFIX: str = os.getenv("UPLOADS_ACCEL_LEGACY_PREFIX", "/_uploads_legacy/")
+    # Upload paths whose folder (primary/legacy) is remembered per worker
+    UPLOADS_RESOLVE_CACHE_SIZE: int = int(os.getenv("UPLOADS_RESOLVE_CACHE_SIZE", "4096"))
+    # POST /items/uploads: largest direct upload (defaults to MAX_CONTENT_LENGTH) and how long its PUT URL is valid
+    DIRECT_UPLOAD_MAX_BYTES: int = int(os.getenv("DIRECT_UPLOAD_MAX_BYTES", os.getenv("MAX_CONTENT_LENGTH", str(10 * 1024 * 1024))))
+    DIRECT_UPLOAD_EXPIRES_SECONDS: int = int(os.getenv("DIRECT_UPLOAD_EXPIRES_SECONDS", "900"))
+    # Resumable uploads (POST /items/uploads/resumable): session folder, suggested PATCH size, session lifetime
+    RESUMABLE_UPLOAD_DIR: str = os.getenv("RESUMABLE_UPLOAD_DIR", os.path.join(_BASE_DIR, "cache", "resumable"))
+    RESUMABLE_CHUNK_BYTES: int = int(os.getenv("RESUMABLE_CHUNK_BYTES", str(2 * 1024 * 1024)))
+    RESUMABLE_UPLOAD_EXPIRES_HOURS: float = float(os.getenv("RESUMABLE_UPLOAD_EXPIRES_HOURS", "24"))
+    # "sharded" stores new uploads as ab/cd/<name> (see media/layout.py); "flat" keeps <name>
+    MEDIA_LAYOUT: str = os.getenv("MEDIA_LAYOUT", "sharded")
+    # Media sweeper: files younger than this are never deleted; objects listed per batch
+    MEDIA_GC_GRACE_HOURS: float = float(os.getenv("MEDIA_GC_GRACE_HOURS", "24"))
+    MEDIA_GC_BATCH_SIZE: int = int(os.getenv("MEDIA_GC_BATCH_SIZE", "1000"))
+    # /uploads/<name>?w=&fmt= resized copies: allowed widths/formats and the shared disk LRU
+    RESIZE_WIDTHS: str = os.getenv("RESIZE_WIDTHS", "160,320,480,640,800,1024,1280")
+    RESIZE_FORMATS: str = os.getenv("RESIZE_FORMATS", "webp,jpeg")
+    RESIZE_CACHE_DIR: str = os.getenv("RESIZE_CACHE_DIR", os.path.join(_BASE_DIR, "cache", "resized"))
+    RESIZE_CACHE_MAX_BYTES: int = int(os.getenv("RESIZE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    RESIZE_ACCEL_PREFIX: str = os.getenv("RESIZE_ACCEL_PREFIX", "/_resized/")
+    # Local read-through copy of S3 uploads (resizing, renditions, Facebook photo posts); 0 bytes turns it off
+    MEDIA_READ_CACHE_DIR: str = os.getenv("MEDIA_READ_CACHE_DIR", os.path.join(_BASE_DIR, "cache", "media"))
+    MEDIA_READ_CACHE_MAX_BYTES: int = int(os.getenv("MEDIA_READ_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+    MEDIA_READ_CACHE_TTL_SECONDS: float = float(os.getenv("MEDIA_READ_CACHE_TTL_SECONDS", "300"))
+    MEDIA_READ_CACHE_ACCEL_PREFIX: str = os.getenv("MEDIA_READ_CACHE_ACCEL_PREFIX", "/_media_cache/")
+    # Outbox dispatcher: events claimed per pass, retry limit, and how long a claimed event is leased
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+    OUTBOX_LEASE_SECONDS: int = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
 
 
 @dataclass
@@ -22,4 +22,8 @@ if not _origins:
 			"http://localhost:3000",
 			"http://127.0.0.1:3000",
 		]
-cors = CORS(resources={r"*": {"origins": _origins}})
+# Resumable uploads (items/uploads/resumable) report progress in these headers
+cors = CORS(
+	resources={r"*": {"origins": _origins}},
+	expose_headers=["Upload-Offset", "Upload-Length", "Location"],
+)
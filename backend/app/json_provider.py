@@ -0,0 +1,69 @@
+"""orjson-backed Flask JSON provider (optional).
+
+``jsonify`` and ``return {...}`` go through ``app.json``. With orjson
+installed, this provider encodes responses to UTF-8 bytes in one C call.
+It keeps the output of Flask's default provider:
+
+- keys are sorted (``sort_keys``)
+- dates and datetimes go through Flask's ``default()`` (HTTP dates) rather
+  than orjson's native ISO format; serializers already send ISO strings
+- Decimal, UUID, dataclasses and ``__html__`` objects are handled the same way
+
+Select it with JSON_PROVIDER=orjson|default. The default is orjson when the
+package is importable and the stdlib provider otherwise.
+"""
+from __future__ import annotations
+
+import typing as t
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    def _options(self, indent: t.Any = None) -> int:
+        opts = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opts |= orjson.OPT_SORT_KEYS
+        if indent:
+            opts |= orjson.OPT_INDENT_2
+        return opts
+
+    def _dumpb(self, obj: t.Any, indent: t.Any = None) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._options(indent))
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        indent = kwargs.pop("indent", None)
+        kwargs.pop("sort_keys", None)
+        kwargs.pop("ensure_ascii", None)
+        kwargs.pop("default", None)
+        if kwargs:
+            # Options orjson has no equivalent for (cls=, separators=, ...)
+            return super().dumps(obj, indent=indent, **kwargs)
+        return self._dumpb(obj, indent).decode()
+
+    def loads(self, s: str | bytes, **kwargs: t.Any) -> t.Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: t.Any, **kwargs: t.Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._dumpb(obj, indent=2 if pretty else None) + b"\n", mimetype=self.mimetype)
+
+
+def init_json_provider(app: Flask) -> None:
+    choice = (app.config.get("JSON_PROVIDER") or "").strip().lower()
+    if choice == "default":
+        return
+    if orjson is None:
+        if choice == "orjson":
+            app.logger.warning("JSON_PROVIDER=orjson but orjson is not installed; using the stdlib provider")
+        return
+    app.json = OrjsonProvider(app)
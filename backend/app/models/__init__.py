@@ -6,3 +6,6 @@ from .notification import Notification  # noqa: F401
 from .social_post import SocialPost  # noqa: F401
 from .qr_code import QRCode  # noqa: F401
 from .audit_log import AuditLog  # noqa: F401
+from .item_term import ItemTerm  # noqa: F401
+from .outbox_event import OutboxEvent  # noqa: F401
+from .media_blob import MediaBlob  # noqa: F401
@@ -1,8 +1,74 @@
 from __future__ import annotations
 
+import threading
+import time
 from datetime import datetime
 from ..extensions import db
-from sqlalchemy import text
+from sqlalchemy import BigInteger, Text, cast, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+# Row bumped on every write; workers compare it to decide whether to reload
+_VERSION_KEY = "__settings.version__"
+_MISSING = object()
+
+
+class _SettingsCache:
+    """Per-process copy of app_settings.
+
+    Reads are served from memory. At most once per TTL (SETTINGS_CACHE_TTL,
+    default 5s) a worker reads the version row; when another worker has
+    written since, the whole table (a few dozen rows) is reloaded.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.values: dict[str, str | None] | None = None
+        self.version: str | None = None
+        self.checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def clear(self) -> None:
+        with self.lock:
+            self.values = None
+            self.version = None
+            self.checked_at = 0.0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "hitRatio": round(self.hits / total, 4) if total else None,
+            "size": len(self.values or {}),
+            "version": self.version,
+            "ttlSeconds": _ttl(),
+            "ageSeconds": round(time.monotonic() - self.checked_at, 3) if self.values is not None else None,
+        }
+
+
+_cache = _SettingsCache()
+
+
+def _ttl() -> float:
+    try:
+        from flask import current_app
+
+        return float(current_app.config.get("SETTINGS_CACHE_TTL", 5.0))
+    except Exception:
+        return 5.0
+
+
+def _next_version(version: str | None) -> str | None:
+    """The version row's value after one more bump ("1" when it did not exist yet)."""
+    if version is None:
+        return "1"
+    try:
+        return str(int(version) + 1)
+    except ValueError:
+        return None
 
 
 class AppSetting(db.Model):
@@ -13,26 +79,96 @@ class AppSetting(db.Model):
     value_text = db.Column(db.Text, nullable=True)
     updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    @staticmethod
+    def _cached_values() -> dict[str, str | None]:
+        c = _cache
+        ttl = _ttl()
+        if c.values is not None and time.monotonic() - c.checked_at < ttl:
+            c.hits += 1
+            return c.values
+        with c.lock:
+            # Another thread may have refreshed while we waited
+            if c.values is not None and time.monotonic() - c.checked_at < ttl:
+                c.hits += 1
+                return c.values
+            c.misses += 1
+            version = db.session.execute(
+                select(AppSetting.value_text).where(AppSetting.key == _VERSION_KEY)
+            ).scalar()
+            if c.values is None or version != c.version:
+                rows = db.session.execute(select(AppSetting.key, AppSetting.value_text)).all()
+                c.values = {k: v for k, v in rows if k != _VERSION_KEY}
+                c.version = version
+                c.reloads += 1
+            c.checked_at = time.monotonic()
+            return c.values
+
+    @staticmethod
+    def cache_stats() -> dict:
+        return _cache.stats()
+
+    @staticmethod
+    def invalidate_cache() -> None:
+        """Force every worker to reload on its next read (bumps the shared version)."""
+        AppSetting._bump_version()
+        db.session.commit()
+        _cache.clear()
+
+    @staticmethod
+    def _bump_version() -> str | None:
+        stmt = pg_insert(AppSetting).values(key=_VERSION_KEY, value_text="1", updated_at=datetime.utcnow())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AppSetting.key],
+            set_={
+                "value_text": cast(cast(AppSetting.value_text, BigInteger) + 1, Text),
+                "updated_at": datetime.utcnow(),
+            },
+        ).returning(AppSetting.value_text)
+        return db.session.execute(stmt).scalar()
+
     @staticmethod
     def get(key: str, default: str | None = None) -> str | None:
         try:
-            row = AppSetting.query.filter_by(key=key).first()
-            return row.value_text if row else default
+            value = AppSetting._cached_values().get(key, _MISSING)
+            return default if value is _MISSING else value  # type: ignore[return-value]
         except Exception:
             # Table may not exist yet; return default
             return default
 
+    @staticmethod
+    def _write(key: str, value: str | None) -> None:
+        row = AppSetting.query.filter_by(key=key).first()
+        if row is None:
+            row = AppSetting(key=key, value_text=value)
+            db.session.add(row)
+        else:
+            row.value_text = value
+        db.session.flush()
+        version = AppSetting._bump_version()
+        db.session.commit()
+        # This worker sees its own write immediately; others on their next version check.
+        # Adopting the new version is only safe when ours was the sole write since the
+        # cached one; otherwise another worker's write would be marked as seen, so the
+        # next read reloads the table instead.
+        c = _cache
+        with c.lock:
+            if c.values is None:
+                return
+            if _next_version(c.version) == version:
+                c.values[key] = value
+                c.version = version
+                c.checked_at = time.monotonic()
+            else:
+                c.values = None
+                c.version = None
+                c.checked_at = 0.0
+
     @staticmethod
     def set(key: str, value: str | None) -> None:
         try:
-            row = AppSetting.query.filter_by(key=key).first()
-            if row is None:
-                row = AppSetting(key=key, value_text=value)
-                db.session.add(row)
-            else:
-                row.value_text = value
-            db.session.commit()
+            AppSetting._write(key, value)
         except Exception:
+            db.session.rollback()
             # Best-effort: attempt to create table if missing, then retry once
             try:
                 db.session.execute(
@@ -50,13 +186,7 @@ class AppSetting(db.Model):
                 )
                 db.session.commit()
                 # retry
-                row = AppSetting.query.filter_by(key=key).first()
-                if row is None:
-                    row = AppSetting(key=key, value_text=value)
-                    db.session.add(row)
-                else:
-                    row.value_text = value
-                db.session.commit()
+                AppSetting._write(key, value)
             except Exception:
                 db.session.rollback()
 
@@ -26,4 +26,9 @@ class Claim(db.Model):
         Index("idx_claims_item", "item_id"),
         Index("idx_claims_claimant", "claimant_user_id"),
         Index("idx_claims_status", "status"),
+        # Keyset pagination on (created_at, id), overall and per claimant
+        Index("idx_claims_created_id", "created_at", "id"),
+        Index("idx_claims_claimant_created_id", "claimant_user_id", "created_at", "id"),
+        # max(updated_at) change marker behind ETags on admin stats
+        Index("idx_claims_updated_at", "updated_at"),
     )
@@ -5,7 +5,8 @@ from sqlalchemy.dialects.postgresql import ENUM
 
 role_enum = ENUM("student", "admin", name="role_enum", create_type=False)
 item_type_enum = ENUM("lost", "found", name="item_type_enum", create_type=False)
-item_status_enum = ENUM("open", "matched", "claimed", "closed", name="item_status_enum", create_type=False)
+# 'expired' is added by `flask items ensure-expired-status` on existing databases
+item_status_enum = ENUM("open", "matched", "claimed", "closed", "expired", name="item_status_enum", create_type=False)
 claim_status_enum = ENUM(
     "requested",
     "verified",
@@ -1,9 +1,21 @@
-from sqlalchemy import func, Index, literal_column
-from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy import func, Index, literal_column, false
+from sqlalchemy.dialects.postgresql import JSONB, REGCONFIG
 from ..extensions import db
 from .enums import item_type_enum, item_status_enum
 
 
+def upload_url_stem(url):
+    """SQL expression: the upload stem an ``/uploads/...`` URL points at.
+
+    The path after the first ``/uploads/``, without query string,
+    thumbs/renditions prefix or extension, i.e. what the media sweeper
+    (``modules/media/gc.py``) calls a stored object's owner stem.
+    """
+    path = func.regexp_replace(func.substr(url, func.strpos(url, "/uploads/") + 9), r"[?#].*$", "")
+    path = func.regexp_replace(path, r"^(thumbs/|renditions/[0-9]+/)", "")
+    return func.regexp_replace(path, r"\.[^./]*$", "")
+
+
 class Item(db.Model):
     __tablename__ = "items"
 
@@ -17,6 +29,14 @@ class Item(db.Model):
     reported_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now())
     status = db.Column(item_status_enum, nullable=False, server_default="open")
     photo_url = db.Column(db.String(512))
+    # Media record for the photo: original, thumbnail and renditions with sizes,
+    # verified when written (modules/media/renditions.py, modules/media/manifest.py)
+    photo_renditions = db.Column(JSONB(none_as_null=True))
+    # Admin approval for public listing (features.item_approval.required)
+    approved = db.Column(db.Boolean, nullable=False, server_default=false())
+    approved_at = db.Column(db.DateTime(timezone=True))
+    # Explicit expiry deadline (set on reactivation); NULL means reported_at + ITEM_EXPIRY_DAYS
+    expires_at = db.Column(db.DateTime(timezone=True))
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
@@ -37,12 +57,40 @@ class Item(db.Model):
     )
     social_posts = db.relationship("SocialPost", back_populates="item", cascade="all, delete-orphan")
     qr_codes = db.relationship("QRCode", back_populates="item")
+    terms = db.relationship("ItemTerm", back_populates="item", cascade="all, delete-orphan", passive_deletes=True)
 
     __table_args__ = (
         Index("idx_items_type_status", "type", "status"),
         Index("idx_items_location", "location"),
         Index("idx_items_occurred_on", "occurred_on"),
         Index("idx_items_reported_at", "reported_at"),
+        # Keyset pagination: (reported_at, id) DESC for listings, per reporter for "My Reports"
+        Index("idx_items_reported_id", "reported_at", "id"),
+        Index("idx_items_reporter_reported_id", "reporter_user_id", "reported_at", "id"),
+        # max(updated_at) change marker behind ETags on listings and stats
+        Index("idx_items_updated_at", "updated_at"),
+        # Live set scanned by matching (_candidate_query) and the expiry job
+        Index(
+            "idx_items_live_type_reported",
+            "type",
+            "reported_at",
+            postgresql_where=status.in_(["open", "matched"]),
+        ),
+        # Public listing under approval gating: newest approved first
+        Index("idx_items_approved_reported", "reported_at", postgresql_where=approved.is_(True)),
+        # Upload stem (manifest source without extension) for the media sweeper's reference checks
+        Index("idx_items_photo_stem", func.regexp_replace(photo_renditions["source"].astext, r"\.[^./]*$", "")),
+        # Our own /uploads/ URLs recorded without a manifest source (client-supplied photoUrl / thumb)
+        Index(
+            "idx_items_photo_url_stem",
+            upload_url_stem(photo_url),
+            postgresql_where=photo_url.like("%/uploads/%"),
+        ),
+        Index(
+            "idx_items_external_thumb_stem",
+            upload_url_stem(photo_renditions["thumb"].astext),
+            postgresql_where=photo_renditions["thumb"].astext.like("%/uploads/%"),
+        ),
         # Full-text search index over title + description using English dictionary
         Index(
             "idx_items_search_tsv",
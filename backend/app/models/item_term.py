@@ -0,0 +1,22 @@
+from sqlalchemy import Index
+from ..extensions import db
+
+
+class ItemTerm(db.Model):
+    """Term-frequency row for an item's title + description.
+
+    One row per (item, term). Feeds the SQL TF-IDF engine in
+    ``modules/search/sql_engine.py`` so scoring can run inside Postgres.
+    """
+
+    __tablename__ = "item_terms"
+
+    item_id = db.Column(db.BigInteger, db.ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    term = db.Column(db.Text, primary_key=True)
+    tf = db.Column(db.Float, nullable=False)
+
+    item = db.relationship("Item", back_populates="terms")
+
+    __table_args__ = (
+        Index("idx_item_terms_term", "term"),
+    )
@@ -20,4 +20,6 @@ class Match(db.Model):
         UniqueConstraint("lost_item_id", "found_item_id", name="uq_matches_lost_found"),
         Index("idx_matches_lost", "lost_item_id"),
         Index("idx_matches_found", "found_item_id"),
+        # Keyset pagination on (created_at, id)
+        Index("idx_matches_created_id", "created_at", "id"),
     )
@@ -0,0 +1,27 @@
+from sqlalchemy import Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from ..extensions import db
+
+
+class MediaBlob(db.Model):
+    """One stored upload, named by the SHA-256 of its bytes and shared by every item that uses it."""
+
+    __tablename__ = "media_blobs"
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, unique=True)
+    # Storage path relative to the uploads root: "ab/cd/<sha256><ext>" (or flat "<sha256><ext>")
+    name = db.Column(db.String(255), nullable=False, unique=True)
+    size = db.Column(db.BigInteger)
+    content_type = db.Column(db.String(120))
+    # Items whose photo_renditions.source is this blob (kept by mapper events in media/blobs.py)
+    ref_count = db.Column(db.Integer, nullable=False, server_default="0")
+    # Ready rendition manifest, copied to later items with the same bytes
+    renditions = db.Column(JSONB(none_as_null=True))
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Unreferenced blobs, oldest first, for the media sweeper
+        Index("idx_media_blobs_unreferenced", "updated_at", postgresql_where=text("ref_count <= 0")),
+    )
@@ -17,9 +17,16 @@ class Notification(db.Model):
     sent_at = db.Column(db.DateTime(timezone=True))
     read_at = db.Column(db.DateTime(timezone=True))
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Coalescing key for upserted summaries (e.g. "match:<item_id>"); NULL for one-off notifications
+    group_key = db.Column(db.String(120))
+    # When a coalesced summary last gained matches; created_at stays fixed so inbox pages do not shift
+    updated_at = db.Column(db.DateTime(timezone=True))
 
     user = db.relationship("User", back_populates="notifications")
 
     __table_args__ = (
         Index("idx_notifications_user_status", "user_id", "status"),
+        Index("uq_notifications_user_group", "user_id", "group_key", unique=True),
+        # Keyset pagination of a user's inbox on (created_at, id)
+        Index("idx_notifications_user_created_id", "user_id", "created_at", "id"),
     )
@@ -0,0 +1,28 @@
+from sqlalchemy import Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from ..extensions import db
+
+
+class OutboxEvent(db.Model):
+    """Side effect recorded in the same transaction as the change that caused it."""
+
+    __tablename__ = "outbox_events"
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    topic = db.Column(db.String(120), nullable=False)
+    aggregate_type = db.Column(db.String(60), nullable=False)
+    aggregate_id = db.Column(db.BigInteger, nullable=False)
+    payload = db.Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    # pending -> done | failed (after OUTBOX_MAX_ATTEMPTS)
+    status = db.Column(db.String(20), nullable=False, server_default="pending")
+    attempts = db.Column(db.Integer, nullable=False, server_default="0")
+    available_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=func.now())
+    processed_at = db.Column(db.DateTime(timezone=True))
+
+    __table_args__ = (
+        # Dispatcher scan: due pending events, oldest first
+        Index("idx_outbox_events_pending", "available_at", "id", postgresql_where=text("status = 'pending'")),
+        Index("idx_outbox_events_aggregate", "aggregate_type", "aggregate_id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import UniqueConstraint, func
+from sqlalchemy import Index, UniqueConstraint, func
 from ..extensions import db
 from .enums import social_platform_enum, notification_status_enum
 
@@ -20,4 +20,6 @@ class SocialPost(db.Model):
 
     __table_args__ = (
         UniqueConstraint("platform", "post_external_id", name="uq_social_posts_platform_external"),
+        # Keyset pagination on (created_at, id)
+        Index("idx_social_posts_created_id", "created_at", "id"),
     )
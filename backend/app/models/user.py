@@ -1,4 +1,4 @@
-from sqlalchemy import func
+from sqlalchemy import Index, func
 from ..extensions import db
 from .enums import role_enum
 
@@ -58,3 +58,8 @@ class User(db.Model):
         foreign_keys="AuditLog.actor_user_id",
         lazy=True,
     )
+
+    __table_args__ = (
+        # Keyset pagination of the admin user list on (created_at, id)
+        Index("idx_users_created_id", "created_at", "id"),
+    )
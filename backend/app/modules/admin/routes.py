@@ -4,8 +4,20 @@ from datetime import datetime, date
 from typing import Iterable
 
 from flask import Blueprint, jsonify, request, g
+from sqlalchemy.orm import joinedload
 
 from ...extensions import db
+from ...pagination import InvalidCursor, keyset_page
+from ...conditional import conditional_get, today_marker
+from ...export import export_format, export_response, stream_query
+from ...query_budget import query_budget
+from ...serializers import (
+    AUDIT_LOG_EXPORT_COLUMNS,
+    ITEM_EXPORT_COLUMNS,
+    admin_item_dict,
+    audit_log_export_row,
+    item_export_row,
+)
 from ...models.item import Item
 from ...models.claim import Claim
 from ...models.match import Match
@@ -14,7 +26,7 @@ from ...models.claim import Claim
 from ...models.notification import Notification
 from ...models.app_setting import AppSetting
 from ...models.audit_log import AuditLog
-import json
+from ..items.approval import set_approved
 try:
     # Reuse notifications bus for SSE
     from ..notifications.bus import publish as publish_notif  # type: ignore  # already imported above but ensure availability
@@ -57,6 +69,8 @@ def _derive_ui_status(item: Item, claims_by_item: dict[int, list[Claim]] | None
     # Returned takes precedence
     if (item.status or "").lower() == "closed":
         return "returned"
+    if (item.status or "").lower() == "expired":
+        return "expired"
 
     claims = (claims_by_item or {}).get(int(item.id), [])
     # Order of precedence: approved -> rejected -> pending
@@ -83,84 +97,24 @@ def _derive_ui_status(item: Item, claims_by_item: dict[int, list[Claim]] | None
 
 
 def _item_to_admin_dict(item: Item, ui_status: str) -> dict:
-    thumb_url = getattr(item, "photo_thumb_url", None)
-    if not thumb_url and item.photo_url:
-        try:
-            if "/uploads/" in item.photo_url:
-                thumb_url = item.photo_url.replace("/uploads/", "/uploads/thumbs/", 1)
-        except Exception:
-            thumb_url = None
-
-    reporter = item.reporter
-    reporter_name = None
-    if reporter:
-        parts = [getattr(reporter, "first_name", None), getattr(reporter, "last_name", None)]
-        reporter_name = " ".join([p for p in parts if p]) or getattr(reporter, "name", None)
-
-    # Approval flag (when feature enabled)
-    approved = False
-    try:
-        if AppSetting.get_bool("features.item_approval.required", True):
-            raw = AppSetting.get("items.approved.set", None)
-            if raw:
-                try:
-                    approved_ids = set(int(x) for x in (json.loads(raw) or []))
-                    approved = int(item.id) in approved_ids
-                except Exception:
-                    approved = False
-    except Exception:
-        approved = False
-
-    return {
-        "id": item.id,
-        "type": item.type,
-        "title": item.title,
-        "description": item.description,
-        "location": item.location,
-        "occurredOn": item.occurred_on.isoformat() if item.occurred_on else None,
-        "reportedAt": item.reported_at.isoformat() if item.reported_at else None,
-        "status": item.status,
-        "uiStatus": ui_status,
-        "photoUrl": item.photo_url,
-        "photoThumbUrl": thumb_url,
-        "reporterUserId": item.reporter_user_id,
-        "reporter": {
-            "id": reporter.id if reporter else None,
-            "email": getattr(reporter, "email", None) if reporter else None,
-            "firstName": getattr(reporter, "first_name", None) if reporter else None,
-            "lastName": getattr(reporter, "last_name", None) if reporter else None,
-            "studentId": getattr(reporter, "student_id", None) if reporter else None,
-        } if reporter else None,
-        "approved": approved,
-    }
+    return admin_item_dict(item, ui_status)
 
 
-@bp.get("/items")
-def admin_list_items():
-    """Admin search and filter for items with derived UI status.
+def _admin_items_query(args):
+    """Item query for the admin filters (q, type, reporter, dateFrom, dateTo).
 
-    Query params:
-      - q: text search in title/description/location/reporter email/name
-      - type: lost|found
-      - uiStatus: unclaimed|matched|claim_pending|claim_approved|claim_rejected|returned
-      - dateFrom, dateTo: filter by occurred_on (preferred) falling in range; fallback to reported_at
-      - reporter: free text (name/email) filter on reporter
-      - limit: default 200 (max 500)
+    Shared by the paged listing and the export. uiStatus is derived per row,
+    so callers apply it themselves.
     """
-    q = (request.args.get("q") or "").strip()
-    type_param = (request.args.get("type") or "").strip().lower()
-    ui_status_filter = (request.args.get("uiStatus") or "").strip().lower()
-    reporter_q = (request.args.get("reporter") or "").strip()
-    date_from = _parse_date(request.args.get("dateFrom"))
-    date_to = _parse_date(request.args.get("dateTo"))
-    try:
-        limit = int(request.args.get("limit", 200))
-    except Exception:
-        limit = 200
-    limit = max(1, min(500, limit))
-
-    # Base query with optional joins for reporter filtering
-    qry = Item.query
+    q = (args.get("q") or "").strip()
+    type_param = (args.get("type") or "").strip().lower()
+    reporter_q = (args.get("reporter") or "").strip()
+    date_from = _parse_date(args.get("dateFrom"))
+    date_to = _parse_date(args.get("dateTo"))
+
+    # Base query with optional joins for reporter filtering; the reporter used
+    # by _item_to_admin_dict is loaded separately from the filter join
+    qry = Item.query.options(joinedload(Item.reporter))
     if type_param in ("lost", "found"):
         qry = qry.filter(Item.type == type_param)
 
@@ -221,21 +175,55 @@ def admin_list_items():
                 )
             )
 
-    rows: list[Item] = qry.order_by(Item.reported_at.desc()).limit(limit).all()
-    ids = [int(r.id) for r in rows]
+    return qry
 
-    # Prefetch claims and matches in bulk
+
+def _ui_status_context(ids: list[int]) -> tuple[dict[int, list[Claim]], dict[int, list[Match]]]:
+    """Claims and matches for a page of item ids, in two queries, for _derive_ui_status."""
     claims_by_item: dict[int, list[Claim]] = {}
-    if ids:
-        for c in Claim.query.filter(Claim.item_id.in_(ids)).all():
-            claims_by_item.setdefault(int(c.item_id), []).append(c)
     matches_by_item: dict[int, list[Match]] = {}
-    if ids:
-        for m in (
-            Match.query.filter(db.or_(Match.lost_item_id.in_(ids), Match.found_item_id.in_(ids))).all()
-        ):
-            matches_by_item.setdefault(int(m.lost_item_id), []).append(m)
-            matches_by_item.setdefault(int(m.found_item_id), []).append(m)
+    if not ids:
+        return claims_by_item, matches_by_item
+    for c in Claim.query.filter(Claim.item_id.in_(ids)).all():
+        claims_by_item.setdefault(int(c.item_id), []).append(c)
+    for m in Match.query.filter(db.or_(Match.lost_item_id.in_(ids), Match.found_item_id.in_(ids))).all():
+        matches_by_item.setdefault(int(m.lost_item_id), []).append(m)
+        matches_by_item.setdefault(int(m.found_item_id), []).append(m)
+    return claims_by_item, matches_by_item
+
+
+@bp.get("/items")
+@query_budget(4)
+def admin_list_items():
+    """Admin search and filter for items with derived UI status.
+
+    Query params:
+      - q: text search in title/description/location/reporter email/name
+      - type: lost|found
+      - uiStatus: unclaimed|matched|claim_pending|claim_approved|claim_rejected|returned|expired
+      - dateFrom, dateTo: filter by occurred_on (preferred) falling in range; fallback to reported_at
+      - reporter: free text (name/email) filter on reporter
+      - limit: default 200 (max 500)
+      - cursor: nextCursor from the previous page
+    uiStatus is applied after paging, so a filtered page may hold fewer than limit rows.
+    """
+    ui_status_filter = (request.args.get("uiStatus") or "").strip().lower()
+    try:
+        limit = int(request.args.get("limit", 200))
+    except Exception:
+        limit = 200
+    limit = max(1, min(500, limit))
+
+    qry = _admin_items_query(request.args)
+
+    try:
+        rows, next_cursor = keyset_page(qry, Item.reported_at, Item.id, limit, request.args.get("cursor"))
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
+    ids = [int(r.id) for r in rows]
+
+    # Prefetch claims and matches in bulk
+    claims_by_item, matches_by_item = _ui_status_context(ids)
 
     out = []
     for it in rows:
@@ -245,10 +233,73 @@ def admin_list_items():
     if ui_status_filter:
         out = [x for x in out if (x.get("uiStatus") or "").lower() == ui_status_filter]
 
-    return jsonify({"items": out, "count": len(out)})
+    return jsonify({"items": out, "count": len(out), "nextCursor": next_cursor})
+
+
+@bp.get("/items/export")
+def admin_export_items():
+    """Stream every item matching the admin filters as CSV or NDJSON.
+
+    Accepts the filters of GET /admin/items (q, type, uiStatus, dateFrom,
+    dateTo, reporter) plus format=csv|ndjson; no limit or cursor.
+    """
+    fmt = export_format(request.args.get("format"))
+    if fmt is None:
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+    ui_status_filter = (request.args.get("uiStatus") or "").strip().lower()
+    qry = _admin_items_query(request.args).order_by(Item.reported_at.desc(), Item.id.desc())
+
+    def rows():
+        for chunk in stream_query(qry):
+            claims_by_item, matches_by_item = _ui_status_context([int(it.id) for it in chunk])
+            for it in chunk:
+                ui_st = _derive_ui_status(it, claims_by_item, matches_by_item)
+                if ui_status_filter and ui_st != ui_status_filter:
+                    continue
+                yield item_export_row(it, ui_st)
+
+    return export_response(rows(), ITEM_EXPORT_COLUMNS, fmt, "items")
+
+
+@bp.get("/audit-logs/export")
+def admin_export_audit_logs():
+    """Stream audit log entries as CSV or NDJSON, newest first.
+
+    Query params: action, entityType, entityId, actorUserId, dateFrom, dateTo
+    (YYYY-MM-DD, inclusive), format=csv|ndjson.
+    """
+    fmt = export_format(request.args.get("format"))
+    if fmt is None:
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+    qry = AuditLog.query.options(joinedload(AuditLog.actor))
+    if request.args.get("action"):
+        qry = qry.filter(AuditLog.action == request.args["action"])
+    if request.args.get("entityType"):
+        qry = qry.filter(AuditLog.entity_type == request.args["entityType"])
+    for param, col in (("entityId", AuditLog.entity_id), ("actorUserId", AuditLog.actor_user_id)):
+        if request.args.get(param):
+            try:
+                qry = qry.filter(col == int(request.args[param]))
+            except ValueError:
+                return jsonify({"error": f"Invalid {param}"}), 400
+    date_from = _parse_date(request.args.get("dateFrom"))
+    date_to = _parse_date(request.args.get("dateTo"))
+    if date_from:
+        qry = qry.filter(AuditLog.created_at >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        qry = qry.filter(AuditLog.created_at <= datetime.combine(date_to, datetime.max.time()))
+    qry = qry.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+
+    def rows():
+        for chunk in stream_query(qry):
+            for log in chunk:
+                yield audit_log_export_row(log)
+
+    return export_response(rows(), AUDIT_LOG_EXPORT_COLUMNS, fmt, "audit-logs")
 
 
 @bp.get("/stats/daily")
+@conditional_get(Item, Claim, extra=today_marker)
 def admin_stats_daily():
     """Daily snapshot stats for dashboard backward-compatibility.
 
@@ -290,6 +341,7 @@ def admin_stats_daily():
 
 
 @bp.get("/stats/overview")
+@conditional_get(Item)
 def admin_stats_overview():
     """Overall counts used by Admin Dashboard summary cards.
 
@@ -320,6 +372,7 @@ def admin_stats_overview():
 
 
 @bp.get("/stats/reports_series")
+@conditional_get(Item, extra=today_marker)
 def admin_stats_reports_series():
     """Time series of daily reports (lost and found) for the last N days.
 
@@ -404,6 +457,16 @@ def admin_update_item(item_id: int):
             it.status = "open"
         # claim_* statuses are driven by Claim records; ignore here
 
+    # Keep SQL matching term vectors in sync with edited text. A savepoint keeps
+    # a failed re-index from aborting the transaction the edit commits in.
+    if title is not None or description is not None:
+        try:
+            from ..search.sql_engine import index_item_terms
+            with db.session.begin_nested():
+                index_item_terms(it)
+        except Exception:
+            pass
+
     db.session.commit()
 
     # Recompute ui status and return
@@ -469,18 +532,8 @@ def admin_approve_item(item_id: int):
     it: Item | None = Item.query.get(item_id)
     if not it:
         return jsonify({"error": "Item not found"}), 404
-    # Update approved set in AppSetting
     try:
-        raw = AppSetting.get("items.approved.set", None)
-        current = []
-        if raw:
-            try:
-                current = list(json.loads(raw) or [])
-            except Exception:
-                current = []
-        ids = set(int(x) for x in current if isinstance(x, int) or (isinstance(x, str) and str(x).isdigit()))
-        ids.add(int(item_id))
-        AppSetting.set("items.approved.set", json.dumps(sorted(ids)))
+        set_approved(it, True)
         # Audit
         db.session.add(AuditLog(
             actor_user_id=getattr(getattr(g, "current_user", None), "id", None),
@@ -499,20 +552,11 @@ def admin_approve_item(item_id: int):
 
 @bp.post("/items/<int:item_id>/reject")
 def admin_reject_item(item_id: int):
-    """Reject a submission by deleting the item and removing it from the approved set if present."""
+    """Reject a submission by deleting the item (its approval flag goes with it)."""
     it: Item | None = Item.query.get(item_id)
     if not it:
         return jsonify({"error": "Item not found"}), 404
     try:
-        # Remove from approved set if present
-        raw = AppSetting.get("items.approved.set", None)
-        if raw:
-            try:
-                current = list(json.loads(raw) or [])
-            except Exception:
-                current = []
-            ids = [int(x) for x in current if str(x).isdigit() and int(x) != int(item_id)]
-            AppSetting.set("items.approved.set", json.dumps(sorted(set(ids))))
         # Audit
         db.session.add(AuditLog(
             actor_user_id=getattr(getattr(g, "current_user", None), "id", None),
@@ -549,6 +593,60 @@ def admin_delete_item(item_id: int):
     return jsonify({"deleted": True, "id": item_id})
 
 
+@bp.post("/items/import")
+def admin_import_items():
+    """Bulk-create items from a CSV or NDJSON upload.
+
+    Body: multipart field 'file', or the raw file with Content-Type text/csv /
+    application/x-ndjson.
+    Query/form params:
+      - format: csv | ndjson (default: from filename / content type)
+      - defaultType: lost | found for rows without a type (default found)
+      - reporterUserId: reporter for every row (default: the admin importing)
+      - approve: mark imported items approved
+      - match: run matching after import (default true)
+      - dryRun: validate only
+    Returns { imported, failed, itemIds, errors: [{row, error}], qrCodes, matches, dryRun }.
+    """
+    from ..items.bulk_import import ImportFormatError, detect_format, import_items, iter_rows
+
+    def flag(name: str, default: bool) -> bool:
+        raw = request.values.get(name)
+        return default if raw is None else raw.strip().lower() in ("1", "true", "yes", "on")
+
+    upload = request.files.get("file")
+    if upload is not None:
+        stream, filename, ctype = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, ctype = request.stream, None, request.mimetype
+
+    default_type = (request.values.get("defaultType") or "found").strip().lower()
+    if default_type not in ("lost", "found"):
+        return jsonify({"error": "Invalid defaultType"}), 400
+    reporter_id = getattr(g, "current_user_id", None)
+    if request.values.get("reporterUserId"):
+        try:
+            reporter_id = int(request.values["reporterUserId"])
+        except ValueError:
+            return jsonify({"error": "Invalid reporterUserId"}), 400
+
+    try:
+        fmt = detect_format(filename, ctype, request.values.get("format"))
+        report = import_items(
+            iter_rows(stream, fmt),
+            default_type=default_type,
+            reporter_id=reporter_id,
+            approve=flag("approve", False),
+            match=flag("match", True),
+            dry_run=flag("dryRun", False),
+        )
+    except ImportFormatError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    status = 200 if report.dry_run or not report.imported else 201
+    return jsonify(report.to_dict()), status
+
+
 @bp.patch("/claims/<int:claim_id>")
 def admin_update_claim(claim_id: int):
     """Admin endpoint to update claim status with real-time student notification.
@@ -655,8 +753,10 @@ def admin_get_settings():
     Sections:
       - social.facebook.autoPost
       - features.* (dynamic feature toggles)
+      - matching.engine ('python' | 'sql')
     """
     auto_post_fb = AppSetting.get_bool("social.facebook.auto_post", False)
+    matching_engine = AppSetting.get("features.matching.engine", "python") or "python"
 
     # Feature toggles (add new keys here as needed)
     feature_keys: dict[str, tuple[str, bool]] = {
@@ -679,10 +779,83 @@ def admin_get_settings():
                 }
             },
             "features": feats,
+            "matching": {
+                "engine": matching_engine,
+            },
         }
     })
 
 
+@bp.get("/settings/cache")
+def admin_settings_cache():
+    """Hit/miss counters for this worker's app_settings cache."""
+    return jsonify({"cache": AppSetting.cache_stats()})
+
+
+@bp.post("/settings/cache/invalidate")
+def admin_invalidate_settings_cache():
+    """Make every worker reload settings (e.g. after editing app_settings by hand)."""
+    try:
+        AppSetting.invalidate_cache()
+    except Exception:
+        db.session.rollback()
+        return jsonify({"error": "Failed to invalidate settings cache"}), 500
+    return jsonify({"invalidated": True, "cache": AppSetting.cache_stats()})
+
+
+@bp.get("/media/gc")
+def admin_media_gc():
+    """Counters from the last media sweep (objects scanned/deleted, bytes reclaimed)."""
+    from ..media.gc import last_run
+
+    return jsonify({"lastRun": last_run()})
+
+
+@bp.get("/media/layout")
+def admin_media_layout():
+    """Configured upload layout and how many uploads still sit in the flat one."""
+    from ..media.layout import sharded_layout
+    from ..media.manifest import flat_sources_remaining
+
+    return jsonify({"layout": "sharded" if sharded_layout() else "flat", "flatRemaining": flat_sources_remaining()})
+
+
+@bp.post("/media/layout/migrate")
+def admin_migrate_media_layout():
+    """Start moving flat-layout uploads into the sharded layout in the background."""
+    from ..media.manifest import dispatch_shard_existing
+
+    dispatch_shard_existing()
+    return jsonify({"started": True}), 202
+
+
+@bp.get("/media/resize-cache")
+def admin_resize_cache():
+    """Hit/miss/eviction counters for this worker's resized-image cache."""
+    from ..media.resize import get_resize_cache
+
+    return jsonify({"cache": get_resize_cache().info()})
+
+
+@bp.get("/media/read-cache")
+def admin_read_cache():
+    """Hit/miss/fetch counters for this worker's local copy of remote uploads."""
+    from ..media.read_cache import get_read_cache
+    from ..media.storage import get_storage
+
+    cache = get_read_cache() if get_storage().remote else None
+    return jsonify({"cache": cache.info() if cache else None})
+
+
+@bp.post("/media/resize-cache/sweep")
+def admin_sweep_resize_cache():
+    """Rescan the resized-image cache and evict down to the size limit now."""
+    from ..media.resize import get_resize_cache
+
+    cache = get_resize_cache()
+    return jsonify({"sweep": cache.sweep(), "cache": cache.info()})
+
+
 @bp.patch("/settings")
 def admin_update_settings():
     data = request.get_json(silent=True) or {}
@@ -707,6 +880,13 @@ def admin_update_settings():
             if resp_name in features:
                 AppSetting.set_bool(db_key, bool(features.get(resp_name)))
                 changed.setdefault("features", {})[resp_name] = bool(features.get(resp_name))
+    matching = data.get("matching") or {}
+    if isinstance(matching, dict) and "engine" in matching:
+        engine = str(matching.get("engine") or "").strip().lower()
+        if engine not in ("python", "sql"):
+            return jsonify({"error": "Invalid matching engine"}), 400
+        AppSetting.set("features.matching.engine", engine)
+        changed.setdefault("matching", {})["engine"] = engine
     if not changed:
         return jsonify({"error": "No recognized settings"}), 400
     return jsonify({"updated": changed})
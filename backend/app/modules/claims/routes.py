@@ -1,6 +1,11 @@
 
 from flask import Blueprint, jsonify, request, g
+from sqlalchemy.orm import selectinload
 from ...extensions import db
+from ...pagination import InvalidCursor, keyset_page
+from ...export import export_format, export_response, stream_query
+from ...query_budget import query_budget
+from ...serializers import CLAIM_EXPORT_COLUMNS, CLAIM_FIELDS, USER_CONTACT, claim_export_row, item_summary
 from ...models.item import Item
 from ...models.user import User
 from ...models.claim import Claim
@@ -107,24 +112,23 @@ def create_claim():
     )
 
 
-@bp.get("")
-def list_claims():
-    """List claims with optional filters.
+def _claims_query(args):
+    """Claim query for the list filters (claimantId, itemId, status), with the privacy rule applied.
 
-    Query params:
-      - claimantId: int
-      - itemId: int
-      - status: str (accepts 'pending' alias for 'requested')
-      - limit: int (default 200)
-    Returns minimal fields for backward compatibility plus nested item/user details.
+    Returns (query, returned_only); returned_only is the virtual 'returned'
+    status, which callers check against the loaded item. Raises ValueError
+    for malformed ids.
     """
-    claimant_id = request.args.get("claimantId")
-    item_id = request.args.get("itemId")
-    status = request.args.get("status")
+    claimant_id = args.get("claimantId")
+    item_id = args.get("itemId")
+    status = args.get("status")
     returned_only = False
-    limit = request.args.get("limit")
 
-    q = Claim.query
+    # claim_to_dict reads c.item, c.item.reporter and c.claimant for every row
+    q = Claim.query.options(
+        selectinload(Claim.item).joinedload(Item.reporter),
+        selectinload(Claim.claimant),
+    )
     # Privacy: students may only see their own claims regardless of filters supplied.
     current_uid = _current_user_id()
     if current_uid and not _is_admin():
@@ -133,12 +137,12 @@ def list_claims():
         try:
             q = q.filter(Claim.claimant_user_id == int(claimant_id))
         except (TypeError, ValueError):
-            return _json_error("Invalid claimantId", 400)
+            raise ValueError("Invalid claimantId")
     if item_id:
         try:
             q = q.filter(Claim.item_id == int(item_id))
         except (TypeError, ValueError):
-            return _json_error("Invalid itemId", 400)
+            raise ValueError("Invalid itemId")
     if status:
         norm = status.lower()
         if norm == "pending":
@@ -148,17 +152,38 @@ def list_claims():
             returned_only = True
         else:
             q = q.filter(Claim.status == norm)
+    return q, returned_only
+
+
+@bp.get("")
+@query_budget(10)
+def list_claims():
+    """List claims with optional filters.
+
+    Query params:
+      - claimantId: int
+      - itemId: int
+      - status: str (accepts 'pending' alias for 'requested')
+      - limit: int (default 200, max 500)
+      - cursor: nextCursor from the previous page
+    Returns minimal fields for backward compatibility plus nested item/user details.
+    """
+    limit = request.args.get("limit")
+    try:
+        q, returned_only = _claims_query(request.args)
+    except ValueError as e:
+        return _json_error(str(e), 400)
 
     try:
         lim = int(limit) if limit is not None else 200
     except (TypeError, ValueError):
         return _json_error("Invalid limit", 400)
+    lim = max(1, min(500, lim))
 
-    claims = (
-        q.order_by(Claim.created_at.desc())
-        .limit(lim)
-        .all()
-    )
+    try:
+        claims, next_cursor = keyset_page(q, Claim.created_at, Claim.id, lim, request.args.get("cursor"))
+    except InvalidCursor:
+        return _json_error("Invalid cursor", 400)
     if returned_only:
         claims = [c for c in claims if c.item and getattr(c.item, 'status', None) == 'closed']
 
@@ -281,15 +306,9 @@ def list_claims():
         if returned_flag:
             status_label = 'Returned'
         return {
-            "id": c.id,
-            "itemId": c.item_id,
-            "claimantId": c.claimant_user_id,
-            "status": c.status,
+            **CLAIM_FIELDS(c),
             "statusLabel": status_label,
             "returned": returned_flag,
-            "createdAt": c.created_at.isoformat() if c.created_at else None,
-            "approvedAt": c.approved_at.isoformat() if c.approved_at else None,
-            "notes": c.notes,
             "adminNote": admin_note,
             **({
                 "returnClaimerUserId": rc.get("returnClaimerUserId"),
@@ -299,34 +318,39 @@ def list_claims():
             # enrichment
             "matchScore": best_score,
             # enrich
-            "item": {
-                "id": item.id if item else None,
-                "type": getattr(item, "type", None),
-                "title": getattr(item, "title", None),
-                "location": getattr(item, "location", None),
-                "status": getattr(item, "status", None),
-                "photoUrl": getattr(item, "photo_url", None),
-                **({
-                    "reporter": {
-                        "id": getattr(reporter, 'id', None),
-                        "email": getattr(reporter, 'email', None),
-                        "firstName": getattr(reporter, 'first_name', None),
-                        "lastName": getattr(reporter, 'last_name', None),
-                        "studentId": getattr(reporter, 'student_id', None),
-                    }
-                } if reporter else {}),
-            } if item else None,
-            "user": {
-                "id": user.id if user else None,
-                "email": getattr(user, "email", None),
-                "firstName": getattr(user, "first_name", None),
-                "lastName": getattr(user, "last_name", None),
-                "studentId": getattr(user, "student_id", None),
-                "stats": stats,
-            } if user else None,
+            "item": item_summary(item, reporter) if item else None,
+            "user": {**USER_CONTACT(user), "stats": stats} if user else None,
         }
 
-    return jsonify({"claims": [claim_to_dict(c) for c in claims]})
+    return jsonify({"claims": [claim_to_dict(c) for c in claims], "nextCursor": next_cursor})
+
+
+@bp.get("/export")
+def export_claims():
+    """Stream claims as CSV or NDJSON.
+
+    Accepts the filters of GET /claims (claimantId, itemId, status) plus
+    format=csv|ndjson. Students export only their own claims.
+    """
+    if not _current_user_id():
+        return _json_error("Authentication required", 401)
+    fmt = export_format(request.args.get("format"))
+    if fmt is None:
+        return _json_error("format must be csv or ndjson", 400)
+    try:
+        q, returned_only = _claims_query(request.args)
+    except ValueError as e:
+        return _json_error(str(e), 400)
+    q = q.order_by(Claim.created_at.desc(), Claim.id.desc())
+
+    def rows():
+        for chunk in stream_query(q):
+            for c in chunk:
+                if returned_only and not (c.item and getattr(c.item, "status", None) == "closed"):
+                    continue
+                yield claim_export_row(c)
+
+    return export_response(rows(), CLAIM_EXPORT_COLUMNS, fmt, "claims")
 
 
 @bp.patch("/<int:claim_id>")
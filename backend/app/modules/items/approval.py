@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import exists, text
+
+from ...extensions import db
+from ...models.app_setting import AppSetting
+from ...models.item import Item
+
+# Legacy storage: one JSON array of approved item ids in app_settings
+LEGACY_APPROVED_SET_KEY = "items.approved.set"
+
+
+def ensure_approval_column() -> None:
+    """Add items.approved/approved_at and the partial index on databases created before them."""
+    db.session.execute(text("ALTER TABLE items ADD COLUMN IF NOT EXISTS approved BOOLEAN NOT NULL DEFAULT false"))
+    db.session.execute(text("ALTER TABLE items ADD COLUMN IF NOT EXISTS approved_at TIMESTAMPTZ NULL"))
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_items_approved_reported ON items (reported_at) WHERE approved IS true"
+    ))
+    db.session.commit()
+
+
+def migrate_legacy_approved_set(batch_size: int = 1000) -> int:
+    """Copy ids from the legacy items.approved.set blob into items.approved.
+
+    Idempotent; the blob is cleared once every batch has been applied.
+    Returns the number of items marked approved.
+    """
+    raw = AppSetting.get(LEGACY_APPROVED_SET_KEY, None)
+    if not raw:
+        return 0
+    try:
+        ids = sorted({int(x) for x in (json.loads(raw) or []) if str(x).isdigit()})
+    except Exception:
+        ids = []
+    now = datetime.now(timezone.utc)
+    updated = 0
+    for i in range(0, len(ids), max(1, batch_size)):
+        chunk = ids[i:i + batch_size]
+        result = db.session.execute(
+            db.update(Item)
+            .where(Item.id.in_(chunk), Item.approved.is_(False))
+            .values(approved=True, approved_at=now)
+        )
+        updated += int(result.rowcount or 0)
+        db.session.commit()
+    # Keep the key but empty it, so a re-run is a no-op
+    AppSetting.set(LEGACY_APPROVED_SET_KEY, None)
+    return updated
+
+
+def approval_gate_active() -> bool:
+    """True once at least one item has been approved.
+
+    Preserves the legacy behaviour where public listings are unfiltered until
+    the first approval; a single index probe instead of parsing a blob.
+    """
+    return bool(db.session.query(exists().where(Item.approved.is_(True))).scalar())
+
+
+def set_approved(item: Item, approved: bool = True) -> Item:
+    """Mark an item (un)approved. Caller commits."""
+    item.approved = bool(approved)
+    item.approved_at = datetime.now(timezone.utc) if approved else None
+    return item
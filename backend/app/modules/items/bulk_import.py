@@ -0,0 +1,417 @@
+"""Bulk item import from CSV or NDJSON (term back-loads from the security office).
+
+``POST /items`` commits one row at a time and leaves matching and social
+posting to outbox events, which match each item on its own. This module
+streams the upload instead:
+
+- the upload's encoding is checked before the first insert. Rows are then
+  parsed lazily and validated, so bad rows are reported by line number and
+  the rest still import
+- valid rows are inserted in batches with one multi-row ``INSERT ... RETURNING``
+  per batch, and term vectors go in the same transaction
+- QR codes for found items are created with one ``INSERT ... ON CONFLICT DO
+  NOTHING`` per batch
+- matching runs once after the last batch. Candidates are loaded once per
+  opposite type (python engine). Match upserts and owner notifications share
+  one commit
+
+Social auto-posting is not done for imports.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import IO, Iterable, Iterator
+
+from sqlalchemy import insert
+
+from ...extensions import db
+from ...models.item import Item
+from ...models.match import Match
+from ..media.manifest import external_manifest
+from ..notifications.summary import MatchSummaries
+from ..qrcodes.codes import create_item_codes
+
+FORMATS = ("csv", "ndjson")
+MATCH_THRESHOLD = 0.5
+MATCH_LIMIT = 200
+# Per-type candidate pool for batch matching (the per-item query caps at 400)
+CANDIDATE_POOL = 5000
+
+# Accepted column names (lower-cased, without spaces/underscores) -> field
+_ALIASES = {
+    "type": "type",
+    "kind": "type",
+    "title": "title",
+    "name": "title",
+    "item": "title",
+    "description": "description",
+    "details": "description",
+    "location": "location",
+    "place": "location",
+    "occurredon": "occurred_on",
+    "date": "occurred_on",
+    "datefound": "occurred_on",
+    "datelost": "occurred_on",
+    "photourl": "photo_url",
+    "photo": "photo_url",
+    "photothumburl": "photo_thumb_url",
+}
+# Non-seekable uploads are spooled to disk past this size while their encoding is checked
+_SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
+_CHUNK_BYTES = 64 * 1024
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%d-%m-%Y", "%d/%m/%Y", "%m/%d/%Y")
+
+
+class ImportFormatError(ValueError):
+    """The upload cannot be parsed at all (unknown format, not UTF-8, no header)."""
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    failed: int = 0
+    item_ids: list[int] = field(default_factory=list)
+    errors: list[dict] = field(default_factory=list)
+    qr_codes: int = 0
+    matches: int = 0
+    dry_run: bool = False
+
+    def error(self, row: int, message: str) -> None:
+        self.failed += 1
+        self.errors.append({"row": row, "error": message})
+
+    def to_dict(self) -> dict:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "itemIds": self.item_ids,
+            "errors": self.errors,
+            "qrCodes": self.qr_codes,
+            "matches": self.matches,
+            "dryRun": self.dry_run,
+        }
+
+
+def detect_format(filename: str | None, content_type: str | None, requested: str | None = None) -> str:
+    fmt = (requested or "").strip().lower()
+    if fmt in ("jsonl", "json"):
+        fmt = "ndjson"
+    if fmt in FORMATS:
+        return fmt
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in ctype or "jsonl" in ctype:
+        return "ndjson"
+    if name.endswith(".csv") or "csv" in ctype:
+        return "csv"
+    raise ImportFormatError("Unknown format; use .csv or .ndjson, or pass format=csv|ndjson")
+
+
+def _checked_utf8(stream: IO[bytes]) -> IO[bytes]:
+    """Check the whole upload decodes as UTF-8 before any row is used; returns it rewound.
+
+    Rows are committed batch by batch, so a bad byte found halfway through
+    would otherwise fail the import after earlier batches were already
+    saved. Streams that cannot seek (a raw request body) are spooled to a
+    temp file on the way, so memory use stays bounded.
+    """
+    out: IO[bytes] = stream if stream.seekable() else tempfile.SpooledTemporaryFile(max_size=_SPOOL_MEMORY_BYTES)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    line = 1
+    try:
+        while chunk := stream.read(_CHUNK_BYTES):
+            decoder.decode(chunk)
+            line += chunk.count(b"\n")
+            if out is not stream:
+                out.write(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        line += e.object[: e.start].count(b"\n")
+        raise ImportFormatError(f"File is not UTF-8 encoded (line {line}); nothing was imported") from e
+    out.seek(0)
+    return out
+
+
+def _lines(stream: IO[bytes]) -> Iterator[str]:
+    """Decode a byte stream line by line (UTF-8, optional BOM) without reading it whole."""
+    yield from codecs.iterdecode(_checked_utf8(stream), "utf-8-sig")
+
+
+def _normalize_keys(raw: dict) -> dict:
+    out: dict = {}
+    for key, value in raw.items():
+        if key is None:
+            continue
+        norm = _ALIASES.get(str(key).strip().lower().replace(" ", "").replace("_", ""))
+        if norm and norm not in out:
+            out[norm] = value
+    return out
+
+
+def iter_rows(stream: IO[bytes], fmt: str) -> Iterator[tuple[int, dict | str]]:
+    """Yield (row number, fields) or (row number, parse error) from an upload.
+
+    Row numbers are source line numbers, so they match the spreadsheet
+    (the CSV header is line 1).
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(_lines(stream))
+        if not reader.fieldnames:
+            raise ImportFormatError("CSV has no header row")
+        for raw in reader:
+            if not any((v or "").strip() for v in raw.values() if isinstance(v, str)):
+                continue  # blank spreadsheet row
+            yield reader.line_num, _normalize_keys(raw)
+    else:
+        for n, line in enumerate(_lines(stream), start=1):
+            if not line.strip():
+                continue
+            try:
+                raw = json.loads(line)
+            except ValueError as e:
+                yield n, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(raw, dict):
+                yield n, "Expected a JSON object"
+                continue
+            yield n, _normalize_keys(raw)
+
+
+def _parse_date(value) -> date | None:
+    if value in (None, ""):
+        return None
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date {text!r}")
+
+
+def _text(value, limit: int | None, name: str) -> str | None:
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    if limit and len(text) > limit:
+        raise ValueError(f"{name} is longer than {limit} characters")
+    return text
+
+
+def validate_row(fields: dict, default_type: str, reporter_id: int | None, approve: bool) -> dict:
+    """Turn one parsed row into Item insert values; raises ValueError with a user-facing message."""
+    item_type = (_text(fields.get("type"), None, "type") or default_type).lower()
+    if item_type not in ("lost", "found"):
+        raise ValueError("type must be 'lost' or 'found'")
+    title = _text(fields.get("title"), Item.title.type.length, "title")
+    if not title:
+        raise ValueError("title is required")
+    photo_url = _text(fields.get("photo_url"), Item.photo_url.type.length, "photoUrl")
+    values = {
+        "type": item_type,
+        "title": title,
+        "description": _text(fields.get("description"), None, "description"),
+        "location": _text(fields.get("location"), Item.location.type.length, "location"),
+        "occurred_on": _parse_date(fields.get("occurred_on")),
+        "photo_url": photo_url,
+        "photo_renditions": external_manifest(photo_url, _text(fields.get("photo_thumb_url"), None, "photoThumbUrl")) if photo_url else None,
+        "reporter_user_id": reporter_id,
+    }
+    if approve:
+        values["approved"] = True
+        values["approved_at"] = datetime.now(timezone.utc)
+    return values
+
+
+def _index_terms(items: list[Item]) -> None:
+    try:
+        from ..search.sql_engine import index_item_terms
+    except Exception:  # pragma: no cover
+        return
+    for it in items:
+        index_item_terms(it, fresh=True)
+
+
+def _insert_batch(rows: list[tuple[int, dict]], report: ImportReport, qr: bool) -> None:
+    """Insert one batch in a single statement; on failure retry row by row to find the culprit."""
+    stmt = insert(Item).returning(Item, sort_by_parameter_order=True)
+    try:
+        with db.session.begin_nested():
+            items = list(db.session.scalars(stmt, [values for _, values in rows]))
+            _index_terms(items)
+    except Exception:
+        items = []
+        for n, values in rows:
+            try:
+                with db.session.begin_nested():
+                    it = db.session.scalars(insert(Item).returning(Item), [values]).one()
+                    _index_terms([it])
+                items.append(it)
+            except Exception as e:
+                report.error(n, f"Database rejected row: {getattr(e, 'orig', e)}")
+    ids = [int(it.id) for it in items]
+    if qr:
+        report.qr_codes += len(create_item_codes([int(it.id) for it in items if it.type == "found"]))
+    db.session.commit()
+    report.imported += len(items)
+    report.item_ids.extend(ids)
+
+
+def import_items(
+    rows: Iterable[tuple[int, dict | str]],
+    default_type: str = "found",
+    reporter_id: int | None = None,
+    approve: bool = False,
+    batch_size: int = 500,
+    match: bool = True,
+    qr: bool = True,
+    dry_run: bool = False,
+) -> ImportReport:
+    """Validate and insert parsed rows. Matching runs once after all batches."""
+    report = ImportReport(dry_run=dry_run)
+    batch: list[tuple[int, dict]] = []
+    batch_size = max(1, int(batch_size))
+    for n, fields in rows:
+        if isinstance(fields, str):
+            report.error(n, fields)
+            continue
+        try:
+            values = validate_row(fields, default_type, reporter_id, approve)
+        except ValueError as e:
+            report.error(n, str(e))
+            continue
+        if dry_run:
+            report.imported += 1
+            continue
+        batch.append((n, values))
+        if len(batch) >= batch_size:
+            _insert_batch(batch, report, qr)
+            batch = []
+    if batch:
+        _insert_batch(batch, report, qr)
+    if match and report.item_ids:
+        try:
+            report.matches = match_batch(_load_items(report.item_ids))
+        except Exception:
+            db.session.rollback()
+    return report
+
+
+def _load_items(ids: list[int]) -> list[Item]:
+    # Rows returned by the batch inserts were expired by their commits; reload in chunks
+    items: list[Item] = []
+    for i in range(0, len(ids), 1000):
+        items.extend(Item.query.filter(Item.id.in_(ids[i:i + 1000])).all())
+    return items
+
+
+def _candidates_for(it: Item, pool: list[Item]) -> list[Item]:
+    """In-memory equivalent of search._candidate_query for one base item."""
+    loc = (it.location or "").lower()
+    around = it.occurred_on or (it.reported_at.date() if it.reported_at else None)
+    out = []
+    for cand in pool:
+        if cand.id == it.id:
+            continue
+        if loc and loc not in (cand.location or "").lower():
+            continue
+        if around:
+            cd = cand.occurred_on or (cand.reported_at.date() if cand.reported_at else None)
+            if cd is None or abs((cd - around).days) > 30:
+                continue
+        out.append(cand)
+        if len(out) >= 400:
+            break
+    return out
+
+
+def match_batch(items: list[Item], threshold: float = MATCH_THRESHOLD, limit: int = MATCH_LIMIT) -> int:
+    """Score every imported item against the live opposite set and upsert matches once.
+
+    Owners of matching lost items get the usual coalesced summary
+    notification. The importer (reporter of every row) is not notified per item.
+    Returns the number of match pairs at/above threshold.
+    """
+    from ..search.routes import _compose_text, _date_from_item, _idf, _matching_engine, _score_pair, _tokenize
+
+    engine = _matching_engine()
+    pairs: dict[tuple[int, int], tuple[float, Item, Item]] = {}
+
+    def record(it: Item, cand: Item, score01: float) -> None:
+        if score01 < threshold:
+            return
+        lost, found = (it, cand) if it.type == "lost" else (cand, it)
+        key = (int(lost.id), int(found.id))
+        pct = round(float(score01) * 100.0, 2)
+        if key not in pairs or pairs[key][0] < pct:
+            pairs[key] = (pct, lost, found)
+
+    if engine == "sql":
+        from ..search.sql_engine import load_scored_items, top_matches_sql
+
+        for it in items:
+            opposite = "found" if it.type == "lost" else "lost"
+            for cand, s in load_scored_items(
+                top_matches_sql(_compose_text(it), opposite, it.location, _date_from_item(it), limit=limit, min_score=threshold)
+            ):
+                record(it, cand, s)
+    else:
+        dates = [d for d in (_date_from_item(it) for it in items) if d]
+        pools: dict[str, list[Item]] = {}
+        for opposite in {("found" if it.type == "lost" else "lost") for it in items}:
+            q = Item.query.filter(Item.type == opposite, Item.status.in_(["open", "matched"]))
+            if dates and len(dates) == len(items):
+                start, end = min(dates) - timedelta(days=30), max(dates) + timedelta(days=30)
+                q = q.filter(
+                    db.or_(
+                        Item.occurred_on.between(start, end),
+                        db.and_(Item.occurred_on.is_(None), db.cast(Item.reported_at, db.Date).between(start, end)),
+                    )
+                )
+            pools[opposite] = q.order_by(Item.reported_at.desc()).limit(CANDIDATE_POOL).all()
+        for it in items:
+            cands = _candidates_for(it, pools.get("found" if it.type == "lost" else "lost", []))[:limit]
+            if not cands:
+                continue
+            base_text = _compose_text(it)
+            idf = _idf([_tokenize(base_text)] + [_tokenize(_compose_text(c)) for c in cands])
+            base_date = _date_from_item(it)
+            for cand in cands:
+                record(it, cand, _score_pair(base_text, _compose_text(cand), it.location, cand.location, base_date, _date_from_item(cand), idf))
+
+    if not pairs:
+        return 0
+    keys = list(pairs.keys())
+    existing: dict[tuple[int, int], Match] = {}
+    for i in range(0, len(keys), 1000):
+        for m in Match.query.filter(db.tuple_(Match.lost_item_id, Match.found_item_id).in_(keys[i:i + 1000])).all():
+            existing[(int(m.lost_item_id), int(m.found_item_id))] = m
+
+    summaries = MatchSummaries()
+    imported_ids = {int(it.id) for it in items}
+    for key, (pct, lost, found) in pairs.items():
+        m = existing.get(key)
+        if m is None:
+            db.session.add(Match(lost_item_id=key[0], found_item_id=key[1], score=pct))
+        elif float(m.score or 0) < pct:
+            m.score = pct
+        # Tell owners of pre-existing lost reports about newly imported found items
+        if int(found.id) in imported_ids and int(lost.id) not in imported_ids and lost.reporter_user_id:
+            summaries.add(int(lost.reporter_user_id), lost, found, pct, owner_alert=True)
+    try:
+        with db.session.begin_nested():
+            summaries.flush()
+    except Exception:
+        summaries = MatchSummaries()
+    db.session.commit()
+    summaries.publish()
+    return len(pairs)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import insert, text
+
+from ...extensions import db
+from ...models.item import Item
+from ...models.notification import Notification
+
+try:
+    from ..notifications.bus import publish as publish_notif
+except Exception:  # pragma: no cover
+    def publish_notif(user_id: int, event: dict):  # type: ignore
+        return None
+
+# Claims in these states keep an item alive regardless of age
+ACTIVE_CLAIM_STATUSES = ("requested", "verified", "approved")
+
+_EXPIRE_BATCH_SQL = text(
+    """
+    UPDATE items SET status = 'expired', updated_at = now()
+    WHERE id IN (
+        SELECT i.id FROM items i
+        WHERE i.status IN ('open', 'matched')
+          AND (
+            (i.expires_at IS NULL AND i.reported_at < :cutoff)
+            OR i.expires_at < now()
+          )
+          AND NOT EXISTS (
+            SELECT 1 FROM claims c
+            WHERE c.item_id = i.id AND CAST(c.status AS text) IN :active_claims
+          )
+        ORDER BY i.reported_at ASC
+        LIMIT :batch
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, reporter_user_id, title, type
+    """
+).bindparams(db.bindparam("active_claims", expanding=True))
+
+
+def ensure_expires_at_column() -> None:
+    """Add items.expires_at on databases created before it existed."""
+    db.session.execute(text("ALTER TABLE items ADD COLUMN IF NOT EXISTS expires_at TIMESTAMPTZ NULL"))
+    db.session.commit()
+
+
+def ensure_expired_status() -> None:
+    """Add 'expired' to item_status_enum and items.expires_at on databases created before them.
+
+    ALTER TYPE ... ADD VALUE cannot run inside a transaction block on older
+    Postgres versions, so this uses an autocommit connection.
+    """
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ALTER TYPE item_status_enum ADD VALUE IF NOT EXISTS 'expired'"))
+    ensure_expires_at_column()
+
+
+def expire_stale_items(max_age_days: int | None = None, batch_size: int | None = None, dry_run: bool = False) -> dict:
+    """Move open/matched items past their age limit into the 'expired' state.
+
+    Items with an active claim are skipped. Each reporter gets a single
+    notification listing all of their items expired in this run.
+    Returns { expired, notified, dryRun }.
+    """
+    days = int(max_age_days if max_age_days is not None else current_app.config.get("ITEM_EXPIRY_DAYS", 90))
+    batch = int(batch_size if batch_size is not None else current_app.config.get("ITEM_EXPIRY_BATCH_SIZE", 500))
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max(1, days))
+
+    if dry_run:
+        from ...models.claim import Claim
+
+        active = db.session.query(Claim.id).filter(
+            Claim.item_id == Item.id, Claim.status.in_(ACTIVE_CLAIM_STATUSES)
+        ).exists()
+        count = (
+            db.session.query(db.func.count(Item.id))
+            .filter(
+                Item.status.in_(["open", "matched"]),
+                db.or_(
+                    db.and_(Item.expires_at.is_(None), Item.reported_at < cutoff),
+                    Item.expires_at < db.func.now(),
+                ),
+                ~active,
+            )
+            .scalar()
+        )
+        return {"expired": int(count or 0), "notified": 0, "dryRun": True}
+
+    expired_total = 0
+    notified_total = 0
+    while True:
+        rows = db.session.execute(
+            _EXPIRE_BATCH_SQL,
+            {"cutoff": cutoff, "active_claims": list(ACTIVE_CLAIM_STATUSES), "batch": batch},
+        ).all()
+        if not rows:
+            db.session.commit()
+            break
+
+        # One notification per reporter for the whole batch
+        by_reporter: dict[int, list[dict]] = {}
+        for item_id, reporter_id, title, item_type in rows:
+            if reporter_id:
+                by_reporter.setdefault(int(reporter_id), []).append(
+                    {"id": int(item_id), "title": title, "type": item_type}
+                )
+        notif_rows = []
+        for uid, items in by_reporter.items():
+            if len(items) == 1:
+                body = f"Your report ‘{items[0]['title']}’ expired after {days} days without activity. You can reactivate it from My Items."
+            else:
+                body = f"{len(items)} of your reports expired after {days} days without activity. You can reactivate them from My Items."
+            notif_rows.append({
+                "user_id": uid,
+                "channel": "inapp",
+                "title": "Report expired" if len(items) == 1 else "Reports expired",
+                "body": body,
+                "payload": {"kind": "expired", "itemIds": [x["id"] for x in items], "items": items[:20]},
+            })
+        published: list = []
+        if notif_rows:
+            published = db.session.execute(
+                insert(Notification).returning(
+                    Notification.id, Notification.user_id, Notification.title,
+                    Notification.body, Notification.payload, Notification.created_at,
+                ),
+                notif_rows,
+            ).all()
+        db.session.commit()
+
+        for n in published:
+            try:
+                publish_notif(int(n.user_id), {
+                    "type": "notification",
+                    "notification": {
+                        "id": n.id,
+                        "title": n.title,
+                        "message": n.body,
+                        "createdAt": n.created_at.isoformat() if n.created_at else None,
+                        "read": False,
+                        "payload": n.payload,
+                    },
+                })
+            except Exception:
+                pass
+
+        expired_total += len(rows)
+        notified_total += len(notif_rows)
+        if len(rows) < batch:
+            break
+
+    return {"expired": expired_total, "notified": notified_total, "dryRun": False}
+
+
+def reactivate_item(item: Item, days: int | None = None) -> Item:
+    """Return an expired item to the live set with a fresh expiry window. Caller commits."""
+    window = int(days if days is not None else current_app.config.get("ITEM_EXPIRY_DAYS", 90))
+    item.status = "open"
+    item.expires_at = datetime.now(timezone.utc) + timedelta(days=max(1, window))
+    return item
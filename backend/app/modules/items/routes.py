@@ -1,25 +1,33 @@
 from datetime import datetime, date
 import os
-import secrets
-from flask import Blueprint, request, jsonify, current_app, url_for, g
+from flask import Blueprint, request, jsonify, current_app, g, url_for
+from sqlalchemy.orm import joinedload
 
-from io import BytesIO
-from PIL import Image
-import boto3
-from botocore.client import Config as BotoConfig
 from ...extensions import db
+from ...outbox import kick as outbox_kick
+from ...pagination import InvalidCursor, keyset_page
+from ...conditional import conditional_get
+from ...query_budget import query_budget
+from ...serializers import item_dict
 from ...models.item import Item
 from ...models.match import Match
-from ...models.notification import Notification
-from ...models.social_post import SocialPost
 from ...models.app_setting import AppSetting
-import json
-from ...models.qr_code import QRCode
+from ...models.user import User
 try:
     from ..notifications.bus import publish as publish_notif
 except Exception:  # pragma: no cover
     def publish_notif(user_id: int, event: dict):  # type: ignore
         return None
+from ..notifications.summary import MatchSummaries
+from .approval import approval_gate_active
+from .side_effects import enqueue_item_created, enqueue_item_reactivated
+from ..qrcodes.codes import create_item_codes
+from ..media.manifest import external_manifest
+from ..media.renditions import dispatch_renditions, pending_manifest
+from ..media.blobs import store_blob
+from ..media.direct import DirectUploadError, create_upload, receive_upload, staged_exists
+from ..media.storage import get_storage
+from ..media import resumable
 
 # Reuse scoring helpers from smart search module
 try:
@@ -28,11 +36,15 @@ try:
         _compose_text,
         _date_from_item,
         _idf,
+        _matching_engine,
         _score_pair,
         _tokenize,
     )
+    from ..search.sql_engine import index_item_terms, load_scored_items, top_matches_sql
 except Exception:  # Fallback if import location changes
     _candidate_query = _compose_text = _date_from_item = _idf = _score_pair = _tokenize = None  # type: ignore
+    _matching_engine = lambda requested=None: "python"  # type: ignore  # noqa: E731
+    index_item_terms = load_scored_items = top_matches_sql = None  # type: ignore
 
 bp = Blueprint("items", __name__, url_prefix="/items")
 
@@ -49,65 +61,15 @@ def _parse_date(value: str | None) -> date | None:
 
 
 def _item_to_dict(it: Item) -> dict:
-    thumb_url = getattr(it, "photo_thumb_url", None)
-    if not thumb_url and it.photo_url:
-        try:
-            if "/uploads/" in it.photo_url:
-                thumb_url = it.photo_url.replace("/uploads/", "/uploads/thumbs/", 1)
-        except Exception:
-            thumb_url = None
-
-    # If thumb is a local uploads path but file is missing, fall back to original photo
-    try:
-        if thumb_url and isinstance(thumb_url, str) and thumb_url.startswith("/uploads/"):
-            base = current_app.config.get("UPLOAD_FOLDER")
-            rel = thumb_url[len("/uploads/"):]
-            candidate = os.path.join(base, rel) if base else None
-            exists = os.path.isfile(candidate) if candidate else False
-            if not exists:
-                # try legacy base (backend/uploads)
-                legacy_base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "uploads"))
-                legacy_path = os.path.join(legacy_base, rel)
-                exists = os.path.isfile(legacy_path)
-            if not exists:
-                # thumb file missing; don't advertise thumb URL so clients use main photo
-                thumb_url = None
-    except Exception:
-        pass
-    payload = {
-        "id": it.id,
-        "type": it.type,
-        "title": it.title,
-        "description": it.description,
-        "location": it.location,
-        "occurredOn": it.occurred_on.isoformat() if it.occurred_on else None,
-        "reportedAt": it.reported_at.isoformat() if it.reported_at else None,
-        "status": it.status,
-    "photoUrl": it.photo_url,
-    "photoThumbUrl": thumb_url,
-        "reporterUserId": it.reporter_user_id,
-    }
-    # Enrich with reporter (finder) details when relationship is available. This allows
-    # the frontend to show the name of the user who reported a FOUND (unclaimed) item.
-    try:
-        if getattr(it, "reporter", None):
-            r = it.reporter  # type: ignore[attr-defined]
-            payload["reporter"] = {
-                "id": getattr(r, "id", None),
-                "email": getattr(r, "email", None),
-                "firstName": getattr(r, "first_name", None),
-                "lastName": getattr(r, "last_name", None),
-                "studentId": getattr(r, "student_id", None),
-            }
-    except Exception:  # pragma: no cover - enrichment is best-effort
-        pass
-    return payload
+    # Includes the reporter (finder) so the frontend can show who reported a FOUND item
+    return item_dict(it, reporter=True)
 
 
 def _auto_match_for_item(item: Item, threshold: float = 0.5, limit: int = 200) -> list[dict]:
     """Compute smart matches for a single item and persist high-confidence pairs.
 
     Returns a list of { lostItemId, foundItemId, score } for suggestions (score as percentage 0-100).
+    A failed commit is rolled back and re-raised, so the outbox retries the event.
     """
     # Ensure helpers are available
     if not all([_candidate_query, _compose_text, _date_from_item, _idf, _score_pair, _tokenize]):
@@ -118,159 +80,107 @@ def _auto_match_for_item(item: Item, threshold: float = 0.5, limit: int = 200) -
     base_loc = item.location
     base_date = _date_from_item(item)
 
-    candidates = list(_candidate_query(opposite_type=opposite, location=base_loc, around=base_date))[: max(0, limit)]
-    # Build shared IDF across base + candidates for consistent scoring
-    docs = [_tokenize(base_text)] + [_tokenize(_compose_text(it)) for it in candidates]
-    idf = _idf(docs)
+    if _matching_engine() == "sql" and top_matches_sql is not None:
+        # Scored in Postgres; only pairs at/above threshold come back
+        scored = load_scored_items(
+            top_matches_sql(base_text, opposite, base_loc, base_date, limit=max(1, limit), min_score=threshold)
+        )
+    else:
+        candidates = list(_candidate_query(opposite_type=opposite, location=base_loc, around=base_date))[: max(0, limit)]
+        # Build shared IDF across base + candidates for consistent scoring
+        docs = [_tokenize(base_text)] + [_tokenize(_compose_text(it)) for it in candidates]
+        idf = _idf(docs)
+        scored = [
+            (cand, _score_pair(base_text, _compose_text(cand), base_loc, cand.location, base_date, _date_from_item(cand), idf))
+            for cand in candidates
+        ]
+
+    hits = [(cand, score01) for cand, score01 in scored if score01 >= threshold]
+    if not hits:
+        return []
+
+    # Load existing pairs in one query instead of one lookup per candidate
+    pairs: list[tuple[Item, int, int, float]] = []
+    for cand, score01 in hits:
+        # Store score in percentage with 2 decimal precision
+        score_pct = round(float(score01) * 100.0, 2)
+        # Determine correct pairing orientation
+        lost_id = item.id if item.type == "lost" else cand.id
+        found_id = cand.id if item.type == "lost" else item.id
+        pairs.append((cand, lost_id, found_id, score_pct))
+    existing_by_pair = {
+        (int(m.lost_item_id), int(m.found_item_id)): m
+        for m in Match.query.filter(
+            db.tuple_(Match.lost_item_id, Match.found_item_id).in_([(l, f) for _, l, f, _ in pairs])
+        ).all()
+    }
 
     suggestions: list[dict] = []
-    notified_user_ids: set[int] = set()
-    for cand in candidates:
-        score01 = _score_pair(base_text, _compose_text(cand), base_loc, cand.location, base_date, _date_from_item(cand), idf)
-        if score01 >= threshold:
-            # Store score in percentage with 2 decimal precision
-            score_pct = round(float(score01) * 100.0, 2)
-            # Determine correct pairing orientation
-            lost_id = item.id if item.type == "lost" else cand.id
-            found_id = cand.id if item.type == "lost" else item.id
-
-            # Idempotently upsert match
-            existing = Match.query.filter_by(lost_item_id=lost_id, found_item_id=found_id).first()
-            if existing:
-                # Keep the higher score if new score is better
-                try:
-                    if float(existing.score or 0) < score_pct:
-                        existing.score = score_pct
-                except Exception:
+    summaries = MatchSummaries()
+    for cand, lost_id, found_id, score_pct in pairs:
+        # Idempotently upsert match
+        existing = existing_by_pair.get((int(lost_id), int(found_id)))
+        if existing:
+            # Keep the higher score if new score is better
+            try:
+                if float(existing.score or 0) < score_pct:
                     existing.score = score_pct
-            else:
-                m = Match(lost_item_id=lost_id, found_item_id=found_id, score=score_pct)
-                db.session.add(m)
+            except Exception:
+                existing.score = score_pct
+        else:
+            db.session.add(Match(lost_item_id=lost_id, found_item_id=found_id, score=score_pct))
 
-            suggestions.append({
-                "lostItemId": lost_id,
-                "foundItemId": found_id,
-                "score": score_pct,
-            })
+        suggestions.append({
+            "lostItemId": lost_id,
+            "foundItemId": found_id,
+            "score": score_pct,
+        })
 
-            # Notifications
-            try:
-                # Always notify the reporter who just created this item (if available)
-                if item.reporter_user_id:
-                    payload = {
-                        "kind": "match",
-                        "lostItemId": lost_id,
-                        "foundItemId": found_id,
-                        "score": score_pct,
-                        # If your Item model includes a category field in the future, set it here
-                        # "category": getattr(item, "category", None) or getattr(cand, "category", None),
-                        "base": {
-                            "id": item.id,
-                            "type": item.type,
-                            "title": item.title,
-                            "location": item.location,
-                            "occurredOn": item.occurred_on.isoformat() if item.occurred_on else None,
-                        },
-                        "candidate": {
-                            "id": cand.id,
-                            "type": cand.type,
-                            "title": cand.title,
-                            "location": cand.location,
-                            "occurredOn": cand.occurred_on.isoformat() if cand.occurred_on else None,
-                        },
-                    }
-                    db.session.add(
-                        Notification(
-                            user_id=item.reporter_user_id,
-                            channel="inapp",
-                            title="Potential match found",
-                            body=f"We found a {opposite} item that may match ‘{item.title}’ ({int(round(score_pct))}% match).",
-                            payload=payload,
-                        )
-                    )
-                    notified_user_ids.add(int(item.reporter_user_id))
-                # If this is a found item, also notify the owner (lost reporter) when known
-                if item.type == "found" and getattr(cand, "type", None) == "lost" and getattr(cand, "reporter_user_id", None):
-                    payload2 = {
-                        "kind": "match",
-                        "lostItemId": lost_id,
-                        "foundItemId": found_id,
-                        "score": score_pct,
-                        # "category": getattr(cand, "category", None) or getattr(item, "category", None),
-                        "base": {
-                            "id": cand.id,
-                            "type": cand.type,
-                            "title": cand.title,
-                            "location": cand.location,
-                            "occurredOn": cand.occurred_on.isoformat() if cand.occurred_on else None,
-                        },
-                        "candidate": {
-                            "id": item.id,
-                            "type": item.type,
-                            "title": item.title,
-                            "location": item.location,
-                            "occurredOn": item.occurred_on.isoformat() if item.occurred_on else None,
-                        },
-                    }
-                    db.session.add(
-                        Notification(
-                            user_id=cand.reporter_user_id,
-                            channel="inapp",
-                            title="Possible match for your lost item",
-                            body=f"A found report may match your ‘{cand.title}’ ({int(round(score_pct))}% match).",
-                            payload=payload2,
-                        )
-                    )
-                    try:
-                        notified_user_ids.add(int(cand.reporter_user_id))
-                    except Exception:
-                        pass
-            except Exception:
-                # Notifications are best-effort; ignore failures
-                pass
+        # Notifications are coalesced: one summary per (user, their item), not one per pair
+        try:
+            # Always notify the reporter who just created this item (if available)
+            if item.reporter_user_id:
+                summaries.add(int(item.reporter_user_id), item, cand, score_pct)
+            # If this is a found item, also notify the owner (lost reporter) when known
+            if item.type == "found" and getattr(cand, "type", None) == "lost" and getattr(cand, "reporter_user_id", None):
+                summaries.add(int(cand.reporter_user_id), cand, item, score_pct, owner_alert=True)
+        except Exception:
+            # Notifications are best-effort; ignore failures
+            pass
 
-    # Commit any created/updated matches and notifications
-    if suggestions:
-        # Collect notifications created in-session for publishing after commit
-        # We query minimal recent rows for this user(s) as a simple approach
+    # Commit matches and summary notifications together, then publish once per row
+    try:
         try:
-            db.session.commit()
-            # Publish best-effort SSE events to involved users
-            try:
-                for uid in notified_user_ids:
-                    recent = (
-                        Notification.query.filter_by(user_id=uid)
-                        .order_by(Notification.created_at.desc()).limit(3).all()
-                    )
-                    for n in recent:
-                        if isinstance(n.payload, dict) and n.payload.get("kind") == "match":
-                            publish_notif(uid, {
-                                "type": "notification",
-                                "notification": {
-                                    "id": n.id,
-                                    "title": n.title,
-                                    "message": n.body,
-                                    "createdAt": n.created_at.isoformat() if n.created_at else None,
-                                    "read": bool(n.read_at),
-                                    "payload": n.payload,
-                                },
-                            })
-            except Exception:
-                pass
+            # Savepoint so a failed upsert never discards the matches themselves
+            with db.session.begin_nested():
+                summaries.flush()
         except Exception:
-            db.session.rollback()
+            summaries = MatchSummaries()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    summaries.publish()
     return suggestions
 
 
+def _approval_setting_marker() -> str:
+    return str(AppSetting.get("features.item_approval.required", None))
+
+
 @bp.get("")
+@conditional_get(Item, User, extra=_approval_setting_marker, public=True)
+@query_budget(6)
 def list_items():
-    # Return items from DB with optional filters: type, reporterUserId, limit
+    # Return items from DB with optional filters: type, reporterUserId, limit, cursor
     try:
         limit = int(request.args.get("limit", 8))
     except (TypeError, ValueError):
         limit = 8
+    limit = max(1, min(500, limit))
 
-    q = Item.query
+    # _item_to_dict reads it.reporter; load it in the page query, not once per row
+    q = Item.query.options(joinedload(Item.reporter))
 
     type_param = request.args.get("type")
     if type_param in ("lost", "found"):
@@ -285,6 +195,10 @@ def list_items():
         except ValueError:
             reporter_id = None
 
+    # Expired reports leave public listings; reporters still see their own
+    if reporter_id is None:
+        q = q.filter(Item.status != "expired")
+
     # Optional approval-gating for public visibility
     try:
         require_approval = AppSetting.get_bool("features.item_approval.required", True)
@@ -294,19 +208,17 @@ def list_items():
     # When a reporter filter is present (e.g., student's "My Reports"), always show their own items
     # regardless of approval gating so submissions are visible immediately.
     if require_approval and reporter_id is None:
-        try:
-            raw = AppSetting.get("items.approved.set", None)
-            approved_ids = set(int(x) for x in (json.loads(raw) if raw else []))
-        except Exception:
-            approved_ids = set()
-        # Only filter when we have at least one approved id recorded. This preserves
+        # Only filter once at least one item has been approved. This preserves
         # legacy installs until the first approval is made by an admin.
-        if approved_ids:
-            q = q.filter(Item.id.in_(approved_ids))
+        if approval_gate_active():
+            q = q.filter(Item.approved.is_(True))
 
-    items = q.order_by(Item.reported_at.desc()).limit(max(0, limit)).all()
+    try:
+        items, next_cursor = keyset_page(q, Item.reported_at, Item.id, limit, request.args.get("cursor"))
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
     # NOTE: We intentionally reuse _item_to_dict which now includes optional reporter data.
-    return jsonify({"items": [_item_to_dict(it) for it in items]})
+    return jsonify({"items": [_item_to_dict(it) for it in items], "nextCursor": next_cursor})
 
 
 @bp.post("")
@@ -324,6 +236,7 @@ def create_item():
     # Defaults shared across branches
     photo_url = None
     photo_thumb_url = None
+    photo_renditions = None
 
     if is_multipart:
         form = request.form
@@ -335,68 +248,18 @@ def create_item():
         # Legacy reporter field (will be overridden by authenticated user if present)
         reporter = form.get("reporterUserId") or form.get("reporter_user_id")
         photo_file = request.files.get("photo")
+        # Key from POST /items/uploads once the file has been PUT there
+        photo_key = (form.get("photoKey") or form.get("photo_key") or "").strip() or None
 
         if photo_file and photo_file.filename:
-            # generate a safe random filename, keep extension if present
+            # Stored as <sha256><ext>: identical bytes are written once and share renditions
             ext = os.path.splitext(photo_file.filename)[1].lower()[:10]
-            fname = secrets.token_hex(16) + ext
-
-            # Read bytes once
-            file_bytes = photo_file.read()
-
-            # Create thumbnail
-            try:
-                img = Image.open(BytesIO(file_bytes))
-                img.thumbnail((480, 480))
-                thumb_io = BytesIO()
-                thumb_format = 'JPEG'
-                if ext in ('.png', '.webp'):
-                    thumb_format = 'PNG'
-                img.save(thumb_io, format=thumb_format, optimize=True)
-                thumb_bytes = thumb_io.getvalue()
-            except Exception:
-                thumb_bytes = None
-
-            # Optional S3 path
-            s3_bucket = current_app.config.get("S3_BUCKET_NAME")
-            if s3_bucket:
-                s3 = boto3.client(
-                    's3',
-                    region_name=current_app.config.get("S3_REGION") or None,
-                    aws_access_key_id=current_app.config.get("S3_ACCESS_KEY_ID") or None,
-                    aws_secret_access_key=current_app.config.get("S3_SECRET_ACCESS_KEY") or None,
-                    endpoint_url=current_app.config.get("S3_ENDPOINT_URL") or None,
-                    config=BotoConfig(s3={'addressing_style': 'virtual'})
-                )
-                key = f"uploads/{fname}"
-                s3.put_object(Bucket=s3_bucket, Key=key, Body=file_bytes, ContentType=photo_file.mimetype or 'application/octet-stream', ACL='public-read')
-                if thumb_bytes is not None:
-                    tkey = f"uploads/thumbs/{fname}"
-                    s3.put_object(Bucket=s3_bucket, Key=tkey, Body=thumb_bytes, ContentType='image/jpeg', ACL='public-read')
-
-                base = current_app.config.get("S3_PUBLIC_URL_BASE")
-                if base:
-                    photo_url = f"{base}/{key}"
-                    photo_thumb_url = f"{base}/{tkey}" if thumb_bytes is not None else None
-                else:
-                    region = current_app.config.get("S3_REGION") or 'us-east-1'
-                    photo_url = f"https://{s3_bucket}.s3.{region}.amazonaws.com/{key}"
-                    photo_thumb_url = f"https://{s3_bucket}.s3.{region}.amazonaws.com/{tkey}" if thumb_bytes is not None else None
-            else:
-                # Local storage
-                upload_folder = current_app.config["UPLOAD_FOLDER"]
-                os.makedirs(os.path.join(upload_folder, 'thumbs'), exist_ok=True)
-                path = os.path.join(upload_folder, fname)
-                with open(path, 'wb') as f:
-                    f.write(file_bytes)
-                if thumb_bytes is not None:
-                    tpath = os.path.join(upload_folder, 'thumbs', fname)
-                    with open(tpath, 'wb') as f:
-                        f.write(thumb_bytes)
-
-                # Store relative URLs to avoid mixed-content and host coupling; Nginx proxies /uploads
-                photo_url = url_for("uploads", filename=fname, _external=False)
-                photo_thumb_url = url_for("uploads", filename=f"thumbs/{fname}", _external=False) if thumb_bytes is not None else None
+            stored = store_blob(photo_file, ext)
+            photo_url = stored.url
+            photo_thumb_url = None
+            # Thumbnail and srcset renditions are generated in the background, unless
+            # an earlier upload of the same bytes already has them
+            photo_renditions = stored.renditions or pending_manifest(stored.name, size=stored.size, sha256=stored.sha256)
         else:
             # No file uploaded; allow URLs provided via form fields
             photo_url = (form.get("photoUrl") or form.get("photo_url") or "").strip() or None
@@ -411,6 +274,7 @@ def create_item():
         reporter = data.get("reporterUserId") or data.get("reporter_user_id")
         photo_url = (data.get("photoUrl") or data.get("photo_url") or "").strip() or None
         photo_thumb_url = (data.get("photoThumbUrl") or data.get("photo_thumb_url") or "").strip() or None
+        photo_key = (data.get("photoKey") or data.get("photo_key") or "").strip() or None
 
     if item_type not in ("lost", "found"):
         return jsonify({"error": "Invalid item type"}), 400
@@ -436,6 +300,17 @@ def create_item():
             # In production, do not allow client-supplied reporter id without auth
             reporter_id = None
 
+    if photo_key and photo_renditions is None:
+        # Direct upload: one existence check here, hashing and thumbnailing happen in the rendition job
+        if not staged_exists(photo_key):
+            return jsonify({"error": "Upload not found; PUT the photo to the URL from POST /items/uploads first"}), 400
+        photo_url = get_storage().url(photo_key)
+        photo_renditions = pending_manifest(photo_key)
+
+    # Client-supplied photo URLs are recorded as external media so the thumb survives the request
+    if photo_url and photo_renditions is None:
+        photo_renditions = external_manifest(photo_url, photo_thumb_url)
+
     # Persist
     item = Item(
         type=item_type,
@@ -444,137 +319,169 @@ def create_item():
         location=location,
         occurred_on=occurred_on,
         photo_url=photo_url,
+        photo_renditions=photo_renditions,
         reporter_user_id=reporter_id,
     )
 
-    # Attach transient attribute for response (if model lacks dedicated column for thumb)
-    if photo_thumb_url:
-        setattr(item, 'photo_thumb_url', photo_thumb_url)
-
+    # Item, term vectors, QR code and outbox events commit together; matching and
+    # social posting run afterwards from the outbox (app/outbox.py)
     db.session.add(item)
-    db.session.commit()
-
-    # After creation, attempt social auto-post if enabled
-    try:
-        auto_post = AppSetting.get_bool("social.facebook.auto_post", False)
-        if auto_post:
-            # prepare message
-            kind = "Lost" if item.type == "lost" else "Found"
-            lines: list[str] = [f"{kind} Item: {item.title}"]
-            if item.description:
-                lines.append(item.description)
-            meta: list[str] = []
-            if item.location:
-                meta.append(f"Location: {item.location}")
-            if item.occurred_on:
-                try:
-                    meta.append(f"Date: {item.occurred_on.strftime('%Y-%m-%d')}")
-                except Exception:
-                    pass
-            if meta:
-                lines.append(" • ".join(meta))
-            # Public link to item details page if available (frontend route); fallback to uploads image
-            base_frontend = os.getenv("FRONTEND_PUBLIC_BASE_URL") or os.getenv("PUBLIC_WEB_BASE_URL")
-            link_url = None
-            if base_frontend:
-                # Example: /items/<id> or /admin/items
-                link_url = f"{base_frontend.rstrip('/')}/items/{int(item.id)}"
-            elif item.photo_url:
-                link_url = item.photo_url
-
-            message = "\n".join(lines)
-
-            # Persist social post row as queued
-            sp = SocialPost(item_id=item.id, platform="facebook", message=message, link_url=link_url, status="queued")
-            db.session.add(sp)
-            db.session.commit()
-
-            # Dispatch background job if celery configured; else best-effort inline post
-            posted_ok = False
-            try:
-                from ...tasks.jobs.social import post_item_to_facebook  # type: ignore
-                # If CELERY is configured, enqueue task; otherwise, calling delay may raise
-                post_item_to_facebook.delay(message, link_url)
-                posted_ok = True  # consider enqueued as ok
-            except Exception:
-                # Fallback: try direct post synchronously
-                try:
-                    from ...integrations.facebook.client import post_to_page  # type: ignore
-                    resp = post_to_page(message, link_url)
-                    sp.post_external_id = str(resp.get("id") or resp.get("post_id") or "")
-                    sp.status = "sent"
-                    sp.posted_at = datetime.utcnow()
-                    db.session.commit()
-                    posted_ok = True
-                except Exception:
-                    posted_ok = False
-            if not posted_ok:
-                try:
-                    sp.status = "failed"
-                    db.session.commit()
-                except Exception:
-                    db.session.rollback()
-    except Exception:
-        # Never block item creation on social errors
-        pass
-
-    # Run auto-match and generate suggestions (non-blocking best-effort)
+    db.session.flush()
     try:
-        _auto_match_for_item(item, threshold=0.5, limit=200)
+        if index_item_terms is not None:
+            with db.session.begin_nested():
+                index_item_terms(item, fresh=True)
     except Exception:
-        # Do not fail the request if auto-match errors
         pass
+    qr_code = None
+    if (item.type or "").lower() == "found":
+        try:
+            with db.session.begin_nested():
+                qr_code = create_item_codes([item.id]).get(int(item.id))
+        except Exception:
+            qr_code = None
+    enqueue_item_created(item)
+    db.session.commit()
 
-    # Auto-generate QR code for found items
-    try:
-        if (item.type or "").lower() == "found":
-            # Check if QR exists; if not, create one
-            existing = QRCode.query.filter_by(item_id=item.id).first()
-            if not existing:
-                # Generate unique code (module-level 'secrets' already imported; avoid re-import inside function)
-                code = None
-                for _ in range(10):
-                    cand = secrets.token_urlsafe(8).replace("_", "").replace("-", "").lower()
-                    if not QRCode.query.filter_by(code=cand).first():
-                        code = cand
-                        break
-                if not code:
-                    code = secrets.token_urlsafe(12).replace("_", "").replace("-", "").lower()
-                qr = QRCode(code=code, item_id=item.id)
-                db.session.add(qr)
-                db.session.commit()
-    except Exception:
-        db.session.rollback()
+    # Thumbnail + srcset renditions are built off the request path
+    if photo_renditions and photo_renditions.get("status") == "pending":
+        try:
+            dispatch_renditions(item.id)
+        except Exception:
+            pass
+    outbox_kick()
 
     # Response
     payload = _item_to_dict(item)
-    # Enrich reporter block for convenience in responses (mirrors admin output shape subset)
-    try:
-        if item.reporter:
-            payload["reporter"] = {
-                "id": item.reporter.id,
-                "email": getattr(item.reporter, 'email', None),
-                "firstName": getattr(item.reporter, 'first_name', None),
-                "lastName": getattr(item.reporter, 'last_name', None),
-                "studentId": getattr(item.reporter, 'student_id', None),
-            }
-    except Exception:
-        pass
-    try:
-        if (item.type or "").lower() == "found":
+    if qr_code:
+        try:
             # Include QR URLs for convenience if blueprint is mounted
             from flask import url_for as _url_for
-            qr = QRCode.query.filter_by(item_id=item.id).first()
-            if qr:
-                payload = {
-                    **payload,
-                    "qr": {
-                        "code": qr.code,
-                        "image": _url_for("api_v1.qrcodes.qrcode_image", code=qr.code, _external=True),  # type: ignore[attr-defined]
-                        "scanUrl": _url_for("api_v1.qrcodes.resolve_code", code=qr.code, _external=True),  # type: ignore[attr-defined]
-                    },
-                }
-    except Exception:
-        pass
+            payload = {
+                **payload,
+                "qr": {
+                    "code": qr_code,
+                    "image": _url_for("api_v1.qrcodes.qrcode_image", code=qr_code, _external=True),  # type: ignore[attr-defined]
+                    "scanUrl": _url_for("api_v1.qrcodes.resolve_code", code=qr_code, _external=True),  # type: ignore[attr-defined]
+                },
+            }
+        except Exception:
+            pass
 
     return jsonify(payload), 201
+
+
+@bp.post("/uploads")
+def create_direct_upload():
+    """Reserve a staging key for a photo and return where to PUT it (presigned S3 or local).
+
+    Body: {"contentType": "image/jpeg", "size": <bytes>}. Pass the returned
+    ``key`` as ``photoKey`` to POST /items once the PUT has succeeded.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        upload = create_upload(data.get("contentType") or data.get("content_type"), data.get("size"))
+    except DirectUploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    return jsonify(upload), 201
+
+
+@bp.put("/uploads/<token>")
+def receive_direct_upload(token: str):
+    """Local storage target for a signed direct upload; the body is streamed to storage."""
+    try:
+        key = receive_upload(token, request.stream, request.content_type)
+    except DirectUploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    return jsonify({"key": key}), 201
+
+
+def _uploader_id() -> int | None:
+    uid = getattr(g, "current_user_id", None)
+    try:
+        return int(uid) if uid else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _resumable_response(session: resumable.UploadSession, status: int = 200, **extra):
+    # tus-style headers so clients can resume from HEAD alone
+    url = url_for("api_v1.items.resumable_upload", upload_id=session.id)
+    resp = jsonify({**session.to_dict(), "url": url, **extra})
+    resp.status_code = status
+    resp.headers["Upload-Offset"] = str(session.offset())
+    resp.headers["Upload-Length"] = str(session.size)
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+@bp.post("/uploads/resumable")
+def create_resumable_upload():
+    """Open a resumable upload: {"contentType", "size"} -> {id, url, offset, chunkSize, ...}.
+
+    PATCH chunks to ``url`` with an ``Upload-Offset`` header, then POST
+    ``url + "/finalize"`` for a ``key`` to pass as ``photoKey`` to POST /items.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        session = resumable.create_session(data.get("contentType") or data.get("content_type"), data.get("size"), _uploader_id())
+    except DirectUploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    resp = _resumable_response(session, 201, chunkSize=resumable.chunk_bytes())
+    resp.headers["Location"] = url_for("api_v1.items.resumable_upload", upload_id=session.id)
+    return resp
+
+
+@bp.route("/uploads/resumable/<upload_id>", methods=["GET", "PATCH", "DELETE"])
+def resumable_upload(upload_id: str):
+    """GET/HEAD: current offset. PATCH: append the body at Upload-Offset. DELETE: abandon."""
+    try:
+        session = resumable.get_session(upload_id, _uploader_id())
+    except DirectUploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    if request.method == "DELETE":
+        resumable.discard(session)
+        return "", 204
+    if request.method == "PATCH":
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+        except ValueError:
+            return jsonify({"error": "Upload-Offset header is required"}), 400
+        try:
+            resumable.append_chunk(session, offset, request.stream)
+        except DirectUploadError as e:
+            return _resumable_response(session, e.status, error=str(e))
+    return _resumable_response(session)
+
+
+@bp.post("/uploads/resumable/<upload_id>/finalize")
+def finalize_resumable_upload(upload_id: str):
+    """Hand a complete resumable upload to storage; returns {"key"} for POST /items photoKey."""
+    try:
+        session = resumable.get_session(upload_id, _uploader_id())
+        key = resumable.finalize(session)
+    except DirectUploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    return jsonify({"key": key}), 201
+
+
+@bp.post("/<int:item_id>/reactivate")
+def reactivate_item(item_id: int):
+    """Return an expired report to the live set (reporter or admin only)."""
+    it: Item | None = Item.query.get(item_id)
+    if not it:
+        return jsonify({"error": "Item not found"}), 404
+    current_uid = getattr(g, "current_user_id", None)
+    role = str(getattr(getattr(g, "current_user", None), "role", "") or "").lower()
+    if not current_uid or (role != "admin" and it.reporter_user_id != current_uid):
+        return jsonify({"error": "Not authorized to reactivate this item"}), 403
+    if it.status != "expired":
+        return jsonify({"error": "Only expired items can be reactivated"}), 400
+
+    from .lifecycle import reactivate_item as _reactivate
+    _reactivate(it)
+    # Give the item a fresh chance at matching now that it is live again
+    enqueue_item_reactivated(it)
+    db.session.commit()
+    outbox_kick()
+    return jsonify({"item": _item_to_dict(it)})
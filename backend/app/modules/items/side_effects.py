@@ -0,0 +1,112 @@
+"""Outbox handlers for follow-up work on a newly created (or reactivated) item.
+
+``POST /items`` records these events in the transaction that inserts the
+item. They run later through ``app.outbox``, maybe more than once, so each
+handler is idempotent:
+
+- ``item.match``: matches are upserted by (lost, found) pair and only raise
+  their score. Owner notifications are coalesced per (user, item) by
+  MatchSummaries
+- ``item.social_post``: reuses the item's SocialPost row and does nothing
+  once it is ``sent``
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+
+from ...extensions import db
+from ...models.app_setting import AppSetting
+from ...models.item import Item
+from ...models.outbox_event import OutboxEvent
+from ...models.social_post import SocialPost
+from ...outbox import enqueue, handler
+
+MATCH_TOPIC = "item.match"
+SOCIAL_POST_TOPIC = "item.social_post"
+
+
+def enqueue_item_created(item: Item) -> None:
+    """Record the side effects of a new item; the caller commits them with the item."""
+    enqueue(MATCH_TOPIC, "item", item.id, {"threshold": 0.5, "limit": 200})
+    # Decided now, so toggling the setting later does not post older items
+    try:
+        auto_post = AppSetting.get_bool("social.facebook.auto_post", False)
+    except Exception:
+        auto_post = False
+    if auto_post:
+        enqueue(SOCIAL_POST_TOPIC, "item", item.id, {"platform": "facebook"})
+
+
+def enqueue_item_reactivated(item: Item) -> None:
+    enqueue(MATCH_TOPIC, "item", item.id, {"threshold": 0.5, "limit": 200})
+
+
+@handler(MATCH_TOPIC)
+def run_item_match(event: OutboxEvent) -> None:
+    from .routes import _auto_match_for_item
+
+    item = db.session.get(Item, event.aggregate_id)
+    if item is None:
+        return
+    payload = event.payload or {}
+    _auto_match_for_item(item, threshold=float(payload.get("threshold", 0.5)), limit=int(payload.get("limit", 200)))
+
+
+def social_message(item: Item) -> tuple[str, str | None]:
+    """Message text and link for an item's auto-post."""
+    kind = "Lost" if item.type == "lost" else "Found"
+    lines: list[str] = [f"{kind} Item: {item.title}"]
+    if item.description:
+        lines.append(item.description)
+    meta: list[str] = []
+    if item.location:
+        meta.append(f"Location: {item.location}")
+    if item.occurred_on:
+        try:
+            meta.append(f"Date: {item.occurred_on.strftime('%Y-%m-%d')}")
+        except Exception:
+            pass
+    if meta:
+        lines.append(" • ".join(meta))
+    # Public link to item details page if available (frontend route); fallback to uploads image
+    base_frontend = os.getenv("FRONTEND_PUBLIC_BASE_URL") or os.getenv("PUBLIC_WEB_BASE_URL")
+    link_url = None
+    if base_frontend:
+        link_url = f"{base_frontend.rstrip('/')}/items/{int(item.id)}"
+    elif item.photo_url:
+        link_url = item.photo_url
+    return "\n".join(lines), link_url
+
+
+@handler(SOCIAL_POST_TOPIC)
+def run_social_post(event: OutboxEvent) -> None:
+    from ...integrations.facebook.client import post_to_page
+
+    item = db.session.get(Item, event.aggregate_id)
+    if item is None:
+        return
+    platform = (event.payload or {}).get("platform") or "facebook"
+    sp = (
+        SocialPost.query.filter_by(item_id=item.id, platform=platform)
+        .order_by(SocialPost.id)
+        .first()
+    )
+    if sp is not None and sp.status == "sent":
+        return
+    if sp is None:
+        message, link_url = social_message(item)
+        sp = SocialPost(item_id=item.id, platform=platform, message=message, link_url=link_url, status="queued")
+        db.session.add(sp)
+        # Committed before posting so a failed attempt stays visible in the admin list
+        db.session.commit()
+
+    try:
+        resp = post_to_page(sp.message or "", sp.link_url)
+    except Exception:
+        sp.status = "failed"
+        db.session.commit()
+        raise  # retried by the outbox with backoff
+    sp.post_external_id = str(resp.get("id") or resp.get("post_id") or "")
+    sp.status = "sent"
+    sp.posted_at = datetime.now(timezone.utc)
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 from flask import Blueprint, jsonify, request
+from sqlalchemy.orm import selectinload
 
 from ...extensions import db
+from ...pagination import InvalidCursor, keyset_page
+from ...query_budget import query_budget
+from ...serializers import item_dict
 from ...models.match import Match
 from ...models.item import Item
 from ...models.notification import Notification
@@ -14,36 +18,19 @@ try:
         _compose_text,
         _date_from_item,
         _idf,
+        _matching_engine,
         _score_pair,
         _tokenize,
     )
 except Exception:
     _candidate_query = _compose_text = _date_from_item = _idf = _score_pair = _tokenize = None  # type: ignore
+    _matching_engine = lambda requested=None: "python"  # type: ignore  # noqa: E731
 
 bp = Blueprint("matches", __name__, url_prefix="/matches")
 
 
 def _item_to_dict(it: Item) -> dict:
-    thumb_url = getattr(it, "photo_thumb_url", None)
-    if not thumb_url and it.photo_url:
-        try:
-            if "/uploads/" in it.photo_url:
-                thumb_url = it.photo_url.replace("/uploads/", "/uploads/thumbs/", 1)
-        except Exception:
-            thumb_url = None
-    return {
-        "id": it.id,
-        "type": it.type,
-        "title": it.title,
-        "description": it.description,
-        "location": it.location,
-        "occurredOn": it.occurred_on.isoformat() if it.occurred_on else None,
-        "reportedAt": it.reported_at.isoformat() if it.reported_at else None,
-        "status": it.status,
-        "photoUrl": it.photo_url,
-        "photoThumbUrl": thumb_url,
-        "reporterUserId": it.reporter_user_id,
-    }
+    return item_dict(it)
 
 def _match_to_dict(m: Match, include_items: bool = False) -> dict:
     base = {
@@ -65,7 +52,8 @@ def _match_to_dict(m: Match, include_items: bool = False) -> dict:
 def suggestions_for_item():
     """Compute smart suggestions for a specific item without persisting.
 
-    Query params: itemId (required), limit (default 10), threshold (default 0.5)
+    Query params: itemId (required), limit (default 10), threshold (default 0.5),
+    engine (optional 'python' | 'sql' scoring engine override)
     Returns: { suggestions: [ { lostItemId, foundItemId, score, candidate } ] }
     """
     if not all([_candidate_query, _compose_text, _date_from_item, _idf, _score_pair, _tokenize]):
@@ -91,13 +79,22 @@ def suggestions_for_item():
     base_loc = base.location
     base_date = _date_from_item(base)
 
-    candidates = list(_candidate_query(opposite_type=opposite, location=base_loc, around=base_date))
-    docs = [_tokenize(base_text)] + [_tokenize(_compose_text(it)) for it in candidates]
-    idf = _idf(docs)
+    if _matching_engine(request.args.get("engine")) == "sql":
+        from ..search.sql_engine import load_scored_items, top_matches_sql
+        scored = load_scored_items(
+            top_matches_sql(base_text, opposite, base_loc, base_date, limit=max(1, min(50, limit)), min_score=threshold)
+        )
+    else:
+        candidates = list(_candidate_query(opposite_type=opposite, location=base_loc, around=base_date))
+        docs = [_tokenize(base_text)] + [_tokenize(_compose_text(it)) for it in candidates]
+        idf = _idf(docs)
+        scored = [
+            (it, _score_pair(base_text, _compose_text(it), base_loc, it.location, base_date, _date_from_item(it), idf))
+            for it in candidates
+        ]
 
     out = []
-    for it in candidates:
-        s = _score_pair(base_text, _compose_text(it), base_loc, it.location, base_date, _date_from_item(it), idf)
+    for it, s in scored:
         if s >= threshold:
             lost_id = base.id if base.type == "lost" else it.id
             found_id = it.id if base.type == "lost" else base.id
@@ -112,6 +109,7 @@ def suggestions_for_item():
 
 
 @bp.get("")
+@query_budget(4)
 def list_matches():
     # Optional filters: lostItemId, foundItemId, status
     q = Match.query
@@ -138,11 +136,13 @@ def list_matches():
         q = q.filter(Match.status == status)
 
     if include_items:
-        # eager load items to reduce queries
-        # Using joinedload would be better, but simple access triggers load per row which is acceptable for small lists
-        pass
-    rows = q.order_by(Match.created_at.desc()).limit(max(1, min(500, limit))).all()
-    return jsonify({"matches": [_match_to_dict(m, include_items) for m in rows]})
+        # One IN query per side for the whole page instead of two lazy loads per match
+        q = q.options(selectinload(Match.lost_item), selectinload(Match.found_item))
+    try:
+        rows, next_cursor = keyset_page(q, Match.created_at, Match.id, max(1, min(500, limit)), request.args.get("cursor"))
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
+    return jsonify({"matches": [_match_to_dict(m, include_items) for m in rows], "nextCursor": next_cursor})
 
 
 @bp.post("")
@@ -0,0 +1 @@
+# media module placeholder
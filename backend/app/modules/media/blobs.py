@@ -0,0 +1,192 @@
+"""Content-addressed uploads with reference counts.
+
+An upload is hashed before it is written and stored as ``<sha256><ext>``,
+with one ``media_blobs`` row per distinct content:
+
+- a second upload of the same bytes (re-submission, admin retry) finds the
+  existing row. Nothing is written, and when the first copy's renditions
+  are ready they are reused as they are, so no thumbnailing runs again
+- ``ref_count`` is the number of items whose manifest ``source`` is the
+  blob. Item mapper events keep it in step inside the same flush: insert
+  +1, delete -1, a changed source -1/+1. So every delete path (reject,
+  admin delete, cascades through the ORM) and clones such as
+  ``auto_report_found`` are counted without touching the views
+- rows at zero are left for the media sweeper, after a grace period
+  (a blob is claimed a moment before its item is inserted)
+
+ORM bulk inserts (``bulk_import``) do not fire mapper events; run
+``flask media recount-blobs`` to reconcile after anything unusual.
+"""
+from __future__ import annotations
+
+import hashlib
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from sqlalchemy import event, func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import attributes
+from werkzeug.datastructures import FileStorage
+
+from ...extensions import db
+from ...models.item import Item
+from ...models.media_blob import MediaBlob
+from .layout import upload_name
+from .storage import CHUNK_SIZE, get_storage
+
+
+@dataclass
+class StoredBlob:
+    name: str
+    url: str
+    size: int
+    sha256: str
+    content_type: str
+    # True when the bytes were already stored (nothing was written)
+    deduplicated: bool = False
+    # Ready manifest of an earlier upload of the same bytes
+    renditions: dict | None = None
+
+
+def _hash_seekable(stream: BinaryIO) -> tuple[str, int]:
+    h = hashlib.sha256()
+    size = 0
+    stream.seek(0)
+    while chunk := stream.read(CHUNK_SIZE):
+        h.update(chunk)
+        size += len(chunk)
+    stream.seek(0)
+    return h.hexdigest(), size
+
+
+def _spool(stream: BinaryIO) -> tuple[BinaryIO, str, int]:
+    """Copy a non-seekable stream to a temp file while hashing it."""
+    h = hashlib.sha256()
+    size = 0
+    out = tempfile.SpooledTemporaryFile(max_size=CHUNK_SIZE)
+    while chunk := stream.read(CHUNK_SIZE):
+        h.update(chunk)
+        size += len(chunk)
+        out.write(chunk)
+    out.seek(0)
+    return out, h.hexdigest(), size  # type: ignore[return-value]
+
+
+def _seekable(stream) -> bool:
+    try:
+        return bool(stream.seekable())
+    except Exception:
+        return False
+
+
+def claim_blob(sha256: str, name: str, size: int, content_type: str) -> tuple[str, dict | None, bool]:
+    """Insert or find the blob row for ``sha256``; returns (stored name, renditions, created).
+
+    Runs in the caller's transaction. ``ref_count`` is not touched here: the
+    item that uses the blob increments it when it is inserted.
+    """
+    stmt = (
+        pg_insert(MediaBlob)
+        .values(sha256=sha256, name=name, size=size, content_type=content_type)
+        # No-op update so the existing row is returned (and its updated_at refreshed for the sweeper)
+        .on_conflict_do_update(index_elements=[MediaBlob.sha256], set_={"updated_at": func.now()})
+        .returning(MediaBlob.name, MediaBlob.renditions, literal_column("(xmax = 0)").label("created"))
+    )
+    row = db.session.execute(stmt).one()
+    return row.name, row.renditions, bool(row.created)
+
+
+def store_blob(file: FileStorage, ext: str) -> StoredBlob:
+    """Hash ``file``, then write it as ``[ab/cd/]<sha256><ext>`` unless the same bytes are already stored."""
+    return store_stream(file.stream, ext, file.mimetype or "application/octet-stream")
+
+
+def store_stream(stream: BinaryIO, ext: str, content_type: str) -> StoredBlob:
+    """``store_blob`` for a bare stream (e.g. a staged direct upload read back from storage)."""
+    if _seekable(stream):
+        # Werkzeug spools multipart parts to a temp file, so this pass reads local disk
+        sha256, size = _hash_seekable(stream)
+    else:
+        stream, sha256, size = _spool(stream)
+    name, renditions, created = claim_blob(sha256, upload_name(f"{sha256}{ext}"), size, content_type)
+    storage = get_storage()
+    deduplicated = not created and storage.exists(name)
+    if not deduplicated:
+        storage.put(name, stream, content_type)
+    ready = renditions if isinstance(renditions, dict) and renditions.get("status") == "ready" else None
+    return StoredBlob(
+        name=name,
+        url=storage.url(name),
+        size=size,
+        sha256=sha256,
+        content_type=content_type,
+        deduplicated=deduplicated,
+        renditions=dict(ready) if ready and deduplicated else None,
+    )
+
+
+def remember_renditions(source: str, manifest: dict) -> None:
+    """Keep a ready manifest on the blob so later uploads of the same bytes reuse it."""
+    if manifest.get("status") != "ready":
+        return
+    db.session.execute(update(MediaBlob).where(MediaBlob.name == source).values(renditions=manifest))
+
+
+def recount_blobs() -> int:
+    """Recompute every ref_count from items; returns the number of rows changed."""
+    refs = (
+        select(func.count(Item.id))
+        .where(Item.photo_renditions["source"].astext == MediaBlob.name)
+        .where(Item.photo_renditions["status"].astext != "external")
+        .scalar_subquery()
+    )
+    result = db.session.execute(
+        update(MediaBlob).where(MediaBlob.ref_count != refs).values(ref_count=refs).execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return int(result.rowcount or 0)
+
+
+# -- reference counting ----------------------------------------------------
+
+def _source(manifest) -> str | None:
+    if isinstance(manifest, dict) and manifest.get("status") != "external":
+        return manifest.get("source") or None
+    return None
+
+
+def _adjust(connection, name: str | None, delta: int) -> None:
+    if not name:
+        return
+    connection.execute(
+        update(MediaBlob.__table__)
+        .where(MediaBlob.__table__.c.name == name)
+        .values(ref_count=func.greatest(MediaBlob.__table__.c.ref_count + delta, 0), updated_at=func.now())
+    )
+
+
+def _after_insert(mapper, connection, target: Item) -> None:
+    _adjust(connection, _source(target.photo_renditions), 1)
+
+
+def _after_update(mapper, connection, target: Item) -> None:
+    hist = attributes.get_history(target, "photo_renditions")
+    if not hist.has_changes():
+        return
+    old = _source(hist.deleted[0]) if hist.deleted else None
+    new = _source(hist.added[0]) if hist.added else None
+    if old != new:
+        _adjust(connection, old, -1)
+        _adjust(connection, new, 1)
+
+
+def _before_delete(mapper, connection, target: Item) -> None:
+    _adjust(connection, _source(target.photo_renditions), -1)
+
+
+def init_media_blobs() -> None:
+    """Register the Item ref-count listeners (idempotent)."""
+    for name, fn in (("after_insert", _after_insert), ("after_update", _after_update), ("before_delete", _before_delete)):
+        if not event.contains(Item, name, fn):
+            event.listen(Item, name, fn)
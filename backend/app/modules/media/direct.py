@@ -0,0 +1,174 @@
+"""Direct uploads: photo bytes go straight to storage instead of through ``POST /items``.
+
+1. ``POST /items/uploads`` with ``{"contentType", "size"}`` reserves a staging
+   key ``incoming/<random hex><ext>`` and returns where to PUT the bytes:
+   a presigned S3 URL (Content-Type and Content-Length are signed), or, for
+   local storage, ``PUT /items/uploads/<token>``. That handler streams the
+   body to storage in fixed-size chunks. Behind nginx the body is already
+   buffered to a temp file by then, so a slow mobile link never holds a
+   worker.
+2. The client PUTs the file, then creates the item with ``photoKey`` instead
+   of a multipart photo. ``create_item`` only checks that the object exists.
+3. The rendition job (``renditions.py``) promotes the staged object first:
+   it is hashed into a content-addressed blob (``blobs.py``), the item is
+   pointed at the blob, and thumbnailing carries on from there.
+
+Staging copies are never deleted here. Once promoted, or when nobody turned
+the key into an item, they are ordinary orphans for the media sweeper
+(``gc.py``) after MEDIA_GC_GRACE_HOURS, so the ``photoUrl`` returned by
+``create_item`` keeps working until clients have refetched the item.
+"""
+from __future__ import annotations
+
+import re
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO
+
+from flask import current_app, url_for
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+from ...extensions import db
+from ...models.item import Item
+from .blobs import store_stream
+from .storage import CHUNK_SIZE, get_storage
+
+STAGING_PREFIX = "incoming/"
+
+# Accepted photo types and the extension their staging key gets
+CONTENT_TYPES: dict[str, str] = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+_STAGED_KEY = re.compile(r"^incoming/[0-9a-f]{32}\.[a-z]{3,4}$")
+
+
+class DirectUploadError(ValueError):
+    """A direct upload request that cannot be honoured; ``status`` is the HTTP code."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def max_bytes() -> int:
+    return int(current_app.config.get("DIRECT_UPLOAD_MAX_BYTES") or current_app.config.get("MAX_CONTENT_LENGTH") or 0)
+
+
+def _expires() -> int:
+    return int(current_app.config.get("DIRECT_UPLOAD_EXPIRES_SECONDS") or 900)
+
+
+def _serializer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(secret_key=current_app.config["SECRET_KEY"], salt="direct-upload")
+
+
+def is_staged(key: str | None) -> bool:
+    return bool(key) and bool(_STAGED_KEY.match(key))  # type: ignore[arg-type]
+
+
+def create_upload(content_type: str, size) -> dict:
+    """Reserve a staging key and describe how the client should PUT the file there."""
+    content_type = (content_type or "").split(";", 1)[0].strip().lower()
+    ext = CONTENT_TYPES.get(content_type)
+    if ext is None:
+        raise DirectUploadError(f"contentType must be one of {', '.join(CONTENT_TYPES)}")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise DirectUploadError("size (bytes) is required")
+    limit = max_bytes()
+    if size <= 0:
+        raise DirectUploadError("size (bytes) is required")
+    if limit and size > limit:
+        raise DirectUploadError(f"File is larger than {limit} bytes", status=413)
+
+    key = f"{STAGING_PREFIX}{secrets.token_hex(16)}{ext}"
+    expires = _expires()
+    signed = get_storage().presigned_put(key, content_type, size, expires)
+    if signed is not None:
+        url, headers = signed
+    else:
+        token = _serializer().dumps({"k": key, "t": content_type, "s": size})
+        url = url_for("api_v1.items.receive_direct_upload", token=token)
+        headers = {"Content-Type": content_type}
+    return {
+        "key": key,
+        "method": "PUT",
+        "url": url,
+        "headers": headers,
+        "maxBytes": size,
+        "expiresAt": (datetime.now(timezone.utc) + timedelta(seconds=expires)).isoformat(),
+    }
+
+
+class _BoundedReader:
+    """Reads at most ``limit`` bytes from ``stream`` and fails past it."""
+
+    def __init__(self, stream: BinaryIO, limit: int) -> None:
+        self._stream = stream
+        self._limit = limit
+        self.size = 0
+
+    def read(self, n: int = CHUNK_SIZE) -> bytes:
+        if n is None or n < 0:
+            n = CHUNK_SIZE
+        chunk = self._stream.read(min(n, self._limit - self.size + 1))
+        self.size += len(chunk)
+        if self.size > self._limit:
+            raise DirectUploadError("Upload is larger than declared", status=413)
+        return chunk
+
+
+def receive_upload(token: str, stream: BinaryIO, content_type: str | None) -> str:
+    """Write a signed local direct upload to storage; returns its staging key."""
+    try:
+        claim = _serializer().loads(token, max_age=_expires())
+    except SignatureExpired:
+        raise DirectUploadError("Upload URL has expired", status=403)
+    except BadSignature:
+        raise DirectUploadError("Invalid upload URL", status=403)
+    key, declared_type, size = claim["k"], claim["t"], int(claim["s"])
+    if (content_type or "").split(";", 1)[0].strip().lower() != declared_type:
+        raise DirectUploadError(f"Content-Type must be {declared_type}")
+    storage = get_storage()
+    # Upload URLs are single use
+    if storage.exists(key):
+        raise DirectUploadError("Already uploaded", status=409)
+    reader = _BoundedReader(stream, size)
+    try:
+        storage.put(key, reader, declared_type)
+    except Exception:
+        storage.delete(key)
+        raise
+    if reader.size != size:
+        storage.delete(key)
+        raise DirectUploadError(f"Expected {size} bytes, received {reader.size}")
+    return key
+
+
+def staged_exists(key: str) -> bool:
+    return is_staged(key) and get_storage().exists(key)
+
+
+def promote_staged(item: Item) -> dict:
+    """Copy an item's staged direct upload into blob storage and commit; returns the new manifest.
+
+    When earlier bytes of the same content already have renditions, the
+    returned manifest is ready as is.
+    """
+    from .renditions import pending_manifest
+
+    staged = item.photo_renditions["source"]
+    ext = "." + staged.rsplit(".", 1)[1]
+    content_type = next((t for t, e in CONTENT_TYPES.items() if e == ext), "application/octet-stream")
+    with get_storage().open(staged) as fh:
+        stored = store_stream(fh, ext, content_type)
+    manifest = stored.renditions or pending_manifest(stored.name, size=stored.size, sha256=stored.sha256)
+    item.photo_url = stored.url
+    item.photo_renditions = manifest
+    db.session.commit()
+    return manifest
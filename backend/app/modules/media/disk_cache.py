@@ -0,0 +1,189 @@
+"""Size-bounded LRU of files on local disk, shared by every worker on a host.
+
+Used by the resized-image cache (``resize.py``) and the read-through copy
+of remote uploads (``read_cache.py``). Entries are plain files under
+``root``, named by key:
+
+- a hit is one ``stat``. Recency is the file mtime, refreshed at most once a
+  minute
+- writes go to a temp file in the target folder and are renamed into place,
+  so readers never see a partial file
+- each worker keeps a running estimate of the bytes on disk. When it passes
+  ``max_bytes`` the directory is rescanned and the least recently used files
+  are deleted down to 90%
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Callable
+
+# Only refresh a hit's mtime when it is older than this (seconds)
+_TOUCH_INTERVAL = 60
+_LOW_WATERMARK = 0.9
+
+
+class DiskLRU:
+    """Files under ``root`` keyed by relative path, evicted least recently used first.
+
+    ``stats`` is a dataclass with at least hits, misses, errors, evictions,
+    evicted_bytes and sweeps counters.
+    """
+
+    def __init__(self, root: str, max_bytes: int, stats) -> None:
+        self.root = os.path.abspath(root)
+        self.max_bytes = max(0, int(max_bytes))
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._building: dict[str, threading.Lock] = {}
+        # Bytes on disk as last scanned plus what this worker has written since
+        self._approx_bytes: int | None = None
+        self._files = 0
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def lookup(self, key: str, not_before: float | None = None) -> str | None:
+        """Path of a cached copy (newer than ``not_before`` when given), refreshing its recency."""
+        path = self.path(key)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not_before is not None and st.st_mtime < not_before:
+            return None
+        now = time.time()
+        if now - st.st_mtime > _TOUCH_INTERVAL:
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+        return path
+
+    def get_or_fill(self, key: str, fill: Callable[[BinaryIO], None], not_before: float | None = None) -> tuple[str, bool]:
+        """Return (path, hit). On a miss ``fill`` writes the entry into an open file.
+
+        Concurrent misses for one key in this worker wait for a single fill.
+        """
+        path = self.lookup(key, not_before)
+        if path:
+            self._count(hits=1)
+            return path, True
+        with self._lock:
+            build_lock = self._building.setdefault(key, threading.Lock())
+        with build_lock:
+            # Another thread may have finished it while we waited
+            path = self.lookup(key, not_before)
+            if path:
+                self._count(hits=1)
+                return path, True
+            self._count(misses=1)
+            try:
+                path = self._write(key, fill)
+            except Exception:
+                self._count(errors=1)
+                raise
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+        size = os.path.getsize(path)
+        self.filled(size)
+        self._account(size, keep=path)
+        return path, False
+
+    def filled(self, size: int) -> None:
+        """Hook for subclasses to count a completed fill."""
+
+    # -- internals --------------------------------------------------------
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for name, n in deltas.items():
+                setattr(self.stats, name, getattr(self.stats, name) + n)
+
+    def _write(self, key: str, fill: Callable[[BinaryIO], None]) -> str:
+        path = self.path(key)
+        if not os.path.abspath(path).startswith(self.root + os.sep):
+            raise ValueError("cache key escapes the cache folder")
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".fill-", dir=folder)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                fill(out)
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        return path
+
+    def _account(self, added: int, keep: str | None = None) -> None:
+        if not self.max_bytes:
+            return
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = 0
+                need_scan = True
+            else:
+                self._approx_bytes += added
+                self._files += 1
+                need_scan = self._approx_bytes > self.max_bytes
+        if need_scan:
+            self.sweep(keep=keep)
+
+    def _scan(self) -> list[tuple[float, int, str]]:
+        entries: list[tuple[float, int, str]] = []
+        for folder, _dirs, files in os.walk(self.root):
+            for name in files:
+                if name.startswith("."):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def sweep(self, keep: str | None = None) -> dict:
+        """Rescan the cache and delete least recently used files above the low watermark.
+
+        ``keep`` (the file just written, about to be sent) is never evicted.
+        """
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        evicted = evicted_bytes = 0
+        if self.max_bytes and total > self.max_bytes:
+            target = int(self.max_bytes * _LOW_WATERMARK)
+            for _mtime, size, path in sorted(entries):
+                if total <= target:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+                evicted_bytes += size
+        with self._lock:
+            self._approx_bytes = total
+            self._files = len(entries) - evicted
+            self.stats.sweeps += 1
+            self.stats.evictions += evicted
+            self.stats.evicted_bytes += evicted_bytes
+        return {"files": len(entries) - evicted, "bytes": total, "evicted": evicted, "evictedBytes": evicted_bytes}
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats.to_dict(),
+                "approxBytes": self._approx_bytes,
+                "approxFiles": self._files if self._approx_bytes is not None else None,
+                "maxBytes": self.max_bytes,
+            }
@@ -0,0 +1,225 @@
+"""Sweeper for stored media that no item references any more.
+
+Deleting or rejecting an item removes the row but not its photo, thumbnail
+or srcset renditions, and abandoned submissions can leave an upload with no
+item at all. ``sweep_orphans`` walks the storage backend in batches:
+
+1. every object is mapped to the upload it belongs to, by its stem:
+   ``<stem>.jpg``, ``thumbs/<stem>.webp``, ``renditions/640/<stem>.jpg``.
+   In the sharded layout the stem includes its ``ab/cd/`` directories
+2. objects written less than MEDIA_GC_GRACE_HOURS ago are kept. This covers
+   uploads whose item is still being created and renditions in progress
+3. indexed queries per batch find the stems still used as an item's
+   manifest ``source``, or named by an item's ``/uploads/`` photo URL or
+   external-manifest thumb. Client-supplied ``photoUrl`` values pointing at
+   our own uploads have no ``source``; their flat names also match files
+   since moved into the sharded layout
+4. content-addressed blobs (``blobs.py``) are also kept while they have
+   references or were claimed within the grace period. Unreferenced blob rows
+   are deleted in the same pass, before their files
+
+Everything else is deleted, unless ``dry_run``; expired resumable upload
+sessions (``resumable.py``) go too. The run's counters (objects
+and bytes scanned, deleted, reclaimed) are returned, logged, and saved in
+app setting ``media.gc.last_run`` for ``GET /admin/media/gc``.
+
+Items created before manifests existed do not record their source, so the
+sweep refuses to run until ``flask media backfill-manifests`` has covered them.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from flask import current_app
+from sqlalchemy import and_, delete, func, or_, select
+
+from ...export import batched
+from ...extensions import db
+from ...models.app_setting import AppSetting
+from ...models.item import Item, upload_url_stem
+from ...models.media_blob import MediaBlob
+from .layout import flat_name, split_prefix
+from .resumable import expire_sessions
+from .storage import StoredObject, get_storage
+
+log = logging.getLogger(__name__)
+
+LAST_RUN_SETTING = "media.gc.last_run"
+
+
+class UnmanifestedItems(RuntimeError):
+    """Some items still lack a media manifest, so their files cannot be attributed."""
+
+
+def owner_stem(rel: str) -> str:
+    """The upload an object belongs to: its path without extension, minus the thumbs/renditions prefix."""
+    return os.path.splitext(split_prefix(rel)[1])[0]
+
+
+def photo_stem_expr():
+    # Must match idx_items_photo_stem exactly for the planner to use it
+    return func.regexp_replace(Item.photo_renditions["source"].astext, r"\.[^./]*$", "")
+
+
+def _url_stem_queries():
+    # Expressions and predicates must match idx_items_photo_url_stem / idx_items_external_thumb_stem
+    thumb = Item.photo_renditions["thumb"].astext
+    return (
+        (upload_url_stem(Item.photo_url), Item.photo_url.like("%/uploads/%")),
+        (
+            upload_url_stem(thumb),
+            and_(thumb.like("%/uploads/%"), Item.photo_renditions["status"].astext == "external"),
+        ),
+    )
+
+
+def _referenced_stems(stems: Iterable[str]) -> set[str]:
+    stems = list(stems)
+    if not stems:
+        return set()
+    expr = photo_stem_expr()
+    referenced = set(db.session.execute(select(expr).where(expr.in_(stems)).distinct()).scalars())
+
+    # URL stem -> stored stems it refers to (itself, and sharded files by their old flat name)
+    by_url: dict[str, set[str]] = {}
+    for stem in stems:
+        by_url.setdefault(stem, set()).add(stem)
+        flat = flat_name(stem)
+        if flat:
+            by_url.setdefault(flat, set()).add(stem)
+    for url_expr, where in _url_stem_queries():
+        q = select(url_expr).where(where, url_expr.in_(list(by_url))).distinct()
+        for url_stem in db.session.execute(q).scalars():
+            referenced |= by_url.get(url_stem, set())
+    return referenced
+
+
+def _kept_blobs(shas: set[str], cutoff: datetime) -> set[str]:
+    if not shas:
+        return set()
+    q = select(MediaBlob.sha256).where(
+        MediaBlob.sha256.in_(shas),
+        or_(MediaBlob.ref_count > 0, MediaBlob.updated_at >= cutoff),
+    )
+    return set(db.session.execute(q).scalars())
+
+
+def _drop_blob_rows(shas: set[str], cutoff: datetime) -> int:
+    if not shas:
+        return 0
+    stmt = (
+        delete(MediaBlob)
+        .where(MediaBlob.sha256.in_(shas), MediaBlob.ref_count <= 0, MediaBlob.updated_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    return int(db.session.execute(stmt).rowcount or 0)
+
+
+def _unmanifested_count() -> int:
+    return int(
+        db.session.execute(
+            select(func.count(Item.id)).where(
+                Item.photo_url.isnot(None),
+                # JSON 'null' can be left behind by rows written before none_as_null
+                or_(Item.photo_renditions.is_(None), func.jsonb_typeof(Item.photo_renditions) == "null"),
+            )
+        ).scalar()
+        or 0
+    )
+
+
+def sweep_orphans(dry_run: bool = False, grace_hours: float | None = None, batch_size: int | None = None) -> dict:
+    """Delete stored objects no item uses; returns counters for the run."""
+    cfg = current_app.config
+    grace = float(cfg.get("MEDIA_GC_GRACE_HOURS", 24) if grace_hours is None else grace_hours)
+    size = max(1, int(batch_size or cfg.get("MEDIA_GC_BATCH_SIZE") or 1000))
+    missing = _unmanifested_count()
+    if missing:
+        raise UnmanifestedItems(f"{missing} items have no media manifest; run `flask media backfill-manifests` first")
+
+    started = time.monotonic()
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=grace)
+    cutoff_ts = cutoff.timestamp()
+    storage = get_storage()
+    stats = {
+        "dryRun": bool(dry_run),
+        "graceHours": grace,
+        "scanned": 0,
+        "scannedBytes": 0,
+        "recent": 0,
+        "referenced": 0,
+        "orphaned": 0,
+        "deleted": 0,
+        "bytesReclaimed": 0,
+        "blobRowsDeleted": 0,
+        "errors": 0,
+    }
+
+    batch: list[StoredObject]
+    for batch in batched(storage.iter_objects(), size):
+        stats["scanned"] += len(batch)
+        stats["scannedBytes"] += sum(o.size for o in batch)
+        old = []
+        for obj in batch:
+            if obj.modified is not None and obj.modified >= cutoff_ts:
+                stats["recent"] += 1
+            else:
+                old.append(obj)
+        if not old:
+            continue
+
+        stems = {owner_stem(o.rel) for o in old}
+        orphan_stems = stems - _referenced_stems(stems)
+        shas = {os.path.basename(s) for s in orphan_stems}
+        kept = _kept_blobs(shas, cutoff)
+        if not dry_run:
+            stats["blobRowsDeleted"] += _drop_blob_rows(shas - kept, cutoff)
+            db.session.commit()
+        else:
+            db.session.rollback()
+
+        for obj in old:
+            stem = owner_stem(obj.rel)
+            if stem not in orphan_stems or os.path.basename(stem) in kept:
+                stats["referenced"] += 1
+                continue
+            stats["orphaned"] += 1
+            if dry_run:
+                stats["bytesReclaimed"] += obj.size
+                continue
+            try:
+                storage.delete(obj.rel)
+            except Exception as e:
+                stats["errors"] += 1
+                log.warning("media gc: could not delete %s: %s", obj.rel, e)
+                continue
+            stats["deleted"] += 1
+            stats["bytesReclaimed"] += obj.size
+
+    if not dry_run:
+        # Abandoned resumable upload sessions on this host
+        stats["resumableExpired"] = expire_sessions()
+    stats["durationMs"] = int((time.monotonic() - started) * 1000)
+    stats["finishedAt"] = datetime.now(timezone.utc).isoformat()
+    log.info("media gc: %s", stats)
+    if not dry_run:
+        try:
+            AppSetting.set(LAST_RUN_SETTING, json.dumps(stats))
+        except Exception:
+            db.session.rollback()
+    return stats
+
+
+def last_run() -> dict | None:
+    raw = AppSetting.get(LAST_RUN_SETTING, None)
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
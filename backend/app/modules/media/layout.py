@@ -0,0 +1,85 @@
+"""Two-level fan-out for upload paths: ``ab/cd/<name>``.
+
+With MEDIA_LAYOUT=sharded (the default) new uploads are written as
+``<k[0:2]>/<k[2:4]>/<name>``. ``k`` is the file's stem when it is hex (SHA-256
+and token_hex names, already uniformly distributed), otherwise the MD5 of
+the stem. Derived files keep the same fan-out, because ``renditions.py``
+builds their paths from the upload's stem: ``thumbs/ab/cd/<stem>.webp`` and
+``renditions/640/ab/cd/<stem>.jpg``. So no directory holds more than a few
+hundred files even at millions of uploads.
+
+Older flat paths (``<name>``, ``thumbs/<name>``, ``renditions/<w>/<name>``)
+keep resolving. Local lookups that miss try the sharded equivalent, so
+``/uploads/<name>`` URLs stored in items, social posts or browser caches
+still work once ``flask media shard-layout`` has moved the file.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+
+from flask import current_app
+
+_HEX = re.compile(r"^[0-9a-f]{4,}$")
+# token_hex(16) or SHA-256 names + optional extension as the last path segment
+_HEX_NAME = re.compile(r"(?:^|/)(?:[0-9a-f]{32}|[0-9a-f]{64})(?:\.[A-Za-z0-9]{1,10})?$")
+
+
+def _fanout_key(stem: str) -> str:
+    stem = stem.lower()
+    return stem if _HEX.match(stem) else hashlib.md5(stem.encode("utf-8")).hexdigest()
+
+
+def shard(name: str) -> str:
+    """``name`` (a bare file name) placed in its two-level fan-out directory."""
+    base = os.path.basename(name)
+    key = _fanout_key(os.path.splitext(base)[0])
+    return f"{key[:2]}/{key[2:4]}/{base}"
+
+
+def split_prefix(rel: str) -> tuple[str, str]:
+    """("thumbs/" | "renditions/<w>/" | "", remainder)."""
+    parts = rel.split("/")
+    if parts[0] == "thumbs" and len(parts) > 1:
+        return "thumbs/", "/".join(parts[1:])
+    if parts[0] == "renditions" and len(parts) > 2 and parts[1].isdigit():
+        return f"renditions/{parts[1]}/", "/".join(parts[2:])
+    return "", rel
+
+
+def sharded_equivalent(rel: str) -> str | None:
+    """Where a flat path lives in the sharded layout; None when ``rel`` is not flat."""
+    prefix, tail = split_prefix(rel)
+    if not tail or "/" in tail:
+        return None
+    return prefix + shard(tail)
+
+
+def flat_name(rel: str) -> str | None:
+    """Inverse of ``shard``: ``name`` for ``ab/cd/<name>`` when that is where ``shard`` puts it."""
+    parts = rel.split("/")
+    if len(parts) != 3 or not parts[2]:
+        return None
+    return parts[2] if shard(parts[2]) == rel else None
+
+
+def is_flat(rel: str) -> bool:
+    return sharded_equivalent(rel) is not None
+
+
+def immutable_name(rel: str) -> bool:
+    """Random-hex and content-hash names are never rewritten in place (nor their thumbs/renditions)."""
+    return bool(_HEX_NAME.search(rel))
+
+
+def sharded_layout() -> bool:
+    try:
+        return (current_app.config.get("MEDIA_LAYOUT") or "sharded").strip().lower() == "sharded"
+    except RuntimeError:  # outside an app context
+        return True
+
+
+def upload_name(name: str) -> str:
+    """Storage path for a new upload called ``name`` under the configured layout."""
+    return shard(name) if sharded_layout() else name
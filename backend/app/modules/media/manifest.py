@@ -0,0 +1,340 @@
+"""Per-item media manifest: the serializer-facing view and the backfill.
+
+``Item.photo_renditions`` is the persisted media record for an item's photo
+(see ``renditions.py`` for its shape). Everything that serializes items
+reads photo URLs through ``photo_fields()``, which only looks at the row
+and never at storage, so listing 200 items costs no stat() or HEAD calls.
+
+Rows created before the manifest existed are filled in by
+``backfill_manifests()`` (``flask media backfill-manifests``), which adds the
+column if needed, checks storage once per item and records what it found.
+
+``shard_existing()`` (``flask media shard-layout``) moves uploads stored
+under the old flat layout into the ``ab/cd/`` fan-out (``layout.py``) and
+rewrites the manifests that point at them.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+
+from flask import Flask, current_app
+from sqlalchemy import func, select, text, update
+
+from ...extensions import db
+from ...models.item import Item
+from ...models.media_blob import MediaBlob
+from .layout import is_flat, sharded_equivalent
+from .renditions import srcset
+from .storage import LocalStorage, get_storage
+from .thumbnails import oriented_size
+
+log = logging.getLogger(__name__)
+
+# Statuses whose "thumb" can be advertised without checking storage
+_THUMB_STATUSES = ("ready", "external")
+
+
+def external_manifest(photo_url: str, thumb_url: str | None = None) -> dict:
+    """Manifest for a photo URL supplied by the client rather than uploaded here."""
+    manifest: dict = {"status": "external", "original": {"url": photo_url}}
+    if thumb_url:
+        manifest["thumb"] = thumb_url
+        manifest["thumbnail"] = {"url": thumb_url}
+    return manifest
+
+
+def thumb_url(item: Item) -> str | None:
+    manifest = item.photo_renditions
+    if isinstance(manifest, dict):
+        if manifest.get("status") in _THUMB_STATUSES:
+            return manifest.get("thumb")
+        # pending/failed/missing: clients fall back to the original photo
+        return None
+    # Not backfilled yet: nothing has verified a thumbnail, so advertise none
+    # (clients use the original) until backfill-manifests records one
+    return None
+
+
+def photo_fields(item: Item) -> dict:
+    """camelCase photo keys shared by every item serializer."""
+    manifest = item.photo_renditions if isinstance(item.photo_renditions, dict) else None
+    return {
+        "photoUrl": item.photo_url,
+        "photoThumbUrl": thumb_url(item),
+        "photoRenditions": manifest,
+        "photoSrcset": srcset(manifest, "jpeg"),
+        "photoSrcsetWebp": srcset(manifest, "webp"),
+    }
+
+
+def _upload_rel(photo_url: str) -> str | None:
+    if "/uploads/" not in photo_url:
+        return None
+    return photo_url.split("/uploads/", 1)[1].split("?", 1)[0] or None
+
+
+def _describe(storage, rel: str) -> dict | None:
+    """{url, width, height, bytes} for a stored image, or None when it is absent."""
+    if not storage.exists(rel):
+        return None
+    info: dict = {"url": storage.url(rel)}
+    try:
+        with storage.open(rel) as fh:
+            fh.seek(0, 2)
+            info["bytes"] = fh.tell()
+            fh.seek(0)
+            info["width"], info["height"] = oriented_size(fh)
+    except Exception:
+        pass
+    return info
+
+
+def manifest_for_existing(item: Item) -> dict | None:
+    """Inspect storage once and build a manifest for a pre-manifest item."""
+    if not item.photo_url:
+        return None
+    rel = _upload_rel(item.photo_url)
+    if rel is None:
+        return external_manifest(item.photo_url)
+    storage = get_storage()
+    original = _describe(storage, rel)
+    now = datetime.now(timezone.utc).isoformat()
+    if original is None:
+        ours = item.photo_url.startswith("/uploads/") or item.photo_url == storage.url(rel)
+        if not ours:
+            return external_manifest(item.photo_url)
+        return {"status": "missing", "source": rel, "verifiedAt": now}
+    manifest: dict = {
+        "status": "ready",
+        "source": rel,
+        "bytes": original.get("bytes"),
+        "original": original,
+        "sources": [],
+        "verifiedAt": now,
+    }
+    thumb = _describe(storage, f"thumbs/{rel}")
+    if thumb is not None:
+        manifest["thumbnail"] = thumb
+        manifest["thumb"] = thumb["url"]
+    return manifest
+
+
+def ensure_manifest_column() -> None:
+    """Add items.photo_renditions on databases created before it existed."""
+    db.session.execute(text("ALTER TABLE items ADD COLUMN IF NOT EXISTS photo_renditions JSONB NULL"))
+    db.session.commit()
+
+
+def backfill_manifests(batch_size: int = 200, regenerate: bool = False) -> dict:
+    """Fill photo_renditions for items that have a photo but no manifest.
+
+    With regenerate=True, uploads found in storage get a full rendition run
+    (inline, after each batch commits) instead of just recording the
+    legacy thumbnail.
+    Returns counts by resulting status.
+    """
+    from .renditions import generate_item_renditions, pending_manifest
+
+    ensure_manifest_column()
+
+    counts: dict[str, int] = {}
+    last_id = 0
+    while True:
+        rows = (
+            Item.query.filter(
+                Item.id > last_id,
+                Item.photo_url.isnot(None),
+                # JSON 'null' can be left behind by rows written before none_as_null
+                db.or_(Item.photo_renditions.is_(None), db.func.jsonb_typeof(Item.photo_renditions) == "null"),
+            )
+            .order_by(Item.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        regen_ids: list[int] = []
+        for it in rows:
+            manifest = manifest_for_existing(it)
+            if manifest is None:
+                continue
+            if regenerate and manifest["status"] == "ready":
+                manifest = pending_manifest(manifest["source"], size=manifest.get("bytes"))
+                regen_ids.append(int(it.id))
+            it.photo_renditions = manifest
+            counts[manifest["status"]] = counts.get(manifest["status"], 0) + 1
+        db.session.commit()
+        for item_id in regen_ids:
+            generate_item_renditions(item_id)
+        last_id = int(rows[-1].id)
+    return counts
+
+
+# -- flat -> sharded layout ------------------------------------------------
+
+def _manifest_rels(manifest: dict) -> set[str]:
+    """Stored paths a manifest points at: the source and every /uploads/ URL in it."""
+    rels = {manifest["source"]}
+
+    def walk(value) -> None:
+        if isinstance(value, dict):
+            for v in value.values():
+                walk(v)
+        elif isinstance(value, list):
+            for v in value:
+                walk(v)
+        elif isinstance(value, str):
+            rel = _upload_rel(value)
+            if rel:
+                rels.add(rel)
+
+    walk(manifest)
+    return rels
+
+
+def _rewrite(value, urls: dict[str, str]):
+    if isinstance(value, dict):
+        return {k: _rewrite(v, urls) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_rewrite(v, urls) for v in value]
+    if isinstance(value, str):
+        return urls.get(value, value)
+    return value
+
+
+def _move(storage: LocalStorage, rel: str, new_rel: str) -> bool:
+    """Move one file into the primary root; False when it is not stored at all."""
+    src = storage.local_path(rel)
+    if src is None:
+        return False
+    dst = os.path.join(storage.root, new_rel)
+    if os.path.abspath(src) == os.path.abspath(dst):
+        return True
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    # rename within the upload folder; copies across devices for the legacy folder
+    shutil.move(src, dst)
+    return True
+
+
+def shard_existing(batch_size: int = 200, dry_run: bool = False) -> dict:
+    """Move flat-layout uploads into the sharded layout and rewrite their manifests.
+
+    Works one distinct manifest ``source`` at a time: its original, thumbnail
+    and renditions are moved first, then every item using it (and its
+    ``media_blobs`` row) is updated in one transaction. Flat URLs keep
+    resolving throughout, because local lookups fall back to the sharded
+    path, so the run can be interrupted and restarted at any point.
+
+    Only local storage is migrated: S3 has no per-directory cost, and its
+    flat objects are served by the bucket directly. Items still pending
+    renditions are left for a later run; items without a manifest need
+    ``backfill_manifests`` first. Returns counters for the run.
+    """
+    storage = get_storage()
+    counts = {"sources": 0, "items": 0, "files": 0, "missingFiles": 0}
+    if not isinstance(storage, LocalStorage):
+        counts["skipped"] = "storage is not local"
+        return counts
+
+    source = Item.photo_renditions["source"].astext
+    last = ""
+    while True:
+        names = list(
+            db.session.execute(
+                select(source)
+                .where(
+                    source > last,
+                    ~source.contains("/"),
+                    Item.photo_renditions["status"].astext.in_(("ready", "failed")),
+                )
+                .group_by(source)
+                .order_by(source)
+                .limit(batch_size)
+            ).scalars()
+        )
+        if not names:
+            break
+        last = names[-1]
+        for name in names:
+            rows = db.session.execute(select(Item.id, Item.photo_url, Item.photo_renditions).where(source == name)).all()
+            rels: set[str] = set()
+            for row in rows:
+                rels |= _manifest_rels(row.photo_renditions)
+            # Backfilled manifests may not list the legacy thumbnail at its conventional path
+            guessed = {f"thumbs/{name}"} - rels
+            moves = {rel: sharded_equivalent(rel) for rel in rels | guessed if is_flat(rel)}
+            urls = {storage.url(rel): storage.url(new) for rel, new in moves.items()}
+            counts["sources"] += 1
+            counts["items"] += len(rows)
+            if dry_run:
+                counts["files"] += sum(1 for rel in moves if storage.local_path(rel))
+                continue
+
+            for rel, new in moves.items():
+                if _move(storage, rel, new):
+                    counts["files"] += 1
+                elif rel not in guessed:
+                    counts["missingFiles"] += 1
+
+            new_source = moves[name]
+            # Core updates: the source changes together with the blob's name, so the
+            # ref-count mapper events (blobs.py) must not see it as -1/+1
+            for row in rows:
+                manifest = _rewrite(row.photo_renditions, urls)
+                manifest["source"] = new_source
+                db.session.execute(
+                    update(Item.__table__)
+                    .where(Item.__table__.c.id == row.id)
+                    .values(photo_renditions=manifest, photo_url=urls.get(row.photo_url, row.photo_url))
+                )
+            blob = db.session.execute(select(MediaBlob.id, MediaBlob.renditions).where(MediaBlob.name == name)).first()
+            if blob is not None:
+                db.session.execute(
+                    update(MediaBlob.__table__)
+                    .where(MediaBlob.__table__.c.id == blob.id)
+                    .values(name=new_source, renditions=_rewrite(blob.renditions, urls) if blob.renditions else None)
+                )
+            db.session.commit()
+    log.info("media shard-layout: %s", counts)
+    return counts
+
+
+def _shard_in_app(app: Flask, batch_size: int) -> None:
+    with app.app_context():
+        try:
+            shard_existing(batch_size=batch_size)
+        except Exception:
+            log.exception("media shard-layout failed")
+            db.session.rollback()
+        finally:
+            db.session.remove()
+
+
+def dispatch_shard_existing(batch_size: int = 200) -> None:
+    """Run ``shard_existing`` on Celery when configured, else on a daemon thread."""
+    if os.getenv("CELERY_BROKER_URL"):
+        try:
+            from ...tasks.jobs.media import shard_media_layout as task  # type: ignore
+            task.delay(int(batch_size))
+            return
+        except Exception:
+            pass
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    threading.Thread(target=_shard_in_app, args=(app, int(batch_size)), daemon=True).start()
+
+
+def flat_sources_remaining() -> int:
+    """Distinct manifest sources still stored in the flat layout."""
+    source = Item.photo_renditions["source"].astext
+    return int(
+        db.session.execute(
+            select(func.count(func.distinct(source))).where(
+                ~source.contains("/"), Item.photo_renditions["status"].astext.in_(("ready", "failed"))
+            )
+        ).scalar()
+        or 0
+    )
@@ -0,0 +1,115 @@
+"""Local-disk read-through tier in front of remote (S3) upload storage.
+
+With S3, anything that needs an upload's bytes used to download the object
+again on every use. That included a resize miss, a rendition job and a
+Facebook photo post. And with several app hosts there was no local copy to
+fall back to. ``local_copy(rel)`` now returns a file on local disk:
+
+- a hit is one ``stat`` on MEDIA_READ_CACHE_DIR
+- a miss streams the object from the bucket straight into the cache
+  (``Storage.download``). Concurrent misses for one object in a worker share
+  one download
+- the folder is a ``DiskLRU`` (``disk_cache.py``) capped at
+  MEDIA_READ_CACHE_MAX_BYTES. Set it to 0 to turn the tier off
+
+Content-hash and random-hex names never change in place, so their copies
+are kept until evicted. Other names are refetched once their copy is older
+than MEDIA_READ_CACHE_TTL_SECONDS.
+
+Local storage needs no tier: ``local_copy`` is then just
+``Storage.local_path``. Counters (per worker) are served by
+``GET /admin/media/read-cache``.
+"""
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+
+from flask import Flask, current_app
+
+from .disk_cache import DiskLRU
+from .layout import immutable_name
+from .storage import Storage, get_storage, is_safe_rel
+
+_EXTENSION_KEY = "read_cache"
+
+
+@dataclass
+class FetchStats:
+    hits: int = 0
+    misses: int = 0
+    fetched: int = 0
+    fetched_bytes: int = 0
+    errors: int = 0
+    evictions: int = 0
+    evicted_bytes: int = 0
+    sweeps: int = 0
+
+    def to_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else None,
+            "fetched": self.fetched,
+            "fetchedBytes": self.fetched_bytes,
+            "errors": self.errors,
+            "evictions": self.evictions,
+            "evictedBytes": self.evicted_bytes,
+            "sweeps": self.sweeps,
+        }
+
+
+class ReadThroughCache(DiskLRU):
+    """Local copies of remote objects, keyed by their storage path."""
+
+    def __init__(self, root: str, max_bytes: int, ttl: float) -> None:
+        super().__init__(root, max_bytes, FetchStats())
+        self.ttl = float(ttl)
+
+    def fetch(self, storage: Storage, rel: str) -> tuple[str, bool]:
+        """(local path, hit) for ``rel``, downloading it on a miss."""
+        if not is_safe_rel(rel):
+            raise ValueError(f"invalid storage path: {rel!r}")
+        not_before = None if immutable_name(rel) else time.time() - self.ttl
+        return self.get_or_fill(rel, lambda out: storage.download(rel, out), not_before)
+
+    def filled(self, size: int) -> None:
+        self._count(fetched=1, fetched_bytes=size)
+
+
+def build_read_cache(app: Flask) -> ReadThroughCache | None:
+    max_bytes = int(app.config.get("MEDIA_READ_CACHE_MAX_BYTES") or 0)
+    if max_bytes <= 0:
+        return None
+    return ReadThroughCache(
+        root=app.config.get("MEDIA_READ_CACHE_DIR") or os.path.join(app.instance_path, "media-cache"),
+        max_bytes=max_bytes,
+        ttl=float(app.config.get("MEDIA_READ_CACHE_TTL_SECONDS") or 300),
+    )
+
+
+def get_read_cache(app: Flask | None = None) -> ReadThroughCache | None:
+    app = app or current_app._get_current_object()  # type: ignore[attr-defined]
+    if _EXTENSION_KEY not in app.extensions:
+        app.extensions[_EXTENSION_KEY] = build_read_cache(app)
+    return app.extensions[_EXTENSION_KEY]
+
+
+def local_copy(rel: str) -> str | None:
+    """A local file with the bytes of upload ``rel``; None when it is not stored or cannot be fetched."""
+    if not is_safe_rel(rel):
+        return None
+    storage = get_storage()
+    if not storage.remote:
+        return storage.local_path(rel)
+    cache = get_read_cache()
+    if cache is None:
+        return None
+    try:
+        path, _hit = cache.fetch(storage, rel)
+    except Exception as e:
+        current_app.logger.warning("media read cache: could not fetch %s: %s", rel, e)
+        return None
+    return path
@@ -0,0 +1,191 @@
+"""Background image rendition pipeline.
+
+``create_item`` only persists the original upload (or records the key of a
+direct upload, see ``direct.py``) and a pending manifest on
+``Item.photo_renditions``. The work of decoding and resizing is
+done here, off the request path: by Celery when a broker is configured,
+otherwise by a daemon thread in the web process.
+
+Manifest shape (stored as JSONB, exposed as ``photoRenditions``)::
+
+    {
+      "status": "pending" | "ready" | "failed" | "missing" | "external",
+      "source": "<file name under uploads/>",
+      "bytes": <size of the original>, "sha256": "<hex digest of the original>",
+      "original": {"url": "...", "width": 4032, "height": 3024, "bytes": 2345678},
+      "thumbnail": {"url": "...", "width": 480, "height": 360, "bytes": 12345, "format": "webp"},
+      "thumb": "<thumbnail url, kept for older readers>",
+      "thumbFormat": "webp" | "jpeg" | "png",
+      "sources": [{"width": 320, "format": "webp", "url": "...", "bytes": 1234}, ...],
+      "fallback": "<url of the largest JPEG rendition>",
+      "verifiedAt": "<ISO timestamp of the existence check>"
+    }
+
+"ready" means every listed file was confirmed to exist when the manifest
+was written, so readers never need to touch storage. "external" marks a
+photo URL that does not live in our storage (see ``media/manifest.py``).
+"""
+from __future__ import annotations
+
+import os
+import threading
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterable
+
+from flask import Flask, current_app
+from PIL import Image
+
+from ...extensions import db
+from ...models.item import Item
+from .blobs import remember_renditions
+from .direct import is_staged, promote_staged
+from .storage import get_storage
+from .uploads import open_upload
+from .thumbnails import (
+    CONTENT_TYPES,
+    EXTENSIONS,
+    THUMB_SIZE,
+    Thumbnail,
+    encode,
+    open_for_size,
+    thumbnail_from_image,
+)
+
+# Target widths for srcset; widths larger than the original are skipped
+RENDITION_WIDTHS: tuple[int, ...] = (320, 640, 1024)
+RENDITION_FORMATS: tuple[str, ...] = ("webp", "jpeg")
+
+
+def pending_manifest(source_name: str, size: int | None = None, sha256: str | None = None) -> dict:
+    manifest: dict = {"status": "pending", "source": source_name}
+    if size is not None:
+        manifest["bytes"] = int(size)
+    if sha256:
+        manifest["sha256"] = sha256
+    return manifest
+
+
+def build_renditions(src: bytes | BinaryIO, widths: Iterable[int] = RENDITION_WIDTHS) -> tuple[Thumbnail, list[tuple[int, str, bytes]], tuple[int, int]]:
+    """Decode once (reduced-scale for JPEG) and produce
+    (thumbnail, [(width, format, bytes)], original (width, height))."""
+    widths = tuple(widths)
+    img = open_for_size(src, (max(max(widths), max(THUMB_SIZE)),) * 2)
+    thumb = thumbnail_from_image(img, THUMB_SIZE)
+
+    out: list[tuple[int, str, bytes]] = []
+    src_w, src_h = img.size
+    usable = sorted({w for w in widths if w < src_w}) or [min(src_w, min(widths))]
+    # Largest first so each step resizes from the previous, smaller image
+    current = img
+    for w in sorted(usable, reverse=True):
+        h = max(1, round(src_h * w / src_w))
+        current = current.resize((w, h), Image.LANCZOS)
+        for fmt in RENDITION_FORMATS:
+            out.append((w, fmt, encode(current, fmt)))
+    out.sort(key=lambda x: (x[0], x[1]))
+    return thumb, out, img.info.get("source_size") or (src_w, src_h)
+
+
+def generate_item_renditions(item_id: int) -> dict | None:
+    """Build thumbnail + srcset renditions for an item's photo and store the manifest.
+
+    Must run inside an app context. Returns the manifest, or None when there is nothing to do.
+    """
+    item: Item | None = Item.query.get(int(item_id))
+    if not item:
+        return None
+    manifest = dict(item.photo_renditions or {})
+    source = manifest.get("source")
+    if not source:
+        return None
+    if is_staged(source):
+        # Direct upload: move it into blob storage before building anything from it
+        try:
+            manifest = dict(promote_staged(item))
+        except Exception as e:
+            db.session.rollback()
+            manifest.update({"status": "failed", "error": str(e)[:200]})
+            item.photo_renditions = manifest
+            db.session.commit()
+            return manifest
+        if manifest.get("status") == "ready":
+            return manifest
+        source = manifest["source"]
+    try:
+        with open_upload(source) as fh:
+            thumb, renditions, (orig_w, orig_h) = build_renditions(fh)
+        storage = get_storage()
+        stem = os.path.splitext(source)[0]
+        # Thumb extension follows whichever encoding came out smallest
+        thumb_rel = f"thumbs/{stem}{thumb.extension}"
+        objects = [(thumb_rel, thumb.data, thumb.content_type)]
+        sources: list[dict] = []
+        for width, fmt, data in renditions:
+            rel = f"renditions/{width}/{stem}{EXTENSIONS[fmt]}"
+            objects.append((rel, data, CONTENT_TYPES[fmt]))
+            sources.append({"width": width, "format": fmt, "url": storage.url(rel), "bytes": len(data)})
+        # Thumb + all renditions are uploaded concurrently over the pooled client
+        storage.put_many(objects)
+        # Verify once here so serializers can trust the manifest without stat calls
+        if not storage.exists(thumb_rel):
+            raise IOError(f"thumbnail {thumb_rel} missing after write")
+        jpegs = [s for s in sources if s["format"] == "jpeg"]
+        manifest.update({
+            "status": "ready",
+            "original": {
+                "url": storage.url(source),
+                "width": orig_w,
+                "height": orig_h,
+                "bytes": manifest.get("bytes"),
+            },
+            "thumbnail": {
+                "url": storage.url(thumb_rel),
+                "width": thumb.width,
+                "height": thumb.height,
+                "bytes": len(thumb.data),
+                "format": thumb.format,
+            },
+            "thumb": storage.url(thumb_rel),
+            "thumbFormat": thumb.format,
+            "sources": sources,
+            "fallback": jpegs[-1]["url"] if jpegs else None,
+            "verifiedAt": datetime.now(timezone.utc).isoformat(),
+        })
+    except Exception as e:
+        manifest.update({"status": "failed", "error": str(e)[:200]})
+    item.photo_renditions = manifest
+    # Later uploads of the same bytes reuse these files instead of rebuilding them
+    remember_renditions(source, manifest)
+    db.session.commit()
+    return manifest
+
+
+def _run_in_app(app: Flask, item_id: int) -> None:
+    with app.app_context():
+        try:
+            generate_item_renditions(item_id)
+        except Exception:
+            db.session.rollback()
+        finally:
+            db.session.remove()
+
+
+def dispatch_renditions(item_id: int) -> None:
+    """Hand rendition work to Celery when configured, else to a daemon thread."""
+    if os.getenv("CELERY_BROKER_URL"):
+        try:
+            from ...tasks.jobs.media import generate_item_renditions as task  # type: ignore
+            task.delay(int(item_id))
+            return
+        except Exception:
+            pass
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    threading.Thread(target=_run_in_app, args=(app, int(item_id)), daemon=True).start()
+
+
+def srcset(manifest: dict | None, fmt: str) -> str | None:
+    """Build an HTML srcset string for one format from a ready manifest."""
+    if not isinstance(manifest, dict) or manifest.get("status") != "ready":
+        return None
+    parts = [f"{s['url']} {s['width']}w" for s in manifest.get("sources") or [] if s.get("format") == fmt]
+    return ", ".join(parts) or None
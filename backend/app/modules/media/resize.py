@@ -0,0 +1,136 @@
+"""On-the-fly resized copies: ``GET /uploads/<path>?w=<width>&fmt=webp|jpeg``.
+
+The background pipeline (``renditions.py``) builds a fixed srcset per upload.
+This endpoint covers any other width a layout needs. Widths and formats are
+restricted to RESIZE_WIDTHS / RESIZE_FORMATS, so a client cannot fill the disk
+with arbitrary sizes.
+
+- Misses decode the original once at reduced scale (``open_for_size``),
+  resize it, encode it, and write the result to a disk cache under
+  RESIZE_CACHE_DIR. Concurrent requests for the same key in one worker wait
+  for a single build.
+- Hits are a single ``stat`` and are sent as files (``X-Accel-Redirect`` to
+  RESIZE_ACCEL_PREFIX behind nginx). Nothing is decoded.
+- The cache is shared by every worker on the host and bounded by
+  RESIZE_CACHE_MAX_BYTES (a ``DiskLRU``, see ``disk_cache.py``).
+- Originals are read with ``open_upload``, so with S3 they come from the
+  local read-through tier (``read_cache.py``) rather than a fresh download.
+
+Counters (per worker) are served by ``GET /admin/media/resize-cache``.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from dataclasses import dataclass
+
+from flask import Flask, current_app
+from PIL import Image
+
+from .disk_cache import DiskLRU
+from .thumbnails import CONTENT_TYPES, EXTENSIONS, open_for_size, encode
+from .uploads import open_upload
+
+_EXTENSION_KEY = "resize_cache"
+
+DEFAULT_WIDTHS: tuple[int, ...] = (160, 320, 480, 640, 800, 1024, 1280)
+DEFAULT_FORMATS: tuple[str, ...] = ("webp", "jpeg")
+
+class ResizeNotAllowed(ValueError):
+    """Width or format outside the configured whitelist."""
+
+
+@dataclass
+class ResizeStats:
+    hits: int = 0
+    misses: int = 0
+    generated: int = 0
+    generated_bytes: int = 0
+    errors: int = 0
+    evictions: int = 0
+    evicted_bytes: int = 0
+    sweeps: int = 0
+
+    def to_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else None,
+            "generated": self.generated,
+            "generatedBytes": self.generated_bytes,
+            "errors": self.errors,
+            "evictions": self.evictions,
+            "evictedBytes": self.evicted_bytes,
+            "sweeps": self.sweeps,
+        }
+
+
+class ResizeCache(DiskLRU):
+    """Size-bounded LRU of resized images on local disk."""
+
+    def __init__(self, root: str, max_bytes: int, widths: tuple[int, ...], formats: tuple[str, ...]) -> None:
+        super().__init__(root, max_bytes, ResizeStats())
+        self.widths = tuple(sorted(set(widths)))
+        self.formats = tuple(f for f in formats if f in CONTENT_TYPES)
+
+    # -- keys -------------------------------------------------------------
+    def check(self, width: int, fmt: str) -> None:
+        if width not in self.widths:
+            raise ResizeNotAllowed(f"w must be one of {', '.join(str(w) for w in self.widths)}")
+        if fmt not in self.formats:
+            raise ResizeNotAllowed(f"fmt must be one of {', '.join(self.formats)}")
+
+    def key(self, rel: str, width: int, fmt: str) -> str:
+        return f"{width}/{rel}{EXTENSIONS[fmt]}"
+
+    # -- lookups ----------------------------------------------------------
+    def get_or_build(self, rel: str, width: int, fmt: str, source_mtime: float | None = None) -> tuple[str, str, bool]:
+        """Return (key, path, hit), building the resized copy on a miss."""
+        self.check(width, fmt)
+        key = self.key(rel, width, fmt)
+        path, hit = self.get_or_fill(key, lambda out: out.write(self._render(rel, width, fmt)), source_mtime)
+        return key, path, hit
+
+    def filled(self, size: int) -> None:
+        self._count(generated=1, generated_bytes=size)
+
+    def _render(self, rel: str, width: int, fmt: str) -> bytes:
+        with open_upload(rel) as fh:
+            img = open_for_size(fh, (width, width))
+        src_w, src_h = img.size
+        if width < src_w:
+            img = img.resize((width, max(1, round(src_h * width / src_w))), Image.LANCZOS)
+        # Never upscale: narrower originals are re-encoded at their own size
+        return encode(img, fmt)
+
+    def info(self) -> dict:
+        return {**super().info(), "widths": list(self.widths), "formats": list(self.formats)}
+
+
+def _int_tuple(value, default: tuple[int, ...]) -> tuple[int, ...]:
+    if not value:
+        return default
+    if isinstance(value, str):
+        value = value.split(",")
+    return tuple(int(v) for v in value if str(v).strip())
+
+
+def build_resize_cache(app: Flask) -> ResizeCache:
+    formats = app.config.get("RESIZE_FORMATS") or DEFAULT_FORMATS
+    if isinstance(formats, str):
+        formats = tuple(f.strip().lower() for f in formats.split(",") if f.strip())
+    return ResizeCache(
+        root=app.config.get("RESIZE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "lostfound-resized"),
+        max_bytes=int(app.config.get("RESIZE_CACHE_MAX_BYTES") or 0),
+        widths=_int_tuple(app.config.get("RESIZE_WIDTHS"), DEFAULT_WIDTHS),
+        formats=tuple(formats),
+    )
+
+
+def get_resize_cache(app: Flask | None = None) -> ResizeCache:
+    app = app or current_app._get_current_object()  # type: ignore[attr-defined]
+    cache = app.extensions.get(_EXTENSION_KEY)
+    if cache is None:
+        cache = app.extensions[_EXTENSION_KEY] = build_resize_cache(app)
+    return cache
@@ -0,0 +1,263 @@
+"""Resumable photo uploads, modelled on tus: create, PATCH chunks at offsets, finalize.
+
+1. ``POST /items/uploads/resumable`` with ``{"contentType", "size"}`` opens a
+   session and returns its URL.
+2. ``PATCH <url>`` with ``Upload-Offset: <n>`` appends the body at ``n``.
+   The request must start where the upload currently ends, otherwise it is a
+   409 and carries the current offset. ``HEAD``/``GET <url>`` report the
+   offset, so after a dropped connection the client resends only the rest.
+3. ``POST <url>/finalize`` once ``offset == size`` copies the file to
+   storage as a staging key and returns it. That is the same ``photoKey``
+   a direct upload gives (``direct.py``), so POST /items, deduplication and
+   renditions work as they do there. The session is kept, marked finalized,
+   until it expires, so a retried finalize returns the same key.
+
+Sessions live under RESUMABLE_UPLOAD_DIR as ``<id>.part`` with an
+``<id>.json`` sidecar. The offset is the size of the part file, so whatever
+reached the disk before a connection dropped counts. Bodies are copied in
+CHUNK_SIZE pieces, so memory use does not depend on the photo size. An
+exclusive ``flock`` stops two PATCHes to one session from interleaving. All
+workers on a host share the directory; several app hosts need it on shared
+storage, or sticky routing for these URLs. Sessions older than
+RESUMABLE_UPLOAD_EXPIRES_HOURS are removed by ``expire_sessions`` (run with
+the media sweeper).
+"""
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import re
+import secrets
+import time
+from datetime import datetime, timezone
+from typing import BinaryIO
+
+from flask import current_app
+
+from .direct import CONTENT_TYPES, STAGING_PREFIX, DirectUploadError, max_bytes
+from .storage import CHUNK_SIZE, get_storage
+
+_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadSession:
+    """One resumable upload on local disk."""
+
+    def __init__(self, root: str, upload_id: str, meta: dict) -> None:
+        self.root = root
+        self.id = upload_id
+        self.meta = meta
+
+    @property
+    def size(self) -> int:
+        return int(self.meta["size"])
+
+    @property
+    def content_type(self) -> str:
+        return self.meta["contentType"]
+
+    @property
+    def part_path(self) -> str:
+        return os.path.join(self.root, f"{self.id}.part")
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.root, f"{self.id}.json")
+
+    @property
+    def finalized_key(self) -> str | None:
+        """The staging key once finalized (the part file is gone by then)."""
+        return self.meta.get("key")
+
+    def offset(self) -> int:
+        if self.finalized_key:
+            return self.size
+        try:
+            return os.path.getsize(self.part_path)
+        except OSError:
+            return 0
+
+    def expires_at(self) -> float:
+        return float(self.meta["createdAt"]) + _max_age()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "contentType": self.content_type,
+            "size": self.size,
+            "offset": self.offset(),
+            "expiresAt": datetime.fromtimestamp(self.expires_at(), timezone.utc).isoformat(),
+            "key": self.finalized_key,
+        }
+
+
+def _root() -> str:
+    root = current_app.config.get("RESUMABLE_UPLOAD_DIR") or os.path.join(current_app.instance_path, "resumable")
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def _max_age() -> float:
+    return float(current_app.config.get("RESUMABLE_UPLOAD_EXPIRES_HOURS") or 24) * 3600
+
+
+def chunk_bytes() -> int:
+    return int(current_app.config.get("RESUMABLE_CHUNK_BYTES") or 2 * 1024 * 1024)
+
+
+def create_session(content_type: str, size, owner_id: int | None = None) -> UploadSession:
+    content_type = (content_type or "").split(";", 1)[0].strip().lower()
+    if content_type not in CONTENT_TYPES:
+        raise DirectUploadError(f"contentType must be one of {', '.join(CONTENT_TYPES)}")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise DirectUploadError("size (bytes) is required")
+    if size <= 0:
+        raise DirectUploadError("size (bytes) is required")
+    limit = max_bytes()
+    if limit and size > limit:
+        raise DirectUploadError(f"File is larger than {limit} bytes", status=413)
+
+    root = _root()
+    session = UploadSession(
+        root,
+        secrets.token_hex(16),
+        {"contentType": content_type, "size": size, "owner": owner_id, "createdAt": time.time()},
+    )
+    open(session.part_path, "xb").close()
+    with open(session.meta_path, "w") as fh:
+        json.dump(session.meta, fh)
+    return session
+
+
+def _read_meta(root: str, upload_id: str) -> dict:
+    try:
+        with open(os.path.join(root, f"{upload_id}.json")) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        raise DirectUploadError("Upload not found", status=404)
+
+
+def _write_meta(session: UploadSession) -> None:
+    # Temp file + rename so readers never see a partial sidecar; the mtime stays the
+    # creation time, which expire_sessions goes by
+    tmp = f"{session.meta_path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(session.meta, fh)
+    created = float(session.meta["createdAt"])
+    os.utime(tmp, (created, created))
+    os.replace(tmp, session.meta_path)
+
+
+def get_session(upload_id: str, owner_id: int | None = None) -> UploadSession:
+    """The live session ``upload_id``; 404 when unknown or expired, 403 for someone else's."""
+    if not _ID.match(upload_id or ""):
+        raise DirectUploadError("Upload not found", status=404)
+    root = _root()
+    session = UploadSession(root, upload_id, _read_meta(root, upload_id))
+    if session.expires_at() < time.time():
+        discard(session)
+        raise DirectUploadError("Upload not found", status=404)
+    if session.meta.get("owner") is not None and session.meta.get("owner") != owner_id:
+        raise DirectUploadError("Not your upload", status=403)
+    return session
+
+
+def append_chunk(session: UploadSession, offset: int, stream: BinaryIO) -> int:
+    """Append ``stream`` at ``offset``; returns the new offset (bytes written before a failure are kept)."""
+    if session.finalized_key:
+        raise DirectUploadError("Upload is already finalized", status=409)
+    with open(session.part_path, "ab") as out:
+        try:
+            fcntl.flock(out.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            raise DirectUploadError("Another request is writing to this upload", status=409)
+        current = out.seek(0, os.SEEK_END)
+        if offset != current:
+            raise DirectUploadError(f"Upload-Offset must be {current}", status=409)
+        remaining = session.size - current
+        while True:
+            chunk = stream.read(min(CHUNK_SIZE, remaining + 1))
+            if not chunk:
+                break
+            if len(chunk) > remaining:
+                raise DirectUploadError("Chunk runs past the declared size", status=413)
+            out.write(chunk)
+            out.flush()
+            remaining -= len(chunk)
+        return session.size - remaining
+
+
+def _finalized(session: UploadSession) -> str:
+    """The key of an already finalized session, as long as the staged object still exists."""
+    key = session.finalized_key
+    if not key or not get_storage().exists(key):
+        raise DirectUploadError("Upload not found", status=404)
+    return key
+
+
+def finalize(session: UploadSession) -> str:
+    """Move a complete upload to storage as a staging key (``photoKey`` for POST /items).
+
+    Idempotent: the sidecar is kept, marked with the key, until the session
+    expires, so a client that lost the response and retries gets the same
+    key back instead of having to upload the photo again.
+    """
+    if session.finalized_key:
+        return _finalized(session)
+    try:
+        fh = open(session.part_path, "rb")
+    except FileNotFoundError:
+        # A concurrent finalize may have just finished
+        session.meta = _read_meta(session.root, session.id)
+        return _finalized(session)
+    with fh:
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            raise DirectUploadError("Upload is still being written", status=409)
+        received = os.fstat(fh.fileno()).st_size
+        if received != session.size:
+            raise DirectUploadError(f"Upload is incomplete ({received} of {session.size} bytes)", status=409)
+        # The key is derived from the session id, so a retry after a crash overwrites the same object
+        key = f"{STAGING_PREFIX}{session.id}{CONTENT_TYPES[session.content_type]}"
+        get_storage().put(key, fh, session.content_type)
+        session.meta["key"] = key
+        _write_meta(session)
+    try:
+        os.unlink(session.part_path)
+    except FileNotFoundError:
+        pass
+    return key
+
+
+def discard(session: UploadSession) -> None:
+    for path in (session.meta_path, session.part_path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def expire_sessions() -> int:
+    """Delete sessions created more than RESUMABLE_UPLOAD_EXPIRES_HOURS ago; returns how many went."""
+    root = _root()
+    cutoff = time.time() - _max_age()
+    removed = 0
+    for name in os.listdir(root):
+        upload_id, ext = os.path.splitext(name)
+        if not _ID.match(upload_id):
+            continue
+        path = os.path.join(root, name)
+        try:
+            # The sidecar is written once, so its mtime is the creation time
+            if ext == ".json" and os.path.getmtime(path) < cutoff:
+                discard(UploadSession(root, upload_id, {}))
+                removed += 1
+            elif ext == ".part" and not os.path.exists(os.path.join(root, f"{upload_id}.json")) and os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+        except OSError:
+            continue
+    return removed
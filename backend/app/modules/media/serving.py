@@ -0,0 +1,205 @@
+"""``GET /uploads/<path>``: local storage, or the local read cache of S3.
+
+Flask only decides which file answers a request. With
+UPLOADS_ACCEL_REDIRECT set (behind nginx), it replies with an empty body and
+an ``X-Accel-Redirect`` to an ``internal`` nginx location aliased to the
+matching upload root. nginx then sends the file with sendfile, and handles
+Range, If-Modified-Since and If-None-Match itself. Without it (dev server,
+no nginx), the file is sent in-process with ``send_file``, which supports
+the same conditional and Range requests.
+
+The primary upload folder and the legacy one are resolved once per path
+and remembered in a bounded map, so repeat hits cost no ``stat`` calls. Misses
+are not remembered, because the file may still be being written (renditions).
+Flat paths from before the sharded layout (``layout.py``) fall back to their
+sharded location. They are only remembered once found there, since
+``flask media shard-layout`` may still move them.
+
+Files named by ``secrets.token_hex(16)`` (older uploads) or by their SHA-256
+(``blobs.py``) never change in place, and thumbs/renditions reuse the upload's stem. They are
+served ``immutable`` for a year. Anything else revalidates on each use.
+
+``?w=<width>&fmt=webp|jpeg`` returns a resized copy instead (see ``resize.py``).
+
+With S3 storage, paths not found locally are served from the read-through
+tier (``read_cache.py``), with ``X-Accel-Redirect`` to
+MEDIA_READ_CACHE_ACCEL_PREFIX behind nginx. So resizing works there too and
+each host downloads an object once.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+
+from flask import Flask, abort, current_app, jsonify, request, send_file
+from werkzeug.security import safe_join
+
+from .read_cache import get_read_cache, local_copy
+from .resize import ResizeNotAllowed, get_resize_cache
+from .layout import immutable_name, is_flat, sharded_equivalent, sharded_layout
+from .storage import LEGACY_UPLOAD_FOLDER, get_storage
+from .thumbnails import CONTENT_TYPES
+
+_EXTENSION_KEY = "upload_resolver"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+def cache_control_for(rel: str) -> str:
+    return IMMUTABLE_CACHE_CONTROL if immutable_name(rel) else REVALIDATE_CACHE_CONTROL
+
+
+class UploadResolver:
+    """Maps a requested upload path to (root, accel prefix, stored path), remembering hits."""
+
+    def __init__(self, roots: list[tuple[str, str | None]], max_entries: int = 4096, sharded: bool = True) -> None:
+        # [(directory, X-Accel-Redirect prefix or None)], in lookup order
+        self.roots = roots
+        self.max_entries = max(0, int(max_entries))
+        self.sharded = sharded
+        self._hits: OrderedDict[str, tuple[int, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, rel: str) -> tuple[str, str | None, str] | None:
+        with self._lock:
+            hit = self._hits.get(rel)
+            if hit is not None:
+                self._hits.move_to_end(rel)
+                idx, stored = hit
+                return (*self.roots[idx], stored)
+        alt = sharded_equivalent(rel) if self.sharded else None
+        for stored in (rel, alt) if alt else (rel,):
+            for idx, (base, prefix) in enumerate(self.roots):
+                path = safe_join(base, stored)
+                if path and os.path.isfile(path):
+                    # A flat file may still be moved into the sharded layout
+                    if self.max_entries and not (self.sharded and is_flat(stored)):
+                        with self._lock:
+                            self._hits[rel] = (idx, stored)
+                            while len(self._hits) > self.max_entries:
+                                self._hits.popitem(last=False)
+                    return base, prefix, stored
+        return None
+
+    def forget(self, rel: str) -> None:
+        with self._lock:
+            self._hits.pop(rel, None)
+
+
+def _accel_prefix(value: str | None) -> str | None:
+    if not value:
+        return None
+    return "/" + value.strip("/") + "/"
+
+
+def build_resolver(app: Flask) -> UploadResolver:
+    primary = _accel_prefix(app.config.get("UPLOADS_ACCEL_REDIRECT"))
+    roots: list[tuple[str, str | None]] = [(app.config["UPLOAD_FOLDER"], primary)]
+    if os.path.abspath(LEGACY_UPLOAD_FOLDER) != os.path.abspath(app.config["UPLOAD_FOLDER"]):
+        legacy = _accel_prefix(app.config.get("UPLOADS_ACCEL_LEGACY_PREFIX")) if primary else None
+        roots.append((LEGACY_UPLOAD_FOLDER, legacy))
+    with app.app_context():
+        sharded = sharded_layout()
+    return UploadResolver(roots, max_entries=int(app.config.get("UPLOADS_RESOLVE_CACHE_SIZE") or 0), sharded=sharded)
+
+
+def get_resolver(app: Flask | None = None) -> UploadResolver:
+    app = app or current_app._get_current_object()  # type: ignore[attr-defined]
+    resolver = app.extensions.get(_EXTENSION_KEY)
+    if resolver is None:
+        resolver = app.extensions[_EXTENSION_KEY] = build_resolver(app)
+    return resolver
+
+
+def _serve_resized(filename: str, base: str | None, stored: str):
+    """``?w=&fmt=``: a resized copy from the disk cache, built on first request."""
+    fmt = (request.args.get("fmt") or "webp").strip().lower()
+    fmt = "jpeg" if fmt == "jpg" else fmt
+    try:
+        width = int(request.args.get("w") or "")
+    except ValueError:
+        return jsonify({"error": "w must be an integer width"}), 400
+    immutable = cache_control_for(filename) == IMMUTABLE_CACHE_CONTROL
+    cache = get_resize_cache()
+    try:
+        cache.check(width, fmt)
+        # Mutable names invalidate copies older than the original
+        source_mtime = None if immutable or base is None else os.stat(safe_join(base, stored)).st_mtime
+        key, path, hit = cache.get_or_build(stored, width, fmt, source_mtime)
+    except ResizeNotAllowed as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError:
+        get_resolver().forget(filename)
+        abort(404)
+    except Exception:
+        current_app.logger.exception("resize failed for %s", filename)
+        return jsonify({"error": "Could not resize this file"}), 422
+
+    accel = _accel_prefix(current_app.config.get("RESIZE_ACCEL_PREFIX")) if current_app.config.get("UPLOADS_ACCEL_REDIRECT") else None
+    if accel:
+        resp = current_app.response_class(status=200)
+        resp.headers["X-Accel-Redirect"] = accel + quote(key)
+        resp.headers["Content-Type"] = CONTENT_TYPES[fmt]
+    else:
+        resp = send_file(path, mimetype=CONTENT_TYPES[fmt], conditional=True, etag=True)
+    resp.headers["Cache-Control"] = cache_control_for(filename)
+    resp.headers["X-Resize-Cache"] = "HIT" if hit else "MISS"
+    return resp
+
+
+def serve_upload(filename: str):
+    # Temp files from in-flight writes (".upload-*") and other dotfiles are never served
+    if any(part.startswith(".") for part in filename.split("/")):
+        abort(404)
+    resolver = get_resolver()
+    for _ in range(2):
+        found = resolver.resolve(filename)
+        if found is None:
+            return _serve_remote(filename)
+        base, prefix, stored = found
+        if "w" in request.args:
+            return _serve_resized(filename, base, stored)
+        if prefix:
+            resp = current_app.response_class(status=200)
+            resp.headers["X-Accel-Redirect"] = prefix + quote(stored)
+            resp.headers["Content-Type"] = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            resp.headers["Cache-Control"] = cache_control_for(filename)
+            return resp
+        try:
+            resp = send_file(safe_join(base, stored), conditional=True, etag=True)
+        except FileNotFoundError:
+            # Deleted since it was remembered; look again
+            resolver.forget(filename)
+            continue
+        resp.headers["Cache-Control"] = cache_control_for(filename)
+        return resp
+    abort(404)
+
+
+def _serve_remote(filename: str):
+    """An S3 object through the local read cache; 404 with local storage or the cache off."""
+    storage = get_storage()
+    if not storage.remote or get_read_cache() is None:
+        abort(404)
+    path = local_copy(filename)
+    if path is None:
+        abort(404)
+    if "w" in request.args:
+        return _serve_resized(filename, None, filename)
+    accel = _accel_prefix(current_app.config.get("MEDIA_READ_CACHE_ACCEL_PREFIX")) if current_app.config.get("UPLOADS_ACCEL_REDIRECT") else None
+    if accel:
+        resp = current_app.response_class(status=200)
+        resp.headers["X-Accel-Redirect"] = accel + quote(filename)
+        resp.headers["Content-Type"] = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    else:
+        resp = send_file(path, conditional=True, etag=True)
+    resp.headers["Cache-Control"] = cache_control_for(filename)
+    return resp
+
+
+def init_upload_serving(app: Flask) -> None:
+    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+    app.add_url_rule("/uploads/<path:filename>", endpoint="uploads", view_func=serve_upload, methods=["GET"])
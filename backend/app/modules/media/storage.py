@@ -0,0 +1,386 @@
+"""Storage backends for uploaded media.
+
+One backend instance is created per process (per Flask app) and reused, so
+the S3 client, its connection pool and its TLS sessions survive across
+requests instead of being rebuilt for every upload. All paths are relative
+to the uploads root, e.g. ``"ab/cd/abcd12.jpg"`` or ``"renditions/640/ab/cd/abcd12.webp"``
+(see ``layout.py``).
+
+Backends:
+
+- ``LocalStorage``:  files under UPLOAD_FOLDER (plus the legacy backend/uploads)
+- ``S3Storage``:     any S3-compatible bucket under the ``uploads/`` prefix
+- ``MemoryStorage``: in-process dict, for scripts and local experiments
+  without MinIO
+
+Select with MEDIA_STORAGE = "local" | "s3" | "memory"; by default S3 is used
+when S3_BUCKET_NAME is set.
+"""
+from __future__ import annotations
+
+import abc
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import BinaryIO, Iterable, Iterator
+
+from flask import Flask, current_app
+
+from .layout import sharded_equivalent
+
+CHUNK_SIZE = 1024 * 1024
+
+# Legacy location (when the previous default used os.getcwd() under backend)
+LEGACY_UPLOAD_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "uploads"))
+
+_EXTENSION_KEY = "media_storage"
+_lock = threading.Lock()
+
+
+def is_safe_rel(rel: str | None) -> bool:
+    """True for a plain relative storage path: no leading "/", no empty, "." or ".." segments, no dotfiles."""
+    if not rel or rel.startswith("/") or "\\" in rel:
+        return False
+    return not any(not part or part.startswith(".") for part in rel.split("/"))
+
+
+@dataclass
+class StoredObject:
+    rel: str
+    size: int
+    # Unix time of the last write; None when the backend does not know
+    modified: float | None
+
+
+class Storage(abc.ABC):
+    """Interface shared by all backends."""
+
+    # Reads cost a network round trip (served through read_cache.py)
+    remote = False
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self._executor: ThreadPoolExecutor | None = None
+
+    # -- required -----------------------------------------------------------
+    @abc.abstractmethod
+    def put(self, rel: str, data: bytes | BinaryIO, content_type: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def open(self, rel: str) -> BinaryIO:
+        ...
+
+    @abc.abstractmethod
+    def exists(self, rel: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def delete(self, rel: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def iter_objects(self) -> Iterator[StoredObject]:
+        """Every stored object (temp files from in-flight writes excluded), in no particular order."""
+
+    def url(self, rel: str) -> str:
+        return f"/uploads/{rel}"
+
+    def rel_for_url(self, url: str) -> str | None:
+        """Inverse of ``url()``: the stored path behind one of our URLs, else None."""
+        path = url.split("?", 1)[0]
+        if "/uploads/" not in path:
+            return None
+        return path.split("/uploads/", 1)[1] or None
+
+    # -- optional -----------------------------------------------------------
+    def download(self, rel: str, out: BinaryIO) -> None:
+        """Copy ``rel`` into the open file ``out``."""
+        with self.open(rel) as fh:
+            while chunk := fh.read(CHUNK_SIZE):
+                out.write(chunk)
+
+    def local_path(self, rel: str) -> str | None:
+        """Filesystem path for ``rel`` when the backend stores files locally."""
+        return None
+
+    def presigned_put(self, rel: str, content_type: str, size: int, expires: int) -> tuple[str, dict[str, str]] | None:
+        """(URL, required headers) for a client to PUT ``rel`` straight to the backend, when supported."""
+        return None
+
+    def put_many(self, objects: Iterable[tuple[str, bytes | BinaryIO, str]]) -> None:
+        """Write several objects concurrently; raises the first failure."""
+        objects = list(objects)
+        if len(objects) <= 1 or self.max_workers == 1:
+            for rel, data, ctype in objects:
+                self.put(rel, data, ctype)
+            return
+        if self._executor is None:
+            with _lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="media-put")
+        futures = [self._executor.submit(self.put, rel, data, ctype) for rel, data, ctype in objects]
+        for f in futures:
+            f.result()
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: str, legacy_roots: Iterable[str] = (), max_workers: int = 4) -> None:
+        super().__init__(max_workers=max_workers)
+        self.root = root
+        self.legacy_roots = [r for r in legacy_roots if r and os.path.abspath(r) != os.path.abspath(root)]
+
+    @staticmethod
+    def _contained(base: str, rel: str) -> str | None:
+        """Absolute path of ``rel`` under ``base``; None when it would resolve outside it."""
+        path = os.path.abspath(os.path.join(base, rel))
+        return path if path.startswith(os.path.abspath(base) + os.sep) else None
+
+    def _path(self, rel: str) -> str:
+        path = self._contained(self.root, rel)
+        if path is None:
+            raise ValueError("path escapes the upload folder")
+        return path
+
+    def put(self, rel: str, data: bytes | BinaryIO, content_type: str) -> None:
+        path = self._path(rel)
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        # Temp file in the same directory + rename: readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(prefix=".upload-", dir=folder)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                if isinstance(data, (bytes, bytearray)):
+                    out.write(data)
+                else:
+                    while True:
+                        chunk = data.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def local_path(self, rel: str) -> str | None:
+        # Flat paths from before the sharded layout may have been moved by `flask media shard-layout`
+        alt = sharded_equivalent(rel)
+        for candidate_rel in (rel, alt) if alt else (rel,):
+            for base in [self.root, *self.legacy_roots]:
+                candidate = self._contained(base, candidate_rel)
+                if candidate and os.path.isfile(candidate):
+                    return candidate
+        return None
+
+    def open(self, rel: str) -> BinaryIO:
+        path = self.local_path(rel)
+        if not path:
+            raise FileNotFoundError(rel)
+        return open(path, "rb")
+
+    def exists(self, rel: str) -> bool:
+        return self.local_path(rel) is not None
+
+    def iter_objects(self) -> Iterator[StoredObject]:
+        # Primary root only: the legacy folder is read-only
+        root = os.path.abspath(self.root)
+        for folder, dirs, files in os.walk(root):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                if name.startswith("."):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield StoredObject(os.path.relpath(path, root).replace(os.sep, "/"), st.st_size, st.st_mtime)
+
+    def delete(self, rel: str) -> None:
+        try:
+            os.unlink(self._path(rel))
+        except FileNotFoundError:
+            pass
+
+
+class S3Storage(Storage):
+    remote = True
+
+    def __init__(
+        self,
+        bucket: str,
+        region: str | None = None,
+        endpoint_url: str | None = None,
+        access_key_id: str | None = None,
+        secret_access_key: str | None = None,
+        public_url_base: str | None = None,
+        prefix: str = "uploads",
+        max_workers: int = 4,
+        max_pool_connections: int = 16,
+    ) -> None:
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.client import Config as BotoConfig
+
+        super().__init__(max_workers=max_workers)
+        self.bucket = bucket
+        self.region = region
+        self.prefix = prefix.strip("/")
+        self.public_url_base = public_url_base.rstrip("/") if public_url_base else None
+        # boto3 clients are thread-safe; one client shares one urllib3 pool
+        self.client = boto3.client(
+            's3',
+            region_name=region or None,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None,
+            endpoint_url=endpoint_url or None,
+            config=BotoConfig(s3={'addressing_style': 'virtual'}, max_pool_connections=max_pool_connections),
+        )
+        # Multipart above 8MB, one 8MB part buffered at a time per transfer
+        self.transfer = TransferConfig(multipart_threshold=8 * 1024 * 1024, multipart_chunksize=8 * 1024 * 1024, max_concurrency=2)
+
+    def key(self, rel: str) -> str:
+        return f"{self.prefix}/{rel}" if self.prefix else rel
+
+    def url(self, rel: str) -> str:
+        key = self.key(rel)
+        if self.public_url_base:
+            return f"{self.public_url_base}/{key}"
+        return f"https://{self.bucket}.s3.{self.region or 'us-east-1'}.amazonaws.com/{key}"
+
+    def rel_for_url(self, url: str) -> str | None:
+        path = url.split("?", 1)[0]
+        prefix = self.url("")
+        if path.startswith(prefix):
+            return path[len(prefix):] or None
+        return super().rel_for_url(url)
+
+    def download(self, rel: str, out: BinaryIO) -> None:
+        self.client.download_fileobj(self.bucket, self.key(rel), out, Config=self.transfer)
+
+    def put(self, rel: str, data: bytes | BinaryIO, content_type: str) -> None:
+        extra = {"ContentType": content_type, "ACL": "public-read"}
+        if isinstance(data, (bytes, bytearray)):
+            self.client.put_object(Bucket=self.bucket, Key=self.key(rel), Body=bytes(data), **extra)
+        else:
+            self.client.upload_fileobj(data, self.bucket, self.key(rel), ExtraArgs=extra, Config=self.transfer)
+
+    def presigned_put(self, rel: str, content_type: str, size: int, expires: int) -> tuple[str, dict[str, str]] | None:
+        # Content-Type and Content-Length are signed, so the client cannot swap either
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self.key(rel),
+                "ContentType": content_type,
+                "ContentLength": int(size),
+                "ACL": "public-read",
+            },
+            ExpiresIn=int(expires),
+        )
+        return url, {"Content-Type": content_type, "x-amz-acl": "public-read"}
+
+    def open(self, rel: str) -> BinaryIO:
+        fh = tempfile.SpooledTemporaryFile(max_size=CHUNK_SIZE)
+        self.client.download_fileobj(self.bucket, self.key(rel), fh, Config=self.transfer)
+        fh.seek(0)
+        return fh  # type: ignore[return-value]
+
+    def exists(self, rel: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.key(rel))
+            return True
+        except Exception:
+            return False
+
+    def delete(self, rel: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(rel))
+
+    def iter_objects(self) -> Iterator[StoredObject]:
+        prefix = f"{self.prefix}/" if self.prefix else ""
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents") or []:
+                rel = obj["Key"][len(prefix):]
+                if not rel or rel.endswith("/"):
+                    continue
+                modified = obj.get("LastModified")
+                yield StoredObject(rel, int(obj.get("Size") or 0), modified.timestamp() if modified else None)
+
+
+class MemoryStorage(Storage):
+    def __init__(self, max_workers: int = 1) -> None:
+        super().__init__(max_workers=max_workers)
+        self.objects: dict[str, tuple[bytes, str]] = {}
+        self.modified: dict[str, float] = {}
+
+    def put(self, rel: str, data: bytes | BinaryIO, content_type: str) -> None:
+        if not isinstance(data, (bytes, bytearray)):
+            buf = BytesIO()
+            while True:
+                chunk = data.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                buf.write(chunk)
+            data = buf.getvalue()
+        self.objects[rel] = (bytes(data), content_type)
+        self.modified[rel] = time.time()
+
+    def open(self, rel: str) -> BinaryIO:
+        if rel not in self.objects:
+            raise FileNotFoundError(rel)
+        return BytesIO(self.objects[rel][0])
+
+    def exists(self, rel: str) -> bool:
+        return rel in self.objects
+
+    def delete(self, rel: str) -> None:
+        self.objects.pop(rel, None)
+        self.modified.pop(rel, None)
+
+    def iter_objects(self) -> Iterator[StoredObject]:
+        for rel, (data, _ctype) in list(self.objects.items()):
+            yield StoredObject(rel, len(data), self.modified.get(rel))
+
+
+def build_storage(config) -> Storage:
+    """Create the backend described by an app config mapping."""
+    kind = (config.get("MEDIA_STORAGE") or "").strip().lower()
+    if not kind:
+        kind = "s3" if config.get("S3_BUCKET_NAME") else "local"
+    workers = int(config.get("MEDIA_STORAGE_MAX_WORKERS") or 4)
+    if kind == "s3":
+        return S3Storage(
+            bucket=config["S3_BUCKET_NAME"],
+            region=config.get("S3_REGION"),
+            endpoint_url=config.get("S3_ENDPOINT_URL"),
+            access_key_id=config.get("S3_ACCESS_KEY_ID"),
+            secret_access_key=config.get("S3_SECRET_ACCESS_KEY"),
+            public_url_base=config.get("S3_PUBLIC_URL_BASE"),
+            max_workers=workers,
+            max_pool_connections=int(config.get("S3_MAX_POOL_CONNECTIONS") or 16),
+        )
+    if kind == "memory":
+        return MemoryStorage()
+    return LocalStorage(config["UPLOAD_FOLDER"], legacy_roots=[LEGACY_UPLOAD_FOLDER], max_workers=workers)
+
+
+def get_storage(app: Flask | None = None) -> Storage:
+    """Return the per-process storage backend for ``app`` (default: current_app)."""
+    app = app or current_app._get_current_object()  # type: ignore[attr-defined]
+    storage = app.extensions.get(_EXTENSION_KEY)
+    if storage is None:
+        with _lock:
+            storage = app.extensions.get(_EXTENSION_KEY)
+            if storage is None:
+                storage = build_storage(app.config)
+                app.extensions[_EXTENSION_KEY] = storage
+    return storage
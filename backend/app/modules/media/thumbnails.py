@@ -0,0 +1,148 @@
+"""Thumbnail engine with bounded decode cost.
+
+``Image.open(...).load()`` on a 12-48MP phone photo materialises the full
+bitmap (36-150MB of RGB) before anything is downscaled. For JPEG sources we
+ask libjpeg for a reduced-scale decode via ``Image.draft()`` (1/2, 1/4 or
+1/8 of the original, never smaller than the target), so the bitmap that
+reaches Python is only a little larger than the biggest output we need.
+
+Other rules applied here:
+
+- EXIF orientation is applied after the reduced decode, so phone portraits
+  are not sideways.
+- Sources whose header declares more than ``max_pixels`` are rejected
+  before decoding (decompression-bomb guard; see MEDIA_MAX_IMAGE_PIXELS).
+- Each output is encoded in the candidate formats and the smallest wins.
+  Alpha sources never fall back to JPEG.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from io import BytesIO
+from typing import BinaryIO, Iterable, Sequence
+
+from PIL import Image, ImageOps
+
+THUMB_SIZE = (480, 480)
+DEFAULT_MAX_PIXELS = 64_000_000
+
+# Candidate encodings per source kind, tried in order; smallest output wins
+OPAQUE_FORMATS: tuple[str, ...] = ("webp", "jpeg")
+ALPHA_FORMATS: tuple[str, ...] = ("webp", "png")
+
+CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+EXTENSIONS = {"webp": ".webp", "jpeg": ".jpg", "png": ".png"}
+
+
+class ImageTooLarge(ValueError):
+    """Raised when a source image declares more pixels than allowed."""
+
+
+@dataclass
+class Thumbnail:
+    data: bytes
+    format: str
+    width: int
+    height: int
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES[self.format]
+
+    @property
+    def extension(self) -> str:
+        return EXTENSIONS[self.format]
+
+
+def _max_pixels() -> int:
+    try:
+        from flask import current_app
+
+        return int(current_app.config.get("MEDIA_MAX_IMAGE_PIXELS") or DEFAULT_MAX_PIXELS)
+    except Exception:  # outside an app context (benchmarks, scripts)
+        return DEFAULT_MAX_PIXELS
+
+
+def has_alpha(img: Image.Image) -> bool:
+    return img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def open_for_size(src: bytes | BinaryIO, box: tuple[int, int], max_pixels: int | None = None) -> Image.Image:
+    """Open and decode ``src`` at the smallest scale that still covers ``box``.
+
+    ``box`` is the largest (width, height) any output will need. The result
+    is loaded and EXIF-transposed; ``img.info["source_size"]`` keeps the
+    full-resolution (oriented) dimensions.
+    """
+    fp = BytesIO(src) if isinstance(src, (bytes, bytearray)) else src
+    img = Image.open(fp)
+    limit = int(max_pixels or _max_pixels())
+    w, h = img.size
+    if w * h > limit:
+        raise ImageTooLarge(f"image is {w}x{h}, limit is {limit} pixels")
+    if img.format == "JPEG":
+        # Orientation is unknown until EXIF is applied, so cover both axes
+        side = max(box)
+        img.draft("RGB", (side, side))
+    if img.getexif().get(0x0112) in (5, 6, 7, 8):
+        w, h = h, w
+    img = ImageOps.exif_transpose(img)
+    img.load()
+    img.info["source_size"] = (w, h)
+    return img
+
+
+def encode(img: Image.Image, fmt: str) -> bytes:
+    out = BytesIO()
+    if fmt == "jpeg":
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.save(out, format="JPEG", quality=82, optimize=True, progressive=True)
+    elif fmt == "webp":
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if has_alpha(img) else "RGB")
+        img.save(out, format="WEBP", quality=80, method=4)
+    else:
+        if img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            img = img.convert("RGBA")
+        img.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def encode_smallest(img: Image.Image, formats: Sequence[str] | None = None) -> tuple[str, bytes]:
+    """Encode in each candidate format and return the smallest (format, bytes)."""
+    if formats is None:
+        formats = ALPHA_FORMATS if has_alpha(img) else OPAQUE_FORMATS
+    best: tuple[str, bytes] | None = None
+    for fmt in formats:
+        try:
+            data = encode(img, fmt)
+        except Exception:  # e.g. Pillow built without WebP
+            continue
+        if best is None or len(data) < len(best[1]):
+            best = (fmt, data)
+    if best is None:
+        raise ValueError("no usable output format")
+    return best
+
+
+def oriented_size(src: BinaryIO) -> tuple[int, int]:
+    """Display (EXIF-oriented) dimensions from the image header only."""
+    with Image.open(src) as img:
+        w, h = img.size
+        if img.getexif().get(0x0112) in (5, 6, 7, 8):
+            return h, w
+        return w, h
+
+
+def thumbnail_from_image(img: Image.Image, size: tuple[int, int] = THUMB_SIZE, formats: Sequence[str] | None = None) -> Thumbnail:
+    thumb = img.copy()
+    thumb.thumbnail(size, Image.LANCZOS)
+    fmt, data = encode_smallest(thumb, formats)
+    return Thumbnail(data=data, format=fmt, width=thumb.width, height=thumb.height)
+
+
+def make_thumbnail(src: bytes | BinaryIO, size: tuple[int, int] = THUMB_SIZE, formats: Iterable[str] | None = None, max_pixels: int | None = None) -> Thumbnail:
+    """One-shot helper: reduced decode, orient, downscale, smallest encoding."""
+    img = open_for_size(src, size, max_pixels=max_pixels)
+    return thumbnail_from_image(img, size, tuple(formats) if formats is not None else None)
@@ -0,0 +1,26 @@
+"""Reading uploaded originals back.
+
+Writing lives in ``blobs.py``: an upload is hashed first (its SHA-256 names
+the stored blob), in one pass over the temp file Werkzeug spooled it to, or
+while spooling a bare stream, and then copied to storage in fixed-size
+chunks. ``open_upload`` is the read side used by rendition jobs and
+on-the-fly resizing.
+"""
+from __future__ import annotations
+
+from typing import BinaryIO
+
+from .storage import get_storage
+
+
+def open_upload(name: str) -> BinaryIO:
+    """Open uploads/<name> for reading; remote objects come from the local read cache."""
+    storage = get_storage()
+    if storage.remote:
+        from .read_cache import local_copy
+
+        path = local_copy(name)
+        if path:
+            return open(path, "rb")
+    # Read cache disabled: S3 objects are spooled to disk
+    return storage.open(name)
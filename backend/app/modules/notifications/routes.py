@@ -6,6 +6,7 @@ import time
 from queue import Empty
 from ...models.notification import Notification
 from ...extensions import db
+from ...pagination import InvalidCursor, keyset_page
 from .bus import subscribe, unsubscribe
 
 bp = Blueprint("notifications", __name__, url_prefix="/notifications")
@@ -22,6 +23,7 @@ def _notif_to_dict(n: Notification) -> dict:
         "status": n.status,
     "read": bool(n.read_at),
         "createdAt": n.created_at.isoformat() if n.created_at else None,
+        "updatedAt": (n.updated_at or n.created_at).isoformat() if (n.updated_at or n.created_at) else None,
         "sentAt": n.sent_at.isoformat() if n.sent_at else None,
         "readAt": n.read_at.isoformat() if n.read_at else None,
     }
@@ -40,14 +42,17 @@ def list_notifications():
         limit = int(request.args.get("limit", 20))
     except Exception:
         limit = 20
-    rows = (
-        Notification.query
-        .filter(Notification.user_id == uid)
-        .order_by(Notification.created_at.desc())
-        .limit(max(1, min(100, limit)))
-        .all()
-    )
-    return jsonify({"notifications": [_notif_to_dict(n) for n in rows]})
+    try:
+        rows, next_cursor = keyset_page(
+            Notification.query.filter(Notification.user_id == uid),
+            Notification.created_at,
+            Notification.id,
+            max(1, min(100, limit)),
+            request.args.get("cursor"),
+        )
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
+    return jsonify({"notifications": [_notif_to_dict(n) for n in rows], "nextCursor": next_cursor})
 
 
 @bp.patch("/<int:notif_id>/read")
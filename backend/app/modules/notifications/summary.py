@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ...extensions import db
+from ...models.item import Item
+from ...models.notification import Notification
+from .bus import publish
+
+# Match notifications are coalesced into one row per (user, subject item). The
+# row is upserted on every matching run, keeping the best N matches in the payload.
+MATCH_SUMMARY_TOP_N = 5
+
+
+def ensure_group_key_column() -> None:
+    """Add notifications.group_key/updated_at and the unique index on databases created before them."""
+    db.session.execute(text("ALTER TABLE notifications ADD COLUMN IF NOT EXISTS group_key VARCHAR(120) NULL"))
+    db.session.execute(text("ALTER TABLE notifications ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NULL"))
+    db.session.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_notifications_user_group ON notifications (user_id, group_key)"
+    ))
+    db.session.commit()
+
+
+def match_group_key(item_id: int) -> str:
+    return f"match:{int(item_id)}"
+
+
+def _item_brief(it: Item) -> dict:
+    return {
+        "id": it.id,
+        "type": it.type,
+        "title": it.title,
+        "location": it.location,
+        "occurredOn": it.occurred_on.isoformat() if it.occurred_on else None,
+    }
+
+
+class MatchSummaries:
+    """Collects per-user, per-item match notifications for a single upsert.
+
+    Usage: add() for each (recipient, their item, matched item) pair, then
+    flush() inside the transaction and publish() after commit.
+    """
+
+    def __init__(self, top_n: int = MATCH_SUMMARY_TOP_N) -> None:
+        self.top_n = max(1, int(top_n))
+        self._pending: Dict[Tuple[int, str], dict] = {}
+        self._rows: List[dict] = []
+
+    def add(self, user_id: int, subject: Item, other: Item, score_pct: float, owner_alert: bool = False) -> None:
+        """Record that `other` may match the recipient's `subject` item.
+
+        owner_alert marks a lost-item owner being told about a new found report.
+        """
+        key = (int(user_id), match_group_key(subject.id))
+        entry = self._pending.setdefault(key, {"subject": subject, "matches": {}, "owner_alert": False})
+        entry["owner_alert"] = entry["owner_alert"] or bool(owner_alert)
+        lost_id = subject.id if subject.type == "lost" else other.id
+        found_id = other.id if subject.type == "lost" else subject.id
+        prev = entry["matches"].get(int(other.id))
+        if prev is None or prev["score"] < score_pct:
+            entry["matches"][int(other.id)] = {
+                "lostItemId": lost_id,
+                "foundItemId": found_id,
+                "score": score_pct,
+                "candidate": _item_brief(other),
+            }
+
+    def __bool__(self) -> bool:
+        return bool(self._pending)
+
+    def flush(self) -> List[dict]:
+        """Upsert one notification per collected (user, item).
+
+        Does not commit. The rows are created if missing and locked before
+        their payloads are merged, so concurrent flushes for the same
+        (user, item) (e.g. two found reports matching one lost item) queue up
+        instead of overwriting each other's matches. Returns the upserted rows
+        for publish().
+        """
+        if not self._pending:
+            return []
+        # Sorted, so overlapping flushes take their row locks in the same order
+        keys = sorted(self._pending.keys())
+        db.session.execute(
+            pg_insert(Notification)
+            .values([{"user_id": uid, "group_key": gkey, "channel": "inapp", "status": "queued"} for uid, gkey in keys])
+            .on_conflict_do_nothing(index_elements=[Notification.user_id, Notification.group_key])
+        )
+        locked = db.session.execute(
+            select(Notification.user_id, Notification.group_key, Notification.payload)
+            .where(tuple_(Notification.user_id, Notification.group_key).in_(keys))
+            .order_by(Notification.user_id, Notification.group_key)
+            .with_for_update()
+        )
+        existing: Dict[Tuple[int, str], Any] = {
+            (int(uid), gkey): payload if isinstance(payload, dict) else {} for uid, gkey, payload in locked
+        }
+
+        values: List[dict] = []
+        for (uid, gkey), entry in self._pending.items():
+            subject: Item = entry["subject"]
+            prev_payload = existing.get((uid, gkey)) or {}
+            merged: Dict[int, dict] = {}
+            for m in prev_payload.get("matches") or []:
+                try:
+                    merged[int((m.get("candidate") or {}).get("id"))] = m
+                except Exception:
+                    continue
+            # Every candidate ever reported, not just the top N kept in "matches",
+            # so re-runs and retries do not count the same items again
+            candidate_ids = {int(i) for i in prev_payload.get("candidateIds") or []} | set(merged) | set(entry["matches"])
+            for cid, m in entry["matches"].items():
+                if cid not in merged or float(merged[cid].get("score") or 0) < m["score"]:
+                    merged[cid] = m
+            ranked = sorted(merged.values(), key=lambda m: float(m.get("score") or 0), reverse=True)[: self.top_n]
+            count = len(candidate_ids)
+            if "candidateIds" not in prev_payload:
+                # Rows written before candidateIds only know their count
+                count = max(count, int(prev_payload.get("count") or 0))
+            best = ranked[0]
+            best_pct = int(round(float(best.get("score") or 0)))
+            opposite = "found" if subject.type == "lost" else "lost"
+            if entry["owner_alert"]:
+                title = "Possible match for your lost item"
+                body = (
+                    f"A found report may match your ‘{subject.title}’ ({best_pct}% match)."
+                    if count <= 1
+                    else f"{count} found reports may match your ‘{subject.title}’ (best {best_pct}% match)."
+                )
+            else:
+                title = "Potential match found"
+                body = (
+                    f"We found a {opposite} item that may match ‘{subject.title}’ ({best_pct}% match)."
+                    if count <= 1
+                    else f"We found {count} {opposite} items that may match ‘{subject.title}’ (best {best_pct}% match)."
+                )
+            values.append({
+                "user_id": uid,
+                "group_key": gkey,
+                "channel": "inapp",
+                "title": title,
+                "body": body,
+                "status": "queued",
+                "payload": {
+                    "kind": "match",
+                    "itemId": subject.id,
+                    "count": count,
+                    # Top-level fields mirror the best match for older clients
+                    "lostItemId": best.get("lostItemId"),
+                    "foundItemId": best.get("foundItemId"),
+                    "score": best.get("score"),
+                    "base": _item_brief(subject),
+                    "candidate": best.get("candidate"),
+                    "matches": ranked,
+                    "candidateIds": sorted(candidate_ids),
+                },
+            })
+
+        stmt = pg_insert(Notification).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Notification.user_id, Notification.group_key],
+            set_={
+                "title": stmt.excluded.title,
+                "body": stmt.excluded.body,
+                "payload": stmt.excluded.payload,
+                "status": "queued",
+                "read_at": None,
+                # created_at is the inbox's keyset order, so only updated_at moves
+                "updated_at": func.now(),
+            },
+        ).returning(
+            Notification.id,
+            Notification.user_id,
+            Notification.title,
+            Notification.body,
+            Notification.payload,
+            Notification.created_at,
+            Notification.updated_at,
+        )
+        self._rows = [dict(r._mapping) for r in db.session.execute(stmt)]
+        self._pending.clear()
+        return self._rows
+
+    def publish(self) -> None:
+        """Push one SSE event per upserted notification (call after commit)."""
+        for row in self._rows:
+            try:
+                publish(int(row["user_id"]), {
+                    "type": "notification",
+                    "notification": {
+                        "id": row["id"],
+                        "title": row["title"],
+                        "message": row["body"],
+                        "createdAt": row["created_at"].isoformat() if row.get("created_at") else None,
+                        "updatedAt": row["updated_at"].isoformat() if row.get("updated_at") else None,
+                        "read": False,
+                        "payload": row["payload"],
+                    },
+                })
+            except Exception:
+                pass
+        self._rows = []
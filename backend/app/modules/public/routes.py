@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from flask import Blueprint, jsonify
 
+from ...conditional import conditional_get, today_marker
 from ...extensions import db
 from ...models.item import Item
 
@@ -9,6 +10,7 @@ bp = Blueprint("public", __name__, url_prefix="/public")
 
 
 @bp.get("/stats/monthly")
+@conditional_get(Item, extra=today_marker, public=True)
 def public_stats_monthly():
     """Public stats used on the landing page.
 
@@ -0,0 +1,37 @@
+"""QR code allocation shared by item creation and bulk import."""
+from __future__ import annotations
+
+import secrets
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ...extensions import db
+from ...models.qr_code import QRCode
+
+
+def new_code() -> str:
+    return secrets.token_urlsafe(8).replace("_", "").replace("-", "").lower()
+
+
+def create_item_codes(item_ids: list[int]) -> dict[int, str]:
+    """Insert one QR code per item in the current transaction; returns {item_id: code}.
+
+    Uniqueness is left to the ``qr_codes.code`` constraint: ``ON CONFLICT DO
+    NOTHING`` skips the (rare) collisions, which are retried with fresh codes.
+    Nothing is committed.
+    """
+    pending = list(item_ids)
+    created: dict[int, str] = {}
+    for _ in range(5):
+        if not pending:
+            break
+        stmt = (
+            pg_insert(QRCode)
+            .values([{"code": new_code(), "item_id": iid} for iid in pending])
+            .on_conflict_do_nothing(index_elements=[QRCode.code])
+            .returning(QRCode.item_id, QRCode.code)
+        )
+        for iid, code in db.session.execute(stmt):
+            created[int(iid)] = code
+        pending = [iid for iid in pending if iid not in created]
+    return created
@@ -15,6 +15,7 @@ from ...models.qr_code import QRCode
 from ...models.item import Item
 from ...models.match import Match
 from ...models.notification import Notification
+from ...serializers import item_dict
 
 
 bp = Blueprint("qrcodes", __name__, url_prefix="/qrcodes")
@@ -191,15 +192,7 @@ def resolve_code(code: str):
 
     # Map item data for public consumption
     out = {
-        "id": int(it.id),
-        "type": it.type,
-        "title": it.title,
-        "description": it.description,
-        "location": it.location,
-        "occurredOn": it.occurred_on.isoformat() if it.occurred_on else None,
-        "reportedAt": it.reported_at.isoformat() if it.reported_at else None,
-        "status": it.status,
-        "photoUrl": it.photo_url,
+        **item_dict(it, manifest=False),
         # Reporter (finder / submitter) public-safe identity fragment
         "reporter": (
             {
@@ -412,53 +405,6 @@ def auto_report_found(code: str):
     if (base_item.type or "").lower() != "lost":
         return jsonify({"error": "QR code item is not a lost report"}), 400
 
-
-@bp.get("/ensure-item/<int:item_id>")
-def ensure_item_qrcode(item_id: int):
-    """Ensure a QR code exists for the given item and return (or redirect to) its standard view.
-
-    Use cases:
-      * Admin 'All Found' or 'All Items' tables have items missing QR rows – this endpoint lazily creates them.
-      * Front-end can call this before showing a QR preview modal to avoid 404s.
-
-    Behavior:
-      * Returns JSON payload: { code, itemId, scanUrl, created: bool }
-      * If a public frontend base exists AND request prefers HTML (or redirect=1), redirect to /scan/<code> for consistency.
-    """
-    item: Optional[Item] = Item.query.get(int(item_id))
-    if not item:
-        return jsonify({"error": "Item not found"}), 404
-
-    # Find existing QR or create
-    existing: Optional[QRCode] = QRCode.query.filter_by(item_id=item.id).first()
-    created = False
-    if not existing:
-        existing = _ensure_code_for_item(int(item.id))
-        created = True
-
-    scan_url = _scan_url(existing.code)
-
-    # Optional redirect for browser consistency
-    front_base = _public_frontend_base()
-    wants_redirect = request.args.get('redirect') == '1'
-    try:
-        accepts_html = request.accept_mimetypes and (
-            request.accept_mimetypes.best == 'text/html' or 'text/html' in request.accept_mimetypes
-        )
-    except Exception:  # pragma: no cover
-        accepts_html = False
-
-    if front_base and (wants_redirect or accepts_html) and request.args.get('format') != 'json':
-        return redirect(f"{front_base.rstrip('/')}/scan/{existing.code}", code=302)
-
-    return jsonify({
-        "code": existing.code,
-        "itemId": int(existing.item_id),
-        "scanUrl": scan_url,
-        "created": created,
-        "canonicalUrl": url_for("api_v1.qrcodes.resolve_code", code=existing.code, _external=True),  # type: ignore[attr-defined]
-    })
-
     # Validate reporter id if provided
     reporter_id_int: Optional[int] = None
     if reporter_user_id is not None:
@@ -499,6 +445,7 @@ def ensure_item_qrcode(item_id: int):
         location=location_override or base_item.location,
         occurred_on=_date.today(),
         photo_url=base_item.photo_url,  # reuse photo if any; finder can edit later
+        photo_renditions=base_item.photo_renditions,  # and its thumbnails (counts as a blob reference)
         reporter_user_id=reporter_id_int,
     )
     db.session.add(found_item)
@@ -532,7 +479,7 @@ def ensure_item_qrcode(item_id: int):
                 payload={
                     "kind": "auto_found",
                     "lostItemId": int(base_item.id),
-                    "foundItemId": lambda: int(found_item.id) if found_item.id else None,  # resolved after commit
+                    "foundItemId": int(found_item.id) if found_item.id else None,
                     "code": code,
                 },
             )
@@ -596,3 +543,50 @@ def ensure_item_qrcode(item_id: int):
         },
         "message": "Auto-found report created successfully.",
     }), 201
+
+
+@bp.get("/ensure-item/<int:item_id>")
+def ensure_item_qrcode(item_id: int):
+    """Ensure a QR code exists for the given item and return (or redirect to) its standard view.
+
+    Use cases:
+      * Admin 'All Found' or 'All Items' tables have items missing QR rows – this endpoint lazily creates them.
+      * Front-end can call this before showing a QR preview modal to avoid 404s.
+
+    Behavior:
+      * Returns JSON payload: { code, itemId, scanUrl, created: bool }
+      * If a public frontend base exists AND request prefers HTML (or redirect=1), redirect to /scan/<code> for consistency.
+    """
+    item: Optional[Item] = Item.query.get(int(item_id))
+    if not item:
+        return jsonify({"error": "Item not found"}), 404
+
+    # Find existing QR or create
+    existing: Optional[QRCode] = QRCode.query.filter_by(item_id=item.id).first()
+    created = False
+    if not existing:
+        existing = _ensure_code_for_item(int(item.id))
+        created = True
+
+    scan_url = _scan_url(existing.code)
+
+    # Optional redirect for browser consistency
+    front_base = _public_frontend_base()
+    wants_redirect = request.args.get('redirect') == '1'
+    try:
+        accepts_html = request.accept_mimetypes and (
+            request.accept_mimetypes.best == 'text/html' or 'text/html' in request.accept_mimetypes
+        )
+    except Exception:  # pragma: no cover
+        accepts_html = False
+
+    if front_base and (wants_redirect or accepts_html) and request.args.get('format') != 'json':
+        return redirect(f"{front_base.rstrip('/')}/scan/{existing.code}", code=302)
+
+    return jsonify({
+        "code": existing.code,
+        "itemId": int(existing.item_id),
+        "scanUrl": scan_url,
+        "created": created,
+        "canonicalUrl": url_for("api_v1.qrcodes.resolve_code", code=existing.code, _external=True),  # type: ignore[attr-defined]
+    })
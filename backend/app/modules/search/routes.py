@@ -10,6 +10,7 @@ from flask import Blueprint, jsonify, request
 from ...extensions import db
 from ...models.item import Item
 from ...models.match import Match
+from ...serializers import item_dict
 
 bp = Blueprint("search", __name__, url_prefix="/search")
 
@@ -146,6 +147,41 @@ def _candidate_query(opposite_type: str, location: str | None = None, around: da
     return q.order_by(Item.reported_at.desc()).limit(400)
 
 
+def _matching_engine(requested: str | None = None) -> str:
+    """Resolve the scoring engine: explicit request > admin setting > 'python'.
+
+    'sql' pushes TF-IDF scoring into Postgres (see sql_engine.py); 'python'
+    loads candidates and scores them in-process.
+    """
+    engine = (requested or "").strip().lower()
+    if engine not in ("python", "sql"):
+        try:
+            from ...models.app_setting import AppSetting
+            engine = (AppSetting.get("features.matching.engine", "python") or "python").strip().lower()
+        except Exception:
+            engine = "python"
+    return engine if engine in ("python", "sql") else "python"
+
+
+def _rank_candidates(base_text: str, opposite: str, location: str | None, around: date | None, limit: int, engine: str) -> List[Tuple[Item, float]]:
+    """Score opposite-type candidates against base_text and return the best `limit` pairs."""
+    if engine == "sql":
+        from .sql_engine import load_scored_items, top_matches_sql
+        return load_scored_items(top_matches_sql(base_text, opposite, location, around, limit=limit))
+
+    candidates = list(_candidate_query(opposite_type=opposite, location=location, around=around))
+    # Prepare shared IDF across base + candidates for stable scoring
+    docs = [_tokenize(base_text)] + [_tokenize(_compose_text(it)) for it in candidates]
+    idf = _idf(docs)
+
+    scored: List[Tuple[Item, float]] = []
+    for it in candidates:
+        s = _score_pair(base_text, _compose_text(it), location, it.location, around, _date_from_item(it), idf)
+        scored.append((it, s))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:limit]
+
+
 @bp.get("/smart")
 def smart_search():
     """Find potential matches between lost and found items.
@@ -157,6 +193,7 @@ def smart_search():
       - location: optional location hint
       - date: optional date (YYYY-MM-DD) hint
       - limit: max results (default 10)
+      - engine: optional 'python' | 'sql' scoring engine override
     """
     try:
         limit = int(request.args.get("limit", 10))
@@ -164,6 +201,7 @@ def smart_search():
         limit = 10
 
     item_id = request.args.get("itemId")
+    engine = _matching_engine(request.args.get("engine"))
     results: List[Dict] = []
 
     if item_id:
@@ -179,34 +217,13 @@ def smart_search():
         base_loc = base.location
         base_date = _date_from_item(base)
 
-        candidates = list(_candidate_query(opposite_type=opposite, location=base_loc, around=base_date))
-        # Prepare shared IDF across base + candidates for stable scoring
-        docs = [_tokenize(base_text)] + [_tokenize(_compose_text(it)) for it in candidates]
-        idf = _idf(docs)
-
-        scored: List[Tuple[Item, float]] = []
-        for it in candidates:
-            cand_text = _compose_text(it)
-            s = _score_pair(base_text, cand_text, base_loc, it.location, base_date, _date_from_item(it), idf)
-            scored.append((it, s))
-
-        scored.sort(key=lambda x: x[1], reverse=True)
-        for it, score in scored[: limit if limit > 0 else 10]:
+        scored = _rank_candidates(base_text, opposite, base_loc, base_date, limit if limit > 0 else 10, engine)
+        for it, score in scored:
             rec = {
                 "lostItem": base.id if base.type == "lost" else it.id,
                 "foundItem": it.id if base.type == "lost" else base.id,
                 "score": float(score),
-                "candidate": {
-                    "id": it.id,
-                    "type": it.type,
-                    "title": it.title,
-                    "description": it.description,
-                    "location": it.location,
-                    "occurredOn": it.occurred_on.isoformat() if it.occurred_on else None,
-                    "reportedAt": it.reported_at.isoformat() if it.reported_at else None,
-                    "status": it.status,
-                    "photoUrl": it.photo_url,
-                },
+                "candidate": item_dict(it, manifest=False),
             }
             results.append(rec)
         return jsonify({"matches": results})
@@ -220,36 +237,16 @@ def smart_search():
     date_hint = _date_from_str(request.args.get("date"))
 
     opposite = "found" if side == "lost" else "lost"
-    candidates = list(_candidate_query(opposite_type=opposite, location=location, around=date_hint))
-
-    # Shared IDF across query + candidates
-    docs = [_tokenize(q)] + [_tokenize(_compose_text(it)) for it in candidates]
-    idf = _idf(docs)
-
-    scored: List[Tuple[Item, float]] = []
-    for it in candidates:
-        s = _score_pair(q, _compose_text(it), location, it.location, date_hint, _date_from_item(it), idf)
-        scored.append((it, s))
+    scored = _rank_candidates(q, opposite, location, date_hint, limit if limit > 0 else 10, engine)
 
-    scored.sort(key=lambda x: x[1], reverse=True)
     out: List[Dict] = []
-    for it, score in scored[: limit if limit > 0 else 10]:
+    for it, score in scored:
         out.append(
             {
                 "lostItem": None if side == "lost" else it.id,
                 "foundItem": it.id if side == "lost" else None,
                 "score": float(score),
-                "candidate": {
-                    "id": it.id,
-                    "type": it.type,
-                    "title": it.title,
-                    "description": it.description,
-                    "location": it.location,
-                    "occurredOn": it.occurred_on.isoformat() if it.occurred_on else None,
-                    "reportedAt": it.reported_at.isoformat() if it.reported_at else None,
-                    "status": it.status,
-                    "photoUrl": it.photo_url,
-                },
+                "candidate": item_dict(it, manifest=False),
             }
         )
     return jsonify({"matches": out})
@@ -0,0 +1,190 @@
+"""TF-IDF + cosine scoring pushed down into Postgres.
+
+Mirrors ``_score_pair`` from ``routes.py`` (same candidate filter, same IDF
+formula, same location/date bonuses) but runs entirely in one SQL statement
+over the ``item_terms`` table, so only the top-k ``(id, score)`` rows are
+returned to Python instead of every candidate's title and description.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+
+from ...extensions import db
+from ...models.item import Item
+from ...models.item_term import ItemTerm
+from .routes import _compose_text, _normalize_loc, _tf, _tokenize
+
+ENGINES = ("python", "sql")
+
+# Keep in sync with _candidate_query() so both engines score the same window
+CANDIDATE_LIMIT = 400
+
+
+def index_item_terms(item: Item, fresh: bool = False) -> None:
+    """(Re)build the term rows for an item inside the current transaction.
+
+    Pass fresh=True for items that were just inserted to skip the delete.
+    Caller is responsible for committing.
+    """
+    if item.id is None:
+        db.session.flush()
+    if not fresh:
+        ItemTerm.query.filter_by(item_id=item.id).delete(synchronize_session=False)
+    for term, tf in _tf(_tokenize(_compose_text(item))).items():
+        db.session.add(ItemTerm(item_id=item.id, term=term, tf=tf))
+
+
+def reindex_all_terms(batch_size: int = 500) -> int:
+    """Backfill item_terms for every item. Returns the number of items indexed."""
+    count = 0
+    last_id = 0
+    while True:
+        rows: List[Item] = (
+            Item.query.filter(Item.id > last_id).order_by(Item.id.asc()).limit(batch_size).all()
+        )
+        if not rows:
+            break
+        ids = [int(r.id) for r in rows]
+        ItemTerm.query.filter(ItemTerm.item_id.in_(ids)).delete(synchronize_session=False)
+        for it in rows:
+            index_item_terms(it, fresh=True)
+        db.session.commit()
+        count += len(rows)
+        last_id = ids[-1]
+    return count
+
+
+_SCORE_SQL = """
+WITH base AS (
+    SELECT b.term, b.tf
+    FROM unnest(CAST(:terms AS text[]), CAST(:tfs AS float8[])) AS b(term, tf)
+),
+cands AS (
+    SELECT i.id,
+           lower(btrim(coalesce(i.location, ''))) AS loc,
+           coalesce(i.occurred_on, CAST(i.reported_at AS date)) AS d
+    FROM items i
+    WHERE i.type = CAST(:opposite AS item_type_enum)
+      AND i.status IN ('open', 'matched')
+      {filters}
+    ORDER BY i.reported_at DESC
+    LIMIT :cand_limit
+),
+n AS (
+    SELECT count(*) + 1 AS n FROM cands
+),
+df AS (
+    SELECT x.term, count(*) AS df
+    FROM (
+        SELECT t.term FROM item_terms t JOIN cands c ON c.id = t.item_id
+        UNION ALL
+        SELECT term FROM base
+    ) AS x
+    GROUP BY x.term
+),
+idf AS (
+    SELECT df.term, ln((n.n + 1.0) / (df.df + 1.0)) + 1.0 AS w
+    FROM df CROSS JOIN n
+),
+bvec AS (
+    SELECT base.term, base.tf * idf.w AS v FROM base JOIN idf ON idf.term = base.term
+),
+bnorm AS (
+    SELECT sqrt(coalesce(sum(v * v), 0)) AS norm FROM bvec
+),
+cvec AS (
+    SELECT t.item_id, t.term, t.tf * idf.w AS v
+    FROM item_terms t
+    JOIN cands c ON c.id = t.item_id
+    JOIN idf ON idf.term = t.term
+),
+cnorm AS (
+    SELECT item_id, sqrt(sum(v * v)) AS norm FROM cvec GROUP BY item_id
+),
+dot AS (
+    SELECT cvec.item_id, sum(cvec.v * bvec.v) AS dot
+    FROM cvec JOIN bvec ON bvec.term = cvec.term
+    GROUP BY cvec.item_id
+),
+scored AS (
+    SELECT c.id,
+           CASE WHEN bnorm.norm > 0 AND coalesce(cnorm.norm, 0) > 0
+                THEN coalesce(dot.dot, 0) / (bnorm.norm * cnorm.norm)
+                ELSE 0 END AS text_sim,
+           CASE WHEN :base_loc = '' OR c.loc = '' THEN 0
+                WHEN c.loc = :base_loc THEN 0.15
+                WHEN position(:base_loc in c.loc) > 0 OR position(c.loc in :base_loc) > 0 THEN 0.10
+                ELSE 0 END AS loc_bonus,
+           CASE WHEN CAST(:base_date AS date) IS NULL OR c.d IS NULL THEN 0
+                WHEN abs(c.d - CAST(:base_date AS date)) <= 1 THEN 0.15
+                WHEN abs(c.d - CAST(:base_date AS date)) <= 3 THEN 0.12
+                WHEN abs(c.d - CAST(:base_date AS date)) <= 7 THEN 0.10
+                WHEN abs(c.d - CAST(:base_date AS date)) <= 14 THEN 0.05
+                ELSE 0 END AS date_bonus
+    FROM cands c
+    CROSS JOIN bnorm
+    LEFT JOIN cnorm ON cnorm.item_id = c.id
+    LEFT JOIN dot ON dot.item_id = c.id
+),
+final AS (
+    SELECT id, round(CAST(least(1.0, 0.7 * text_sim + loc_bonus + date_bonus) AS numeric), 4) AS score
+    FROM scored
+)
+SELECT id, score FROM final
+WHERE score >= :min_score
+ORDER BY score DESC, id DESC
+LIMIT :k
+"""
+
+
+def top_matches_sql(
+    base_text: str,
+    opposite_type: str,
+    location: str | None,
+    around: date | None,
+    limit: int = 10,
+    min_score: float = 0.0,
+) -> List[Tuple[int, float]]:
+    """Return [(item_id, score01)] for the best candidates, scored in Postgres."""
+    tf: Dict[str, float] = _tf(_tokenize(base_text))
+    filters: List[str] = []
+    params: Dict[str, object] = {
+        "terms": list(tf.keys()),
+        "tfs": list(tf.values()),
+        "opposite": opposite_type,
+        "base_loc": _normalize_loc(location),
+        "base_date": around,
+        "cand_limit": CANDIDATE_LIMIT,
+        "min_score": float(min_score or 0.0),
+        "k": max(1, int(limit)),
+    }
+    if location:
+        filters.append("AND i.location ILIKE :loc_like")
+        params["loc_like"] = f"%{location}%"
+    if around:
+        start = around - timedelta(days=30)
+        end = around + timedelta(days=30)
+        filters.append(
+            "AND ((i.occurred_on IS NOT NULL AND i.occurred_on BETWEEN :start AND :end)"
+            " OR (i.occurred_on IS NULL AND i.reported_at BETWEEN :start_ts AND :end_ts))"
+        )
+        params.update({
+            "start": start,
+            "end": end,
+            "start_ts": datetime.combine(start, datetime.min.time()),
+            "end_ts": datetime.combine(end, datetime.max.time()),
+        })
+    sql = text(_SCORE_SQL.format(filters="\n      ".join(filters)))
+    rows = db.session.execute(sql, params).all()
+    return [(int(r[0]), float(r[1])) for r in rows]
+
+
+def load_scored_items(scored: List[Tuple[int, float]]) -> List[Tuple[Item, float]]:
+    """Fetch Item rows for scored ids in one query, preserving score order."""
+    if not scored:
+        return []
+    by_id = {int(it.id): it for it in Item.query.filter(Item.id.in_([i for i, _ in scored])).all()}
+    return [(by_id[i], s) for i, s in scored if i in by_id]
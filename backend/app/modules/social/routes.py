@@ -6,14 +6,32 @@ import os
 from urllib.parse import urlparse, urljoin
 
 from ...extensions import db
+from ...pagination import InvalidCursor, keyset_page
 from ...models.social_post import SocialPost
 from ...models.item import Item
 from ...models.app_setting import AppSetting
 from ...integrations.facebook.client import get_page_info, post_to_page, post_photo_to_page
+from ..media.read_cache import local_copy
+from ..media.storage import get_storage, is_safe_rel
 
 bp = Blueprint("social", __name__, url_prefix="/social")
 
 
+def _local_upload_path(item: Item) -> str | None:
+    """Local file for the item's uploaded photo (S3 objects via the read cache); None otherwise.
+
+    photo_url can be supplied by the client, so only a URL that points at the
+    upload recorded as the item's manifest source is read from disk.
+    """
+    manifest = item.photo_renditions if isinstance(item.photo_renditions, dict) else None
+    if not manifest or manifest.get("status") == "external" or not item.photo_url:
+        return None
+    source = manifest.get("source")
+    if not is_safe_rel(source) or get_storage().rel_for_url(item.photo_url) != source:
+        return None
+    return local_copy(source)
+
+
 def _build_message_for_item(item: Item) -> tuple[str, str | None]:
     kind = "Lost" if item.type == "lost" else "Found"
     lines: list[str] = [f"{kind} Item: {item.title}"]
@@ -129,9 +147,10 @@ def list_posts():
     except Exception:
         limit = 50
     limit = max(1, min(200, limit))
-    rows: list[SocialPost] = (
-        SocialPost.query.order_by(SocialPost.created_at.desc()).limit(limit).all()
-    )
+    try:
+        rows, next_cursor = keyset_page(SocialPost.query, SocialPost.created_at, SocialPost.id, limit, request.args.get("cursor"))
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
 
     def to_dict(sp: SocialPost) -> dict:
         item = sp.item
@@ -153,7 +172,7 @@ def list_posts():
             } if item else None,
         }
 
-    return jsonify({"posts": [to_dict(sp) for sp in rows]})
+    return jsonify({"posts": [to_dict(sp) for sp in rows], "nextCursor": next_cursor})
 
 
 @bp.post("/posts")
@@ -197,26 +216,19 @@ def create_post():
     image_path: str | None = None
     if want_image and item.photo_url:
         base_frontend = os.getenv("FRONTEND_PUBLIC_BASE_URL") or os.getenv("PUBLIC_WEB_BASE_URL") or (request.host_url.rstrip('/') if request else None)
-        # Build a public image URL if possible
         photo = item.photo_url
-        if photo.startswith("/") and base_frontend and _is_public_http_url(base_frontend):
-            image_url = urljoin(base_frontend + "/", photo.lstrip("/"))
-        elif _is_public_http_url(photo):
-            image_url = photo
-        # Fallback to local file if we cannot create a public URL
-        if not image_url:
-            try:
-                from ...config import get_config
-                cfg = get_config(None)
-                uploads = getattr(cfg, 'UPLOAD_FOLDER', None)
-                if uploads:
-                    # Try basename under uploads
-                    fname = os.path.basename(photo)
-                    candidate = os.path.join(uploads, fname)
-                    if os.path.isfile(candidate):
-                        image_path = candidate
-            except Exception:
-                pass
+        # Our own uploads are sent from local disk (S3 via the read cache), so Facebook
+        # never has to reach the bucket or this host
+        try:
+            image_path = _local_upload_path(item)
+        except Exception:
+            image_path = None
+        # Otherwise build a public image URL if possible
+        if not image_path:
+            if photo.startswith("/") and base_frontend and _is_public_http_url(base_frontend):
+                image_url = urljoin(base_frontend + "/", photo.lstrip("/"))
+            elif _is_public_http_url(photo):
+                image_url = photo
 
     sp = SocialPost(item_id=item.id, platform="facebook", message=message, link_url=link, status="queued")
     db.session.add(sp)
@@ -317,22 +329,15 @@ def retry_post(post_id: int):
             if sp.item and getattr(sp.item, 'photo_url', None):
                 photo = sp.item.photo_url
                 base_frontend = os.getenv("FRONTEND_PUBLIC_BASE_URL") or os.getenv("PUBLIC_WEB_BASE_URL") or (request.host_url.rstrip('/') if request else None)
-                if photo.startswith("/") and base_frontend and _is_public_http_url(base_frontend):
-                    image_url = urljoin(base_frontend + "/", photo.lstrip("/"))
-                elif _is_public_http_url(photo):
-                    image_url = photo
-                if not image_url:
-                    try:
-                        from ...config import get_config
-                        cfg = get_config(None)
-                        uploads = getattr(cfg, 'UPLOAD_FOLDER', None)
-                        if uploads:
-                            fname = os.path.basename(photo)
-                            candidate = os.path.join(uploads, fname)
-                            if os.path.isfile(candidate):
-                                image_path = candidate
-                    except Exception:
-                        pass
+                try:
+                    image_path = _local_upload_path(sp.item)
+                except Exception:
+                    image_path = None
+                if not image_path:
+                    if photo.startswith("/") and base_frontend and _is_public_http_url(base_frontend):
+                        image_url = urljoin(base_frontend + "/", photo.lstrip("/"))
+                    elif _is_public_http_url(photo):
+                        image_url = photo
 
             if image_url or image_path:
                 resp = post_photo_to_page(sp.message or "", image_url=image_url, image_path=image_path)
@@ -3,6 +3,7 @@ from sqlalchemy import func, or_
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from ...extensions import db
+from ...pagination import InvalidCursor, keyset_page
 from ...models.user import User
 from ...models.item import Item
 from ...models.claim import Claim
@@ -35,7 +36,9 @@ def list_users():
     - q: search across email, studentId, first/last name
     - role: 'student' | 'admin'
     - limit: page size (default 50, max 200)
-    - offset: offset for pagination (default 0)
+    - cursor: nextCursor from the previous page (keyset; preferred)
+    - offset: legacy offset pagination, used only when no cursor is given
+    total is counted on the first page only.
     """
     q = (request.args.get("q") or "").strip()
     role = (request.args.get("role") or "").strip() or None
@@ -47,6 +50,7 @@ def list_users():
         offset = max(int(request.args.get("offset", 0)), 0)
     except Exception:
         offset = 0
+    cursor = request.args.get("cursor") or None
 
     # Subqueries for counts
     sub_items = (
@@ -94,13 +98,25 @@ def list_users():
             )
         )
 
-    total = base.count()
-    rows = (
-        base.order_by(func.coalesce(User.updated_at, User.created_at).desc())
-        .limit(limit)
-        .offset(offset)
-        .all()
-    )
+    # Newest accounts first. created_at never changes, so editing a profile
+    # cannot move a row between pages the way ordering by updated_at did
+    total = base.count() if not cursor else None
+    next_cursor = None
+    if offset and not cursor:
+        rows = (
+            base.order_by(User.created_at.desc(), User.id.desc())
+            .limit(limit)
+            .offset(offset)
+            .all()
+        )
+    else:
+        try:
+            rows, next_cursor = keyset_page(
+                base, User.created_at, User.id, limit, cursor,
+                key=lambda row: (row[0].created_at, row[0].id),
+            )
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
 
     users = []
     for u, items_count, claims_count, unread_count in rows:
@@ -114,7 +130,7 @@ def list_users():
         )
         users.append(d)
 
-    return jsonify({"users": users, "total": total, "limit": limit, "offset": offset})
+    return jsonify({"users": users, "total": total, "limit": limit, "offset": offset, "nextCursor": next_cursor})
 
 
 @bp.get("/<int:user_id>")
@@ -0,0 +1,168 @@
+"""Transactional outbox for side effects of a write.
+
+A view that changes state records the follow-up work (matching, social
+posts, notifications) as ``outbox_events`` rows with ``enqueue``, in the same
+transaction as the change itself. So either both are committed or neither
+is, and the request pays for one commit. After the commit, ``kick()`` asks
+for a dispatch pass (a Celery task when CELERY_BROKER_URL is set, otherwise
+a daemon thread). A Celery beat sweep picks up anything a kick missed.
+
+Dispatch is at-least-once:
+
+- events are claimed with ``FOR UPDATE SKIP LOCKED`` and leased for
+  OUTBOX_LEASE_SECONDS, so concurrent dispatchers never take the same row,
+  and a dispatcher that dies mid-event only delays it
+- a handler that raises is retried with exponential backoff, and is marked
+  ``failed`` after OUTBOX_MAX_ATTEMPTS
+
+Handlers must therefore be idempotent. Register them with
+``@handler("topic")`` in a module listed in HANDLER_MODULES.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import threading
+from datetime import timedelta
+from typing import Callable
+
+from flask import Flask, current_app
+from sqlalchemy import func, select, update
+
+from .extensions import db
+from .models.outbox_event import OutboxEvent
+
+log = logging.getLogger(__name__)
+
+HANDLER_MODULES = ("app.modules.items.side_effects",)
+
+_HANDLERS: dict[str, Callable[[OutboxEvent], None]] = {}
+
+
+def handler(topic: str) -> Callable:
+    """Register ``fn(event)`` as the handler for ``topic``."""
+
+    def decorator(fn: Callable[[OutboxEvent], None]) -> Callable[[OutboxEvent], None]:
+        _HANDLERS[topic] = fn
+        return fn
+
+    return decorator
+
+
+def _load_handlers() -> None:
+    for name in HANDLER_MODULES:
+        importlib.import_module(name)
+
+
+def enqueue(topic: str, aggregate_type: str, aggregate_id: int, payload: dict | None = None) -> OutboxEvent:
+    """Add an event to the current session. The caller's commit publishes it."""
+    event = OutboxEvent(topic=topic, aggregate_type=aggregate_type, aggregate_id=int(aggregate_id), payload=payload or {})
+    db.session.add(event)
+    return event
+
+
+def _config_int(name: str, default: int) -> int:
+    try:
+        return int(current_app.config.get(name, default))
+    except Exception:
+        return default
+
+
+def _claim(limit: int) -> list[int]:
+    """Lease up to ``limit`` due events to this dispatcher and commit the lease."""
+    lease = timedelta(seconds=_config_int("OUTBOX_LEASE_SECONDS", 300))
+    due = (
+        select(OutboxEvent.id)
+        .where(OutboxEvent.status == "pending", OutboxEvent.available_at <= func.now())
+        .order_by(OutboxEvent.available_at, OutboxEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(due.scalar_subquery()))
+        .values(available_at=func.now() + lease, attempts=OutboxEvent.attempts + 1)
+        .returning(OutboxEvent.id)
+        .execution_options(synchronize_session=False)
+    )
+    ids = sorted(int(i) for i in db.session.execute(stmt).scalars())
+    db.session.commit()
+    return ids
+
+
+def _backoff(attempts: int) -> timedelta:
+    # 30s, 1m, 2m, 4m, ... capped at an hour
+    return timedelta(seconds=min(3600, 30 * 2 ** max(0, attempts - 1)))
+
+
+def _process(event_id: int) -> str:
+    event = db.session.get(OutboxEvent, event_id)
+    if event is None or event.status != "pending":
+        return "skipped"
+    fn = _HANDLERS.get(event.topic)
+    try:
+        if fn is None:
+            raise LookupError(f"No outbox handler for topic {event.topic!r}")
+        fn(event)
+        event.status = "done"
+        event.last_error = None
+        event.processed_at = func.now()
+        db.session.commit()
+        return "done"
+    except Exception as e:
+        db.session.rollback()
+        log.warning("outbox event %s (%s) failed: %s", event_id, getattr(event, "topic", "?"), e)
+        event = db.session.get(OutboxEvent, event_id)
+        if event is None:
+            return "skipped"
+        event.last_error = str(e)[:2000]
+        exhausted = event.attempts >= _config_int("OUTBOX_MAX_ATTEMPTS", 5)
+        if exhausted:
+            event.status = "failed"
+            event.processed_at = func.now()
+        else:
+            event.available_at = func.now() + _backoff(event.attempts)
+        db.session.commit()
+        return "failed" if exhausted else "retrying"
+
+
+def dispatch_pending(limit: int | None = None, max_batches: int = 10) -> dict:
+    """Run due events until none are left (or ``max_batches`` passes); returns counts by outcome."""
+    _load_handlers()
+    limit = max(1, int(limit or _config_int("OUTBOX_BATCH_SIZE", 50)))
+    counts = {"done": 0, "retrying": 0, "failed": 0, "skipped": 0}
+    for _ in range(max(1, max_batches)):
+        ids = _claim(limit)
+        for event_id in ids:
+            counts[_process(event_id)] += 1
+        if len(ids) < limit:
+            break
+    return counts
+
+
+def _run_in_app(app: Flask) -> None:
+    with app.app_context():
+        try:
+            dispatch_pending()
+        except Exception:
+            db.session.rollback()
+        finally:
+            db.session.remove()
+
+
+def kick() -> None:
+    """Ask for a dispatch pass after committing new events; never raises."""
+    try:
+        if os.getenv("CELERY_BROKER_URL"):
+            try:
+                from .tasks.jobs.outbox import dispatch_outbox  # type: ignore
+                dispatch_outbox.delay()
+                return
+            except Exception:
+                pass
+        app = current_app._get_current_object()  # type: ignore[attr-defined]
+        threading.Thread(target=_run_in_app, args=(app,), daemon=True).start()
+    except Exception:
+        # The beat sweep will pick the events up
+        pass
@@ -0,0 +1,73 @@
+"""Opaque-cursor (keyset) pagination shared by list endpoints.
+
+Lists are ordered by ``(<timestamp>, id)`` descending. The cursor encodes
+the sort key of the last row returned, and the next page continues with a
+row-value comparison ``(ts, id) < (:ts, :id)``. That comparison is served
+directly by a composite ``(ts, id)`` index, so page 50 costs the same as
+page 1. With OFFSET, every earlier row is scanned and thrown away.
+
+Usage::
+
+    rows, next_cursor = keyset_page(q, Item.reported_at, Item.id, limit, request.args.get("cursor"))
+    return jsonify({"items": [...], "nextCursor": next_cursor})
+
+``nextCursor`` is null on the last page.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Sequence
+
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded; endpoints answer 400."""
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    value = sort_value.isoformat() if isinstance(sort_value, datetime) else sort_value
+    raw = json.dumps([value, int(row_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> tuple[Any, int]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        return value, int(row_id)
+    except Exception as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def keyset_page(
+    query,
+    sort_col,
+    id_col,
+    limit: int,
+    cursor: str | None = None,
+    key: Callable[[Any], tuple[Any, int]] | None = None,
+) -> tuple[Sequence[Any], str | None]:
+    """Fetch one page of ``query`` ordered by (sort_col, id_col) descending.
+
+    ``key`` extracts (sort value, id) from a result row; by default it reads
+    the attributes named like the two columns from the row object.
+    Returns (rows, next_cursor).
+    """
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        query = query.filter(tuple_(sort_col, id_col) < tuple_(sort_value, last_id))
+    rows = query.order_by(sort_col.desc(), id_col.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not has_more or not rows:
+        return rows, None
+    if key is None:
+        def key(row):  # type: ignore[no-redef]
+            return getattr(row, sort_col.key), getattr(row, id_col.key)
+    sort_value, last_id = key(rows[-1])
+    return rows, encode_cursor(sort_value, last_id)
@@ -0,0 +1,76 @@
+"""Per-request SQL statement counting and per-endpoint query budgets.
+
+Every statement executed while a request is active is counted on ``g``.
+List endpoints declare how many statements they may issue with
+``@query_budget(n)``. The number is a constant: a serializer that lazily
+loads a relationship per row breaks the budget as soon as a page has more
+than a handful of rows.
+
+- Over budget: a warning is logged. With ``QUERY_BUDGET_STRICT`` (meant
+  for CI and local test runs) ``QueryBudgetExceeded`` is raised instead.
+- ``QUERY_COUNT_HEADER`` (default: on in DEBUG) adds ``X-Query-Count`` to
+  responses, so a page can be checked with ``curl -i``.
+"""
+from __future__ import annotations
+
+from functools import wraps
+from typing import Callable
+
+from flask import Flask, current_app, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a view issues more statements than its budget."""
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    if has_request_context():
+        g.query_count = g.get("query_count", 0) + 1
+
+
+def query_count() -> int:
+    """Statements executed so far in the current request."""
+    return int(g.get("query_count", 0)) if has_request_context() else 0
+
+
+def query_budget(max_queries: int) -> Callable:
+    """Check that the decorated view runs at most ``max_queries`` statements."""
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            start = query_count()
+            rv = view(*args, **kwargs)
+            used = query_count() - start
+            g.query_budget = max_queries
+            if used > max_queries:
+                msg = f"{view.__name__} issued {used} SQL statements (budget {max_queries})"
+                if current_app.config.get("QUERY_BUDGET_STRICT"):
+                    raise QueryBudgetExceeded(msg)
+                current_app.logger.warning(msg)
+            return rv
+
+        wrapper.query_budget = max_queries  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+def init_query_counting(app: Flask) -> None:
+    if not event.contains(Engine, "before_cursor_execute", _count_statement):
+        event.listen(Engine, "before_cursor_execute", _count_statement)
+
+    header = app.config.get("QUERY_COUNT_HEADER")
+    if header is None:
+        header = bool(app.config.get("DEBUG"))
+    if not header:
+        return
+
+    @app.after_request
+    def _query_count_header(response):
+        response.headers["X-Query-Count"] = str(query_count())
+        if "query_budget" in g:
+            response.headers["X-Query-Budget"] = str(g.query_budget)
+        return response
@@ -0,0 +1,203 @@
+"""Shared model-to-JSON serializers.
+
+Each model shape is a ``FieldPlan``: an ordered list of (json key,
+attribute, converter) built once at import. Loaded ORM rows keep their
+column values in the instance ``__dict__``, so the plan reads all fields
+with a single ``operator.itemgetter`` call and skips the per-attribute
+descriptor calls. Expired or deferred attributes fall back to
+``attrgetter``, which loads them. Converters run only on the fields that
+need one. Dates are the main case, formatted with ``isoformat()``.
+
+Endpoints compose these plans instead of building the dicts by hand, so
+every endpoint emits the same item shape and the per-row cost stays low on
+500-row admin pages (see ``benchmarks/bench_serialization.py``).
+"""
+from __future__ import annotations
+
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Iterable
+
+from .modules.media.manifest import photo_fields
+
+Field = tuple  # (json key, attribute name) or (json key, attribute name, converter)
+
+
+def iso(value: Any) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+class FieldPlan:
+    """Precompiled attribute -> camelCase key mapping for one model shape."""
+
+    __slots__ = ("fields", "keys", "_get", "_loaded", "_convert", "_single")
+
+    def __init__(self, fields: Iterable[Field]) -> None:
+        self.fields = tuple(tuple(f) for f in fields)
+        self.keys = tuple(f[0] for f in self.fields)
+        self._get = attrgetter(*(f[1] for f in self.fields))
+        self._loaded = itemgetter(*(f[1] for f in self.fields))
+        self._convert: tuple[tuple[int, Callable], ...] = tuple(
+            (i, f[2]) for i, f in enumerate(self.fields) if len(f) > 2 and f[2] is not None
+        )
+        self._single = len(self.fields) == 1
+
+    def __call__(self, obj: Any) -> dict:
+        try:
+            values = self._loaded(obj.__dict__)
+        except (AttributeError, KeyError):
+            values = self._get(obj)
+        if self._single:
+            values = (values,)
+        if self._convert:
+            values = list(values)
+            for i, fn in self._convert:
+                values[i] = fn(values[i])
+        return dict(zip(self.keys, values))
+
+    def extend(self, fields: Iterable[Field]) -> "FieldPlan":
+        """New plan with these fields followed by ``fields``."""
+        return FieldPlan(self.fields + tuple(fields))
+
+
+ITEM_SUMMARY = FieldPlan([
+    ("id", "id"),
+    ("type", "type"),
+    ("title", "title"),
+    ("location", "location"),
+    ("status", "status"),
+])
+
+ITEM_FIELDS = ITEM_SUMMARY.extend([
+    ("description", "description"),
+    ("occurredOn", "occurred_on", iso),
+    ("reportedAt", "reported_at", iso),
+])
+
+USER_CONTACT = FieldPlan([
+    ("id", "id"),
+    ("email", "email"),
+    ("firstName", "first_name"),
+    ("lastName", "last_name"),
+    ("studentId", "student_id"),
+])
+
+CLAIM_FIELDS = FieldPlan([
+    ("id", "id"),
+    ("itemId", "item_id"),
+    ("claimantId", "claimant_user_id"),
+    ("status", "status"),
+    ("createdAt", "created_at", iso),
+    ("approvedAt", "approved_at", iso),
+    ("notes", "notes"),
+])
+
+
+def user_contact(user) -> dict | None:
+    return USER_CONTACT(user) if user is not None else None
+
+
+def item_dict(it, *, manifest: bool = True, reporter: bool = False) -> dict:
+    """Public item shape.
+
+    ``manifest=False`` emits only ``photoUrl`` (older endpoints). With
+    ``reporter=True`` a ``reporter`` block is added when the relationship is
+    set; callers listing many items should eager-load ``Item.reporter``.
+    """
+    out = ITEM_FIELDS(it)
+    if manifest:
+        out.update(photo_fields(it))
+        out["reporterUserId"] = it.reporter_user_id
+    else:
+        out["photoUrl"] = it.photo_url
+    if reporter and it.reporter is not None:
+        out["reporter"] = USER_CONTACT(it.reporter)
+    return out
+
+
+def admin_item_dict(it, ui_status: str) -> dict:
+    """Admin listing shape: public fields plus uiStatus, approval and reporter (null when unknown)."""
+    out = ITEM_FIELDS(it)
+    out["uiStatus"] = ui_status
+    out.update(photo_fields(it))
+    out["reporterUserId"] = it.reporter_user_id
+    out["reporter"] = user_contact(it.reporter)
+    out["approved"] = bool(it.approved)
+    return out
+
+
+def item_summary(it, reporter=None) -> dict:
+    """Compact item block nested in claims."""
+    out = ITEM_SUMMARY(it)
+    out["photoUrl"] = it.photo_url
+    if reporter is not None:
+        out["reporter"] = USER_CONTACT(reporter)
+    return out
+
+
+# Flat rows for CSV/NDJSON exports (app/export.py); column tuples fix the CSV header order
+def _full_name(user) -> str | None:
+    if user is None:
+        return None
+    return " ".join(p for p in (user.first_name, user.last_name) if p) or getattr(user, "name", None)
+
+
+ITEM_EXPORT_COLUMNS = (
+    "id", "type", "title", "description", "location", "occurredOn", "reportedAt", "status",
+    "uiStatus", "approved", "photoUrl", "reporterUserId", "reporterEmail", "reporterName",
+)
+
+
+def item_export_row(it, ui_status: str) -> dict:
+    out = ITEM_FIELDS(it)
+    reporter = it.reporter
+    out.update({
+        "uiStatus": ui_status,
+        "approved": bool(it.approved),
+        "photoUrl": it.photo_url,
+        "reporterUserId": it.reporter_user_id,
+        "reporterEmail": reporter.email if reporter is not None else None,
+        "reporterName": _full_name(reporter),
+    })
+    return out
+
+
+CLAIM_EXPORT_COLUMNS = (
+    "id", "itemId", "claimantId", "status", "createdAt", "approvedAt", "notes",
+    "itemTitle", "itemType", "itemStatus", "claimantEmail", "claimantName", "claimantStudentId",
+)
+
+
+def claim_export_row(c) -> dict:
+    out = CLAIM_FIELDS(c)
+    item, user = c.item, c.claimant
+    out.update({
+        "itemTitle": item.title if item is not None else None,
+        "itemType": item.type if item is not None else None,
+        "itemStatus": item.status if item is not None else None,
+        "claimantEmail": user.email if user is not None else None,
+        "claimantName": _full_name(user),
+        "claimantStudentId": user.student_id if user is not None else None,
+    })
+    return out
+
+
+AUDIT_LOG_FIELDS = FieldPlan([
+    ("id", "id"),
+    ("createdAt", "created_at", iso),
+    ("actorUserId", "actor_user_id"),
+    ("action", "action"),
+    ("entityType", "entity_type"),
+    ("entityId", "entity_id"),
+    ("ipAddress", "ip_address", lambda v: str(v) if v is not None else None),
+    ("details", "details"),
+])
+
+AUDIT_LOG_EXPORT_COLUMNS = (
+    "id", "createdAt", "actorUserId", "actorEmail", "action", "entityType", "entityId", "ipAddress", "details",
+)
+
+
+def audit_log_export_row(log) -> dict:
+    out = AUDIT_LOG_FIELDS(log)
+    out["actorEmail"] = log.actor.email if log.actor is not None else None
+    return out
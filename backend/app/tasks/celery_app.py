@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.schedules import crontab
 
 
 def make_celery() -> Celery:
@@ -7,8 +8,38 @@ def make_celery() -> Celery:
     backend = os.getenv("CELERY_RESULT_BACKEND", broker)
     app = Celery("lostfound", broker=broker, backend=backend, include=[
         "app.tasks.jobs.social",
+        "app.tasks.jobs.lifecycle",
+        "app.tasks.jobs.media",
+        "app.tasks.jobs.outbox",
     ])
     app.conf.update(task_track_started=True)
+    # Periodic jobs (run `celery -A app.tasks.celery_app beat` alongside the worker)
+    app.conf.beat_schedule = {
+        "expire-stale-items": {
+            "task": "app.tasks.jobs.lifecycle.expire_stale_items",
+            "schedule": crontab(hour=3, minute=15),
+        },
+        "sweep-orphaned-media": {
+            "task": "app.tasks.jobs.media.sweep_orphaned_media",
+            "schedule": crontab(hour=4, minute=0),
+        },
+        # Picks up outbox events whose kick was lost (worker restart) and due retries
+        "dispatch-outbox": {
+            "task": "app.tasks.jobs.outbox.dispatch_outbox",
+            "schedule": 60.0,
+        },
+    }
     return app
 
 celery_app = make_celery()
+
+_flask_app = None
+
+
+def flask_app():
+    """Lazily build one Flask app per worker process for tasks that need app context."""
+    global _flask_app
+    if _flask_app is None:
+        from app import create_app
+        _flask_app = create_app()
+    return _flask_app
@@ -0,0 +1,9 @@
+from app.tasks.celery_app import celery_app, flask_app
+
+
+@celery_app.task
+def expire_stale_items(max_age_days: int | None = None) -> dict:
+    from app.modules.items.lifecycle import expire_stale_items as run
+
+    with flask_app().app_context():
+        return run(max_age_days=max_age_days)
@@ -0,0 +1,25 @@
+from app.tasks.celery_app import celery_app, flask_app
+
+
+@celery_app.task
+def generate_item_renditions(item_id: int) -> dict | None:
+    from app.modules.media.renditions import generate_item_renditions as run
+
+    with flask_app().app_context():
+        return run(item_id)
+
+
+@celery_app.task
+def shard_media_layout(batch_size: int = 200) -> dict:
+    from app.modules.media.manifest import shard_existing
+
+    with flask_app().app_context():
+        return shard_existing(batch_size=batch_size)
+
+
+@celery_app.task
+def sweep_orphaned_media(dry_run: bool = False) -> dict:
+    from app.modules.media.gc import sweep_orphans
+
+    with flask_app().app_context():
+        return sweep_orphans(dry_run=dry_run)
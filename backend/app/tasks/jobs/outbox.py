@@ -0,0 +1,9 @@
+from app.tasks.celery_app import celery_app, flask_app
+
+
+@celery_app.task
+def dispatch_outbox(limit: int | None = None) -> dict:
+    from app.outbox import dispatch_pending
+
+    with flask_app().app_context():
+        return dispatch_pending(limit=limit)
@@ -0,0 +1,158 @@
+"""Time serialization of an admin items page: building the dicts and encoding the JSON.
+
+Usage (from backend/):
+
+    python benchmarks/bench_serialization.py [--items 500] [--runs 50]
+
+The page holds transient Item rows, each with a reporter and a ready
+rendition manifest. No database is needed. Rows:
+
+- legacy dicts:  the hand-written _item_to_admin_dict that admin/routes.py
+                 used before app/serializers.py
+- plan dicts:    app.serializers.admin_item_dict (precompiled FieldPlan)
+- stdlib / orjson: Flask's DefaultJSONProvider vs app.json_provider.OrjsonProvider
+                 (production settings: compact, sorted keys)
+
+Reported times are the median per page in milliseconds.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.dirname(HERE)
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+
+def _legacy_admin_dict(item, ui_status: str) -> dict:
+    from app.modules.media.manifest import photo_fields
+
+    reporter = item.reporter
+    return {
+        "id": item.id,
+        "type": item.type,
+        "title": item.title,
+        "description": item.description,
+        "location": item.location,
+        "occurredOn": item.occurred_on.isoformat() if item.occurred_on else None,
+        "reportedAt": item.reported_at.isoformat() if item.reported_at else None,
+        "status": item.status,
+        "uiStatus": ui_status,
+        **photo_fields(item),
+        "reporterUserId": item.reporter_user_id,
+        "reporter": {
+            "id": reporter.id if reporter else None,
+            "email": getattr(reporter, "email", None) if reporter else None,
+            "firstName": getattr(reporter, "first_name", None) if reporter else None,
+            "lastName": getattr(reporter, "last_name", None) if reporter else None,
+            "studentId": getattr(reporter, "student_id", None) if reporter else None,
+        } if reporter else None,
+        "approved": bool(item.approved),
+    }
+
+
+def _manifest(i: int) -> dict:
+    base = f"https://cdn.example.edu/renditions/{{w}}/photo_{i}"
+    sources = [
+        {"width": w, "format": fmt, "url": base.format(w=w) + ext, "bytes": 9000 + w}
+        for w in (320, 640, 1280)
+        for fmt, ext in (("webp", ".webp"), ("jpeg", ".jpg"))
+    ]
+    return {
+        "status": "ready",
+        "original": {"url": f"https://cdn.example.edu/photo_{i}.jpg", "width": 4032, "height": 3024, "bytes": 2_400_000},
+        "thumbnail": {"url": f"https://cdn.example.edu/thumbs/photo_{i}.webp", "width": 480, "height": 360},
+        "thumb": f"https://cdn.example.edu/thumbs/photo_{i}.webp",
+        "thumbFormat": "webp",
+        "sources": sources,
+        "fallback": sources[-1]["url"],
+        "verifiedAt": "2025-01-01T00:00:00+00:00",
+    }
+
+
+def _page(n: int) -> list:
+    from app.models.item import Item
+    from app.models.user import User
+
+    now = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+    rows = []
+    for i in range(n):
+        reporter = User(id=1000 + i % 40, email=f"student{i % 40}@example.edu", first_name="Sam", last_name=f"Lee {i % 40}", student_id=f"S{i % 40:05d}")
+        it = Item(
+            id=i + 1,
+            type="lost" if i % 2 else "found",
+            title=f"Blue water bottle #{i}",
+            description="Stainless steel bottle with stickers, left near the library entrance on the ground floor.",
+            location="Main Library",
+            occurred_on=date(2025, 2, 1) + timedelta(days=i % 28),
+            reported_at=now - timedelta(minutes=i),
+            status="open",
+            photo_url=f"https://cdn.example.edu/photo_{i}.jpg",
+            photo_renditions=_manifest(i),
+            reporter_user_id=reporter.id,
+            approved=bool(i % 3),
+        )
+        it.reporter = reporter
+        rows.append(it)
+    return rows
+
+
+def _median_ms(fn, runs: int) -> float:
+    # As timeit does: cyclic GC pauses would otherwise land on whichever row runs when the heap is largest
+    times = []
+    gc.disable()
+    try:
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+    finally:
+        gc.enable()
+    return round(statistics.median(times) * 1000, 2)
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--items", type=int, default=500)
+    ap.add_argument("--runs", type=int, default=50)
+    args = ap.parse_args(argv)
+
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+
+    from app.json_provider import OrjsonProvider, orjson
+    from app.serializers import admin_item_dict
+
+    app = Flask(__name__)  # production defaults: not debug, so output is compact
+    rows = _page(args.items)
+    builders = {"legacy dicts": _legacy_admin_dict, "plan dicts": admin_item_dict}
+    encoders = {"stdlib": DefaultJSONProvider(app)}
+    if orjson is not None:
+        encoders["orjson"] = OrjsonProvider(app)
+    else:
+        print("orjson not installed; only the stdlib encoder is measured")
+
+    pages = {name: {"items": [build(it, "unclaimed") for it in rows], "count": len(rows), "nextCursor": None} for name, build in builders.items()}
+    assert pages["legacy dicts"] == pages["plan dicts"], "serializers disagree"
+
+    print(f"{args.items} items, median of {args.runs} runs")
+    print(f"{'builder':<14} {'encoder':<8} {'build ms':>9} {'encode ms':>10} {'total ms':>9} {'bytes':>9}")
+    for bname, build in builders.items():
+        build_ms = _median_ms(lambda: [build(it, "unclaimed") for it in rows], args.runs)
+        for ename, provider in encoders.items():
+            page = pages[bname]
+            encode_ms = _median_ms(lambda: provider.response(page).get_data(), args.runs)
+            size = len(provider.response(page).get_data())
+            print(f"{bname:<14} {ename:<8} {build_ms:>9} {encode_ms:>10} {round(build_ms + encode_ms, 2):>9} {size:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+"""Compare thumbnail strategies: CPU time, peak RSS and output size.
+
+Usage (from backend/):
+
+    python benchmarks/bench_thumbnails.py [--megapixels 12 48] [--sources jpg png] [--runs 3]
+
+Each (strategy, image) pair runs in a fresh child process so peak RSS
+(ru_maxrss) is not polluted by earlier runs. Strategies:
+
+- legacy:      the original inline create_item path, the one the engine
+               replaces: Image.open + thumbnail (which already draft-decodes
+               JPEGs), saved as PNG for .png/.webp names and JPEG otherwise,
+               no EXIF orientation
+- full-decode: load the whole bitmap, exif_transpose, then thumbnail. A
+               worst case for reference, not code that ever shipped
+- engine:      app.modules.media.thumbnails.make_thumbnail (JPEG draft decode,
+               EXIF orientation, pixel cap, smallest of WebP/JPEG)
+
+Compare the engine with ``legacy``. For a 12MP JPEG it grows RSS less
+(about +11MB vs +18MB) but uses the same or more CPU (180-190ms vs
+155-180ms), since it also applies EXIF orientation and encodes both WebP and
+JPEG to keep the smaller; its thumbnails are a third of the size and
+correctly rotated. For PNG sources it takes about half the CPU of legacy,
+whose optimized PNG thumbnails are slow to encode and ~40x larger, but both
+decode the whole bitmap.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.dirname(HERE)
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+STRATEGIES = ("legacy", "full-decode", "engine")
+
+
+def _make_photo(path: str, megapixels: float) -> None:
+    """Write a photo-like image (gradients + noise, EXIF orientation 6), JPEG or PNG by extension."""
+    from PIL import Image
+
+    w = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    h = int(w * 3 / 4)
+    base = Image.linear_gradient("L").resize((w, h))
+    noise = Image.effect_noise((w, h), 40)
+    img = Image.merge("RGB", (base, noise, base.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90 CW on display, as phones do for portrait shots
+    if path.endswith(".png"):
+        img.save(path, format="PNG", exif=exif)
+    else:
+        img.save(path, format="JPEG", quality=90, exif=exif)
+
+
+def _run_strategy(strategy: str, path: str) -> dict:
+    from PIL import Image, ImageOps
+
+    from app.modules.media.thumbnails import make_thumbnail
+
+    with open(path, "rb") as f:
+        data = f.read()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.process_time()
+    if strategy == "legacy":
+        img = Image.open(BytesIO(data))
+        img.thumbnail((480, 480))
+        out = BytesIO()
+        fmt = "png" if os.path.splitext(path)[1].lower() in (".png", ".webp") else "jpeg"
+        img.save(out, format=fmt.upper(), optimize=True)
+        size, dims = len(out.getvalue()), img.size
+    elif strategy == "full-decode":
+        img = Image.open(BytesIO(data))
+        img = ImageOps.exif_transpose(img)
+        img.load()
+        img.thumbnail((480, 480))
+        out = BytesIO()
+        img.save(out, format="JPEG", quality=82, optimize=True, progressive=True)
+        size, fmt, dims = len(out.getvalue()), "jpeg", img.size
+    else:
+        thumb = make_thumbnail(data)
+        size, fmt, dims = len(thumb.data), thumb.format, (thumb.width, thumb.height)
+    cpu = time.process_time() - t0
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "strategy": strategy,
+        "cpuMs": round(cpu * 1000, 1),
+        # ru_maxrss is KiB on Linux
+        "peakRssMb": round(rss_after / 1024, 1),
+        "rssGrowthMb": round((rss_after - rss_before) / 1024, 1),
+        "bytes": size,
+        "format": fmt,
+        "dims": list(dims),
+    }
+
+
+def _child(*args: str) -> str:
+    # Linux carries ru_maxrss across exec, so the parent must stay small:
+    # image generation happens in a child too.
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=BACKEND,
+    )
+    return out.stdout.strip()
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--megapixels", type=float, nargs="+", default=[12.0, 48.0])
+    ap.add_argument("--sources", nargs="+", choices=("jpg", "png"), default=["jpg"], help="Source image formats.")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--child", nargs=2, metavar=("STRATEGY", "PATH"), help=argparse.SUPPRESS)
+    ap.add_argument("--make", nargs=2, metavar=("MEGAPIXELS", "PATH"), help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_run_strategy(args.child[0], args.child[1])))
+        return 0
+    if args.make:
+        _make_photo(args.make[1], float(args.make[0]))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'image':>10} {'strategy':<12} {'cpu ms':>8} {'peak RSS MB':>12} {'RSS +MB':>8} {'bytes':>8} {'fmt':<5} dims")
+        for mp in args.megapixels:
+            for ext in args.sources:
+                path = os.path.join(tmp, f"photo_{mp:g}mp.{ext}")
+                _child("--make", str(mp), path)
+                label = f"{mp:g}MP {ext}"
+                for strategy in STRATEGIES:
+                    runs = [json.loads(_child("--child", strategy, path).splitlines()[-1]) for _ in range(max(1, args.runs))]
+                    best = min(runs, key=lambda r: r["cpuMs"])
+                    print(
+                        f"{label:>10} {strategy:<12} {best['cpuMs']:>8} {max(r['peakRssMb'] for r in runs):>12} "
+                        f"{max(r['rssGrowthMb'] for r in runs):>8} {best['bytes']:>8} {best['format']:<5} "
+                        f"{best['dims'][0]}x{best['dims'][1]}"
+                    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
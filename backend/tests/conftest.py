@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Run from anywhere: make the backend package importable as ``app``
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
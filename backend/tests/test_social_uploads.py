@@ -0,0 +1,59 @@
+"""Facebook photo posts must only read the item's own stored upload from disk."""
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from app import create_app
+from app.models.item import Item
+from app.modules.media.storage import LocalStorage
+from app.modules.social.routes import _local_upload_path
+
+TRAVERSAL_URLS = ("/uploads//etc/passwd", "https://x/uploads/../../etc/passwd")
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app()
+    app.config.update(MEDIA_STORAGE="local", UPLOAD_FOLDER=str(tmp_path))
+    app.extensions.pop("media_storage", None)
+    with app.app_context():
+        yield app
+
+
+@pytest.mark.parametrize("url", TRAVERSAL_URLS)
+def test_local_storage_does_not_resolve_outside_its_root(tmp_path, url):
+    storage = LocalStorage(str(tmp_path))
+    assert storage.local_path(storage.rel_for_url(url)) is None
+    assert not storage.exists(storage.rel_for_url(url))
+
+
+@pytest.mark.parametrize("url", TRAVERSAL_URLS)
+def test_client_photo_url_is_not_read_from_disk(app, url):
+    item = Item(photo_url=url, photo_renditions={"status": "external", "original": {"url": url}})
+    assert _local_upload_path(item) is None
+
+
+@pytest.mark.parametrize("url", TRAVERSAL_URLS)
+def test_traversal_source_is_rejected_even_when_it_matches(app, url):
+    source = url.split("/uploads/", 1)[1]
+    item = Item(photo_url=url, photo_renditions={"status": "ready", "source": source})
+    assert _local_upload_path(item) is None
+
+
+def test_stored_upload_is_read_from_disk(app, tmp_path):
+    source = "ab/cd/" + "0" * 32 + ".jpg"
+    os.makedirs(tmp_path / "ab" / "cd")
+    (tmp_path / source).write_bytes(b"jpeg")
+    item = Item(photo_url=f"/uploads/{source}", photo_renditions={"status": "ready", "source": source})
+    assert _local_upload_path(item) == str(tmp_path / source)
+
+
+def test_photo_url_must_match_the_manifest_source(app, tmp_path):
+    source = "ab/cd/" + "0" * 32 + ".jpg"
+    os.makedirs(tmp_path / "ab" / "cd")
+    (tmp_path / source).write_bytes(b"jpeg")
+    (tmp_path / "other.jpg").write_bytes(b"other")
+    item = Item(photo_url="/uploads/other.jpg", photo_renditions={"status": "ready", "source": source})
+    assert _local_upload_path(item) is None
@@ -15,6 +15,8 @@ type ItemCard = {
   reportedAt?: string | null
   photoUrl?: string | null
   photoThumbUrl?: string | null
+  photoSrcset?: string | null
+  photoSrcsetWebp?: string | null
   status?: 'open' | 'matched' | 'claimed' | 'closed' | string
   reporterUserId?: number | null
   reporter?: { id?: number | null; firstName?: string | null; lastName?: string | null; email?: string | null }
@@ -129,6 +131,8 @@ export default function SearchPage() {
             reportedAt: it.reportedAt ?? undefined,
             photoUrl: it.photoThumbUrl || it.photoUrl || undefined,
             photoThumbUrl: it.photoThumbUrl || undefined,
+            photoSrcset: it.photoSrcset ?? null,
+            photoSrcsetWebp: it.photoSrcsetWebp ?? null,
             status: (it.status as ItemCard['status']) ?? 'open',
             reporterUserId: typeof it.reporterUserId === 'number' ? it.reporterUserId : null,
             reporter: it.reporter ? {
@@ -629,7 +633,20 @@ export default function SearchPage() {
                 >
                   <div className="relative aspect-video bg-gray-50">
                     {img ? (
-                      <img src={img} alt={it.title} className="w-full h-full object-cover transition-transform duration-300 group-hover:scale-[1.03]" />
+                      <picture>
+                        {it.photoSrcsetWebp && (
+                          <source type="image/webp" srcSet={it.photoSrcsetWebp} sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw" />
+                        )}
+                        <img
+                          src={img}
+                          srcSet={it.photoSrcset || undefined}
+                          sizes={it.photoSrcset ? '(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw' : undefined}
+                          alt={it.title}
+                          loading="lazy"
+                          decoding="async"
+                          className="w-full h-full object-cover transition-transform duration-300 group-hover:scale-[1.03]"
+                        />
+                      </picture>
                     ) : (
                       <div className="w-full h-full grid place-items-center text-[color:var(--brand)]/40">
                         <svg width="48" height="48" viewBox="0 0 24 24" fill="currentColor"><path d="M5 4h14a1 1 0 0 1 1 1v12.5a.5.5 0 0 1-.8.4L15 14H5a1 1 0 0 1-1-1V5a1 1 0 0 1 1-1Z"/></svg>
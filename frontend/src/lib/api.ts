@@ -49,6 +49,18 @@ function authHeaders(devUserId?: number): Record<string, string> {
   return headers
 }
 
+function normalizeSrcset(input?: string | null): string | null {
+  if (!input) return null
+  return input
+    .split(',')
+    .map((part) => {
+      const [url, descriptor] = part.trim().split(/\s+/, 2)
+      const u = normalizeImageUrl(url) ?? url
+      return descriptor ? `${u} ${descriptor}` : u
+    })
+    .join(', ')
+}
+
 type ItemLite = {
   id: string | number
   name: string
@@ -182,10 +194,109 @@ export type ItemDto = {
   status: string
   photoUrl?: string | null
   photoThumbUrl?: string | null
+  // Responsive renditions built in the background after upload ("url 320w, ...")
+  photoSrcset?: string | null
+  photoSrcsetWebp?: string | null
   reporterUserId?: number | null
   reporter?: { id?: number | null; email?: string | null; firstName?: string | null; lastName?: string | null; studentId?: string | null } | null
 }
 
+type DirectUpload = { key: string; method: string; url: string; headers: Record<string, string> }
+
+// Upload URLs are absolute (S3) or server paths such as /api/v1/items/uploads/...
+function uploadUrl(u: string): string {
+  const base = /^https?:\/\//i.test(API_BASE) ? API_BASE : (typeof window !== 'undefined' ? window.location.origin : API_BASE)
+  return new URL(u, base).toString()
+}
+
+// Two-step photo upload: reserve a key, then PUT the bytes straight to storage
+// (presigned S3, or the backend's streaming handler). Returns the key for
+// `photoKey`, or null when the server cannot take this file directly.
+async function uploadPhotoDirect(file: File, devUserId?: number): Promise<string | null> {
+  try {
+    const res = await fetch(`${API_BASE}/items/uploads`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', ...authHeaders(devUserId) },
+      body: JSON.stringify({ contentType: file.type, size: file.size }),
+    })
+    if (!res.ok) return null
+    const up = (await res.json()) as DirectUpload
+    const put = await fetch(uploadUrl(up.url), { method: up.method || 'PUT', headers: up.headers, body: file })
+    return put.ok ? up.key : null
+  } catch {
+    return null
+  }
+}
+
+// Photos above this go through resumable chunked uploads
+const RESUMABLE_MIN_BYTES = 4 * 1024 * 1024
+
+// Upload-Offset header, else the JSON body's offset (the header is invisible cross-origin unless exposed)
+async function uploadOffset(res: Response): Promise<number | null> {
+  const header = res.headers.get('Upload-Offset')
+  if (header !== null && header.trim() !== '' && Number.isFinite(Number(header))) return Number(header)
+  const body = (await res.json().catch(() => null)) as { offset?: unknown } | null
+  return typeof body?.offset === 'number' ? body.offset : null
+}
+
+// Resumable upload: PATCH chunks at Upload-Offset; after a failure ask the server
+// where it got to and continue from there. Returns the key for `photoKey`, or null.
+async function uploadPhotoResumable(file: File, devUserId?: number, maxRetries = 5): Promise<string | null> {
+  try {
+    const headers = authHeaders(devUserId)
+    const res = await fetch(`${API_BASE}/items/uploads/resumable`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', ...headers },
+      body: JSON.stringify({ contentType: file.type, size: file.size }),
+    })
+    if (!res.ok) return null
+    const session = (await res.json()) as { url: string; chunkSize: number }
+    const url = uploadUrl(session.url)
+    const chunkSize = Math.max(256 * 1024, session.chunkSize || 2 * 1024 * 1024)
+    let offset = 0
+    let failures = 0
+    while (offset < file.size) {
+      let known: number | null = null
+      try {
+        const put = await fetch(url, {
+          method: 'PATCH',
+          headers: { ...headers, 'Upload-Offset': String(offset), 'Content-Type': 'application/offset+octet-stream' },
+          body: file.slice(offset, offset + chunkSize),
+        })
+        known = await uploadOffset(put)
+        if (put.ok && known !== null) { offset = known; failures = 0; continue }
+        // A 409 carries the offset the server has; anything else is resynced below
+        if (put.status !== 409) known = null
+      } catch {
+        known = null
+      }
+      // Conflicts count too, so a client and server that disagree cannot loop forever
+      if (++failures > maxRetries) return null
+      await new Promise((r) => setTimeout(r, 500 * 2 ** failures))
+      if (known === null) {
+        // Resume from whatever the server actually stored (GET, since HEAD has no body to fall back on)
+        const probe = await fetch(url, { headers }).catch(() => null)
+        known = probe?.ok ? await uploadOffset(probe) : null
+      }
+      if (known !== null) offset = known
+    }
+    const fin = await fetch(`${url}/finalize`, { method: 'POST', headers })
+    if (!fin.ok) return null
+    return ((await fin.json()) as { key: string }).key
+  } catch {
+    return null
+  }
+}
+
+async function setPhoto(fd: FormData, file: File | null | undefined, devUserId?: number): Promise<void> {
+  if (!(file instanceof File)) return
+  const key = (file.size > RESUMABLE_MIN_BYTES ? await uploadPhotoResumable(file, devUserId) : null)
+    ?? await uploadPhotoDirect(file, devUserId)
+  // Fall back to a multipart upload through the API
+  if (key) fd.set('photoKey', key)
+  else fd.set('photo', file)
+}
+
 export async function createLostItem(input: CreateLostItemInput, reporterUserId?: number): Promise<ItemDto> {
   const fd = new FormData()
   fd.set('type', 'lost')
@@ -193,7 +304,7 @@ export async function createLostItem(input: CreateLostItemInput, reporterUserId?
   if (input.description) fd.set('description', input.description)
   if (input.location) fd.set('location', input.location)
   if (input.occurredOn) fd.set('occurredOn', input.occurredOn)
-  if (input.photoFile instanceof File) fd.set('photo', input.photoFile)
+  await setPhoto(fd, input.photoFile, reporterUserId)
   const headers: Record<string, string> = authHeaders(reporterUserId)
   const res = await fetch(`${API_BASE}/items`, { method: 'POST', body: fd, headers })
   const data = await res.json().catch(() => ({}))
@@ -214,7 +325,7 @@ export async function createFoundItem(input: CreateFoundItemInput, reporterUserI
   if (input.description) fd.set('description', input.description)
   if (input.location) fd.set('location', input.location)
   if (input.occurredOn) fd.set('occurredOn', input.occurredOn)
-  if (input.photoFile instanceof File) fd.set('photo', input.photoFile)
+  await setPhoto(fd, input.photoFile, reporterUserId)
   const headers: Record<string, string> = authHeaders(reporterUserId)
   const res = await fetch(`${API_BASE}/items`, { method: 'POST', body: fd, headers })
   const data = await res.json().catch(() => ({}))
@@ -244,6 +355,8 @@ export async function listItems(params?: { type?: 'lost' | 'found', reporterUser
     ...it,
     photoUrl: normalizeImageUrl(it.photoUrl || undefined) ?? null,
     photoThumbUrl: normalizeImageUrl(it.photoThumbUrl || undefined) ?? null,
+    photoSrcset: normalizeSrcset(it.photoSrcset),
+    photoSrcsetWebp: normalizeSrcset(it.photoSrcsetWebp),
   }))
 }
 